@@ -0,0 +1,362 @@
+/* ===== Pocket Mentor+ 🎓✨ AI Response Cache & Session Pool =====
+   Remembers finished AI responses across popup openings and service worker
+   restarts, and keeps warm Chrome AI sessions around between calls
+============================================================= */
+
+const INDEX_KEY = 'responseCacheIndex';
+const ENTRY_PREFIX = 'rc_';
+
+// Responses kept, by count and by stored size
+export const RESPONSE_CACHE_ENTRIES = 200;
+export const RESPONSE_CACHE_BYTES = 2 * 1024 * 1024;
+// Responses older than this are computed again
+export const RESPONSE_CACHE_TTL = 7 * 24 * 60 * 60 * 1000;
+// Recency updates are batched into one index write after this delay
+const INDEX_FLUSH_DELAY = 1000;
+
+// Idle sessions are destroyed after this long, and at most this many are kept per configuration
+export const SESSION_IDLE_TIMEOUT = 60 * 1000;
+const SESSIONS_PER_KEY = 2;
+
+/** 64-bit FNV-1a style hash of a string as 16 hex characters */
+export function hashText(text) {
+  let low = 0x811c9dc5;
+  let high = 0xcbf29ce4;
+  for (let i = 0; i < text.length; i++) {
+    const code = text.charCodeAt(i);
+    low = Math.imul(low ^ code, 0x01000193);
+    high = Math.imul(high ^ code ^ (low >>> 16), 0x01000193);
+  }
+  return (high >>> 0).toString(16).padStart(8, '0') + (low >>> 0).toString(16).padStart(8, '0');
+}
+
+/** Options as a stable string, so { a, b } and { b, a } produce the same key */
+export function stableOptions(options = {}) {
+  const keys = Object.keys(options).filter(key => options[key] !== undefined).sort();
+  return JSON.stringify(keys.map(key => [key, options[key]]));
+}
+
+export class ResponseCache {
+  /**
+   * @param {chrome.storage.StorageArea|null} area - Where entries persist; memory only when null
+   * @param {Object} limits - { maxEntries, maxBytes, ttl } overrides
+   */
+  constructor(area, limits = {}) {
+    this.area = area;
+    this.maxEntries = limits.maxEntries || RESPONSE_CACHE_ENTRIES;
+    this.maxBytes = limits.maxBytes || RESPONSE_CACHE_BYTES;
+    this.ttl = limits.ttl || RESPONSE_CACHE_TTL;
+    // key -> { storedAt, size }, least recently used first
+    this.index = null;
+    this.loading = null;
+    // key -> value for entries already read this session
+    this.values = new Map();
+    this.bytes = 0;
+    this.flushTimer = null;
+    // Keys read or written since the last index write, whose recency that write carries over
+    this.touched = new Set();
+    this.writing = Promise.resolve();
+    this.stats = { hits: 0, misses: 0, evictions: 0 };
+  }
+
+  loadIndex() {
+    if (!this.loading) {
+      this.loading = this.readIndex().catch(error => {
+        console.warn('⚠️ Response cache unavailable, continuing without it:', error);
+        this.useIndex(new Map());
+        return this.index;
+      });
+    }
+    return this.loading;
+  }
+
+  async readIndex() {
+    this.index = new Map();
+    if (!this.area) return this.index;
+
+    // Keys are listed before the index is read, so an entry written in between is not taken for an orphan.
+    // Without getKeys (Chrome before 130) listing them means reading every value in the area,
+    // notes included, so the sweep is skipped there.
+    const keys = typeof this.area.getKeys === 'function' ? await this.area.getKeys() : null;
+    const stored = await this.area.get(INDEX_KEY);
+    this.useIndex(indexFromRows(stored[INDEX_KEY]));
+
+    // Entries no index lists, e.g. from a context whose index write lost a race, are never read again
+    const orphans = (keys || []).filter(key => key.startsWith(ENTRY_PREFIX) && !this.index.has(key.slice(ENTRY_PREFIX.length)));
+    if (orphans.length > 0) {
+      await this.area.remove(orphans);
+    }
+    return this.index;
+  }
+
+  /** Replace the index contents in place (callers may hold the Map) and recount the bytes */
+  useIndex(entries) {
+    this.index.clear();
+    this.bytes = 0;
+    for (const [key, entry] of entries) {
+      this.index.set(key, entry);
+      this.bytes += entry.size;
+    }
+    for (const key of this.values.keys()) {
+      if (!this.index.has(key)) this.values.delete(key);
+    }
+  }
+
+  /** The cached value for key, or undefined when missing or expired */
+  async get(key) {
+    const index = await this.loadIndex();
+    const entry = index.get(key);
+    if (!entry) {
+      this.stats.misses++;
+      return undefined;
+    }
+
+    if (Date.now() - entry.storedAt > this.ttl) {
+      await this.delete(key);
+      this.stats.misses++;
+      return undefined;
+    }
+
+    let value = this.values.get(key);
+    if (value === undefined && this.area) {
+      const stored = await this.area.get(ENTRY_PREFIX + key);
+      value = stored[ENTRY_PREFIX + key];
+    }
+    if (value === undefined) {
+      // The index outlived its entry, e.g. after storage was cleared elsewhere
+      await this.delete(key);
+      this.stats.misses++;
+      return undefined;
+    }
+
+    // Move to the most recently used end
+    index.delete(key);
+    index.set(key, entry);
+    this.values.set(key, value);
+    this.touched.add(key);
+    this.scheduleFlush();
+    this.stats.hits++;
+    return value;
+  }
+
+  async set(key, value) {
+    const index = await this.loadIndex();
+    const size = key.length + JSON.stringify(value).length;
+    if (size > this.maxBytes) return;
+
+    const previous = index.get(key);
+    if (previous) {
+      this.bytes -= previous.size;
+      index.delete(key);
+    }
+    index.set(key, { storedAt: Date.now(), size });
+    this.values.set(key, value);
+    this.bytes += size;
+    this.touched.add(key);
+
+    if (this.area) {
+      await this.persist({ key, value });
+    } else {
+      this.evict();
+    }
+  }
+
+  async delete(key) {
+    const index = await this.loadIndex();
+    const entry = index.get(key);
+    if (!entry) return;
+    index.delete(key);
+    this.values.delete(key);
+    this.touched.delete(key);
+    this.bytes -= entry.size;
+    if (this.area) {
+      await this.persist(null, [key]);
+    }
+  }
+
+  async clear() {
+    await this.loadIndex();
+    const keys = new Set(this.index.keys());
+    this.useIndex(new Map());
+    this.touched.clear();
+    if (this.area) {
+      await this.queue(async () => {
+        // Entries other contexts added since this one read the index go too
+        const stored = await this.area.get(INDEX_KEY);
+        for (const [key] of stored[INDEX_KEY] || []) keys.add(key);
+        await this.area.remove([...[...keys].map(key => ENTRY_PREFIX + key), INDEX_KEY]);
+      });
+    }
+  }
+
+  /**
+   * Write the index, merged with what other contexts stored since this one read it.
+   * The popup, notebook and service worker each keep a cache over the same storage, so
+   * the stored index decides which entries exist; this context only adds the entry it
+   * wrote, drops the ones it deleted and moves the ones it used to the recent end.
+   */
+  persist(written = null, removed = []) {
+    return this.queue(async () => {
+      const stored = await this.area.get(INDEX_KEY);
+      const merged = indexFromRows(stored[INDEX_KEY]);
+      for (const key of removed) {
+        merged.delete(key);
+      }
+      for (const [key, entry] of this.index) {
+        if (!this.touched.has(key)) continue;
+        const current = written && key === written.key ? entry : merged.get(key);
+        // Missing means another context evicted or deleted it
+        if (!current) continue;
+        merged.delete(key);
+        merged.set(key, current);
+      }
+      this.touched.clear();
+      this.useIndex(merged);
+
+      const evicted = this.evict();
+      const changes = { [INDEX_KEY]: this.rows() };
+      if (written && this.index.has(written.key)) {
+        changes[ENTRY_PREFIX + written.key] = written.value;
+      }
+      await this.area.set(changes);
+      const stale = [...removed, ...evicted];
+      if (stale.length > 0) {
+        await this.area.remove(stale.map(staleKey => ENTRY_PREFIX + staleKey));
+      }
+    });
+  }
+
+  // Storage writes from this context run one at a time, so each merge sees the previous one
+  queue(write) {
+    const result = this.writing.then(write);
+    this.writing = result.catch(() => {});
+    return result;
+  }
+
+  /** Drop least recently used entries until both limits hold; returns the dropped keys */
+  evict() {
+    const evicted = [];
+    for (const [key, entry] of this.index) {
+      if (this.index.size <= this.maxEntries && this.bytes <= this.maxBytes) break;
+      this.index.delete(key);
+      this.values.delete(key);
+      this.bytes -= entry.size;
+      evicted.push(key);
+    }
+    this.stats.evictions += evicted.length;
+    return evicted;
+  }
+
+  rows() {
+    return [...this.index].map(([key, entry]) => [key, entry.storedAt, entry.size]);
+  }
+
+  scheduleFlush() {
+    if (!this.area || this.flushTimer) return;
+    this.flushTimer = setTimeout(() => {
+      this.flushTimer = null;
+      this.persist().catch(error => {
+        console.warn('⚠️ Failed to save response cache index:', error);
+      });
+    }, INDEX_FLUSH_DELAY);
+  }
+}
+
+// Stored as [key, storedAt, size] rows in recency order
+function indexFromRows(rows = []) {
+  return new Map(rows.map(([key, storedAt, size]) => [key, { storedAt, size }]));
+}
+
+export class SessionPool {
+  /**
+   * @param {Function} create - (apiName, options) => Promise<session>
+   * @param {number} idleTimeout - Milliseconds before an unused session is destroyed
+   */
+  constructor(create, idleTimeout = SESSION_IDLE_TIMEOUT) {
+    this.create = create;
+    this.idleTimeout = idleTimeout;
+    // key -> [{ session, timer }] of warm sessions not currently in use
+    this.idle = new Map();
+    this.stats = { created: 0, reused: 0, destroyed: 0 };
+  }
+
+  /**
+   * Run use(session) on a warm session for this API and configuration.
+   * Prompt sessions keep conversation history, so each call gets a clone of the warm one.
+   */
+  async withSession(apiName, options, use) {
+    const key = `${apiName}:${stableOptions(options)}`;
+    const session = await this.acquire(key, apiName, options);
+
+    const cloneable = apiName === 'prompt' && typeof session.clone === 'function';
+    let worker = session;
+    try {
+      if (cloneable) {
+        worker = await session.clone();
+      }
+      const result = await use(worker);
+      if (cloneable) {
+        await worker.destroy();
+      }
+      this.release(key, session);
+      return result;
+    } catch (error) {
+      // A session that failed mid-call is not trusted again
+      this.destroy(worker);
+      if (worker !== session) {
+        this.release(key, session);
+      }
+      throw error;
+    }
+  }
+
+  async acquire(key, apiName, options) {
+    const warm = this.idle.get(key);
+    if (warm && warm.length > 0) {
+      const { session, timer } = warm.pop();
+      clearTimeout(timer);
+      if (warm.length === 0) this.idle.delete(key);
+      this.stats.reused++;
+      return session;
+    }
+    this.stats.created++;
+    return this.create(apiName, options);
+  }
+
+  release(key, session) {
+    const warm = this.idle.get(key) || [];
+    if (warm.length >= SESSIONS_PER_KEY) {
+      this.destroy(session);
+      return;
+    }
+
+    const slot = { session, timer: null };
+    slot.timer = setTimeout(() => {
+      const list = this.idle.get(key) || [];
+      const position = list.indexOf(slot);
+      if (position !== -1) list.splice(position, 1);
+      if (list.length === 0) this.idle.delete(key);
+      this.destroy(session);
+    }, this.idleTimeout);
+    warm.push(slot);
+    this.idle.set(key, warm);
+  }
+
+  destroy(session) {
+    this.stats.destroyed++;
+    Promise.resolve()
+      .then(() => session.destroy && session.destroy())
+      .catch(error => console.warn('⚠️ Failed to destroy AI session:', error));
+  }
+
+  /** Destroy every idle session, e.g. when switching to the Gemini fallback */
+  drain() {
+    for (const warm of this.idle.values()) {
+      for (const { session, timer } of warm) {
+        clearTimeout(timer);
+        this.destroy(session);
+      }
+    }
+    this.idle.clear();
+  }
+}
@@ -1,12 +1,30 @@
 // ===== Pocket Mentor+ Hybrid AI API Wrappers 🎓✨ =====
 // Client-side wrappers with Chrome Built-in AI + Gemini API fallback
 
+import { ResponseCache, SessionPool, hashText, stableOptions } from './ai-cache.js';
+
+// Text longer than this is summarized chunk by chunk and merged
+const LONG_DOCUMENT_CHARS = 4000;
+// Target chunk size, split on paragraph and then sentence boundaries
+const CHUNK_CHARS = 3000;
+// Chunks processed at once, so a long page does not flood the model
+const CHUNK_CONCURRENCY = 3;
+// Chunk results kept for when the same page is processed again
+const CHUNK_CACHE_SIZE = 256;
+
 class PocketMentorAPI {
   constructor() {
     this.isInitialized = false;
     this.capabilities = {};
     this.fallbackMode = false;
     this.geminiApiKey = null;
+    this.chunkCache = new Map();
+    // Finished responses persist across popup openings and service worker restarts
+    this.responseCache = new ResponseCache(
+      typeof chrome !== 'undefined' && chrome.storage ? chrome.storage.local : null
+    );
+    // Warm Chrome AI sessions are reused instead of paying model startup per call
+    this.sessionPool = new SessionPool((apiName, options) => this.createSession(apiName, options));
     this.init();
   }
 
@@ -92,7 +110,8 @@ class PocketMentorAPI {
 
     await this.checkCapability(apiName);
     
-    const aiAPI = window.ai || chrome.aiOriginTrial;
+    // Service workers have no window, so only the origin trial API is reachable there
+    const aiAPI = (typeof window !== 'undefined' && window.ai) || chrome.aiOriginTrial;
     
     try {
       const session = await aiAPI[apiName].create(options);
@@ -137,129 +156,136 @@ class PocketMentorAPI {
   }
 
   async summarizeText(text, options = {}) {
-    try {
-      if (this.fallbackMode) {
-        return await this.geminiApiCall('summarize', text, options);
+    return this.cachedResponse('summarize', text, options, async () => {
+      if (!options.singlePass && text.length > LONG_DOCUMENT_CHARS) {
+        return await finalResult(this.summarizeLongText(text, options));
       }
 
-      const session = await this.createSession('summarizer', {
-        model: 'gemini-nano',
-        type: options.type || 'key-points',
-        format: options.format || 'markdown',
-        length: options.length || 'medium'
-      });
-      
-      const result = await session.summarize(text);
-      await session.destroy();
+      try {
+        if (this.fallbackMode) {
+          return await this.geminiApiCall('summarize', text, options);
+        }
+
+        const result = await this.sessionPool.withSession('summarizer', {
+          model: 'gemini-nano',
+          type: options.type || 'key-points',
+          format: options.format || 'markdown',
+          length: options.length || 'medium'
+        }, (session) => session.summarize(text));
       
-      return result || "Unable to generate summary.";
-    } catch (error) {
-      console.error('Summarization error:', error);
-      // Fallback to Gemini API
-      if (!this.fallbackMode) {
-        this.fallbackMode = true;
-        return await this.summarizeText(text, options);
+        return result || "Unable to generate summary.";
+      } catch (error) {
+        console.error('Summarization error:', error);
+        // Fallback to Gemini API
+        if (!this.fallbackMode) {
+          this.fallbackMode = true;
+          this.sessionPool.drain();
+          return await this.summarizeText(text, options);
+        }
+        return `⚠️ Summarization failed: ${error.message}`;
       }
-      return `⚠️ Summarization failed: ${error.message}`;
-    }
+    });
   }
 
   async translateText(text, targetLang = 'es', options = {}) {
-    try {
-      if (this.fallbackMode) {
-        return await this.geminiApiCall('translate', text, { ...options, targetLanguage: targetLang });
-      }
-
-      const session = await this.createSession('translator', {
-        sourceLanguage: options.sourceLanguage || 'en',
-        targetLanguage: targetLang
-      });
+    return this.cachedResponse('translate', text, { ...options, targetLanguage: targetLang }, async () => {
+      try {
+        if (this.fallbackMode) {
+          return await this.geminiApiCall('translate', text, { ...options, targetLanguage: targetLang });
+        }
+
+        const result = await this.sessionPool.withSession('translator', {
+          sourceLanguage: options.sourceLanguage || 'en',
+          targetLanguage: targetLang
+        }, (session) => session.translate(text));
       
-      const result = await session.translate(text);
-      await session.destroy();
-      
-      return result || "Unable to translate text.";
-    } catch (error) {
-      console.error('Translation error:', error);
-      // Fallback to Gemini API
-      if (!this.fallbackMode) {
-        this.fallbackMode = true;
-        return await this.translateText(text, targetLang, options);
+        return result || "Unable to translate text.";
+      } catch (error) {
+        console.error('Translation error:', error);
+        // Fallback to Gemini API
+        if (!this.fallbackMode) {
+          this.fallbackMode = true;
+          this.sessionPool.drain();
+          return await this.translateText(text, targetLang, options);
+        }
+        return `⚠️ Translation failed: ${error.message}`;
       }
-      return `⚠️ Translation failed: ${error.message}`;
-    }
+    });
   }
 
   async proofreadText(text, options = {}) {
-    try {
-      if (this.fallbackMode) {
-        return await this.geminiApiCall('rewrite', text, options);
-      }
-
-      // Use rewriter API for proofreading
-      const session = await this.createSession('rewriter', {
-        tone: 'formal',
-        format: 'plain-text',
-        context: 'proofread'
-      });
-      
-      const result = await session.rewrite(text);
-      await session.destroy();
+    return this.cachedResponse('proofread', text, options, async () => {
+      try {
+        if (this.fallbackMode) {
+          return await this.geminiApiCall('rewrite', text, options);
+        }
+
+        // Use rewriter API for proofreading
+        const result = await this.sessionPool.withSession('rewriter', {
+          tone: 'formal',
+          format: 'plain-text',
+          context: 'proofread'
+        }, (session) => session.rewrite(text));
       
-      return result || "Unable to proofread text.";
-    } catch (error) {
-      console.error('Proofreading error:', error);
-      // Fallback to Gemini API
-      if (!this.fallbackMode) {
-        this.fallbackMode = true;
-        return await this.proofreadText(text, options);
+        return result || "Unable to proofread text.";
+      } catch (error) {
+        console.error('Proofreading error:', error);
+        // Fallback to Gemini API
+        if (!this.fallbackMode) {
+          this.fallbackMode = true;
+          this.sessionPool.drain();
+          return await this.proofreadText(text, options);
+        }
+        return await this.generateWithPrompt(`Proofread and correct this text, fixing grammar, spelling, and clarity issues:\n\n${text}`);
       }
-      return await this.generateWithPrompt(`Proofread and correct this text, fixing grammar, spelling, and clarity issues:\n\n${text}`);
-    }
+    });
   }
 
   async rewriteText(text, style = 'polished', options = {}) {
-    try {
-      if (this.fallbackMode) {
-        return await this.geminiApiCall('rewrite', text, { ...options, style });
-      }
-
-      const session = await this.createSession('rewriter', {
-        tone: style,
-        format: options.format || 'plain-text',
-        context: options.context || 'general'
-      });
+    return this.cachedResponse('rewrite', text, { ...options, style }, async () => {
+      try {
+        if (this.fallbackMode) {
+          return await this.geminiApiCall('rewrite', text, { ...options, style });
+        }
+
+        const result = await this.sessionPool.withSession('rewriter', {
+          tone: style,
+          format: options.format || 'plain-text',
+          context: options.context || 'general'
+        }, (session) => session.rewrite(text));
       
-      const result = await session.rewrite(text);
-      await session.destroy();
-      
-      return result || "Unable to rewrite text.";
-    } catch (error) {
-      console.error('Rewriting error:', error);
-      // Fallback to Gemini API
-      if (!this.fallbackMode) {
-        this.fallbackMode = true;
-        return await this.rewriteText(text, style, options);
+        return result || "Unable to rewrite text.";
+      } catch (error) {
+        console.error('Rewriting error:', error);
+        // Fallback to Gemini API
+        if (!this.fallbackMode) {
+          this.fallbackMode = true;
+          this.sessionPool.drain();
+          return await this.rewriteText(text, style, options);
+        }
+        return `⚠️ Rewriting failed: ${error.message}`;
       }
-      return `⚠️ Rewriting failed: ${error.message}`;
-    }
+    });
   }
 
   async explainText(text, options = {}) {
-    if (this.fallbackMode) {
-      return await this.geminiApiCall('explain', text, options);
-    }
+    return this.cachedResponse('explain', text, options, async () => {
+      if (this.fallbackMode) {
+        return await this.geminiApiCall('explain', text, options);
+      }
 
-    const prompt = `Explain the following text in simple, clear terms that anyone can understand. Break down complex concepts and provide context where helpful:\n\n${text}`;
-    return await this.generateWithPrompt(prompt, options);
+      const prompt = `Explain the following text in simple, clear terms that anyone can understand. Break down complex concepts and provide context where helpful:\n\n${text}`;
+      return await this.generateWithPrompt(prompt, options);
+    });
   }
 
   async generateQuiz(text, questionCount = 3, options = {}) {
-    if (this.fallbackMode) {
-      return await this.geminiApiCall('quiz', text, { ...options, questionCount });
-    }
+    return this.cachedResponse('quiz', text, { ...options, questionCount }, async () => {
+      if (this.fallbackMode) {
+        return await this.geminiApiCall('quiz', text, { ...options, questionCount });
+      }
 
-    const prompt = `Create ${questionCount} multiple-choice questions based on the following text. Format as:
+      const prompt = `Create ${questionCount} multiple-choice questions based on the following text. Format as:
 
 Q1: [Question]
 A) [Option A]
@@ -270,15 +296,21 @@ Correct: [Letter]
 
 Text: ${text}`;
     
-    return await this.generateWithPrompt(prompt, options);
+      return await this.generateWithPrompt(prompt, options);
+    });
   }
 
   async generateStudyNotes(text, options = {}) {
-    if (this.fallbackMode) {
-      return await this.geminiApiCall('prompt', text, { ...options, action: 'study-notes' });
-    }
+    return this.cachedResponse('study-notes', text, options, async () => {
+      if (!options.singlePass && text.length > LONG_DOCUMENT_CHARS) {
+        return await finalResult(this.generateLongStudyNotes(text, options));
+      }
 
-    const prompt = `Create comprehensive study notes from this text. Include:
+      if (this.fallbackMode) {
+        return await this.geminiApiCall('prompt', text, { ...options, action: 'study-notes' });
+      }
+
+      const prompt = `Create comprehensive study notes from this text. Include:
 - Key concepts and definitions
 - Important facts and figures  
 - Main themes and ideas
@@ -286,7 +318,8 @@ Text: ${text}`;
 
 Text: ${text}`;
     
-    return await this.generateWithPrompt(prompt, options);
+      return await this.generateWithPrompt(prompt, options);
+    });
   }
 
   async generateWithPrompt(prompt, options = {}) {
@@ -295,14 +328,11 @@ Text: ${text}`;
         return await this.geminiApiCall('prompt', prompt, options);
       }
 
-      const session = await this.createSession('prompt', {
+      const result = await this.sessionPool.withSession('prompt', {
         model: 'gemini-nano',
         temperature: options.temperature || 0.7,
         topK: options.topK || 40
-      });
-      
-      const result = await session.prompt(prompt);
-      await session.destroy();
+      }, (session) => session.prompt(prompt));
       
       return result || "Unable to generate response.";
     } catch (error) {
@@ -310,12 +340,161 @@ Text: ${text}`;
       // Fallback to Gemini API
       if (!this.fallbackMode) {
         this.fallbackMode = true;
+        this.sessionPool.drain();
         return await this.generateWithPrompt(prompt, options);
       }
       return `⚠️ AI generation failed: ${error.message}`;
     }
   }
 
+  // --- Response Cache ---
+  /**
+   * Return the stored response for this action, options and text, or compute
+   * and store it. Pass options.cache = false to always compute.
+   */
+  async cachedResponse(action, text, options, compute) {
+    if (options.cache === false) {
+      return compute();
+    }
+
+    const { cache, concurrency, chunkChars, singlePass, ...shaping } = options;
+    // A single pass and a chunked map-reduce of the same long text give different answers,
+    // and the chunk size shapes the map-reduce one
+    const mode = singlePass ? 'single' : `chunks-${chunkChars || CHUNK_CHARS}`;
+    // Built-in AI and the Gemini fallback answer differently, so each keeps its own entries
+    const keyFor = () => [
+      action,
+      this.fallbackMode ? 'gemini' : 'builtin',
+      mode,
+      hashText(stableOptions(shaping)),
+      text.length,
+      hashText(text)
+    ].join(':');
+
+    const stored = await this.responseCache.get(keyFor());
+    if (stored !== undefined) {
+      return stored;
+    }
+
+    const result = await compute();
+    // Failures come back as warning text and are not worth keeping
+    if (typeof result === 'string' && result && !isFailure(result)) {
+      await this.responseCache.set(keyFor(), result);
+    }
+    return result;
+  }
+
+  // --- Long Documents ---
+  /**
+   * Summarize a long document chunk by chunk. Yields
+   * { type: 'partial', index, total, result, cached } as each chunk finishes,
+   * in completion order, then { type: 'final', result, chunks } once merged.
+   * When a chunk or merge fails, the final result is a ⚠️ warning instead of a
+   * merge over it, with the number of failed parts in `failed`.
+   */
+  summarizeLongText(text, options = {}) {
+    const single = { ...options, singlePass: true };
+    return this.mapReduce('summarize', text, options,
+      (chunk) => this.summarizeText(chunk, single),
+      (combined) => this.summarizeText(combined, single));
+  }
+
+  generateLongStudyNotes(text, options = {}) {
+    const single = { ...options, singlePass: true };
+    return this.mapReduce('study-notes', text, options,
+      (chunk) => this.generateStudyNotes(chunk, single),
+      (combined) => this.generateWithPrompt(`Merge these study notes from consecutive parts of one document into a single set of study notes. Remove repetition and keep every key concept:
+
+${combined}`, options));
+  }
+
+  async *mapReduce(kind, text, options, map, reduce) {
+    const chunkChars = options.chunkChars || CHUNK_CHARS;
+    const concurrency = options.concurrency || CHUNK_CONCURRENCY;
+    const chunks = splitIntoChunks(text, chunkChars);
+
+    if (chunks.length <= 1) {
+      const { result } = await this.cachedChunk(kind, options, chunks[0] || '', map);
+      yield { type: 'final', result, chunks: 1 };
+      return;
+    }
+
+    // Map: cached chunks come back first, the rest as the model finishes them
+    const partials = new Array(chunks.length);
+    for await (const { index, result, cached } of this.mapChunks(kind, options, chunks, map, concurrency)) {
+      partials[index] = result;
+      yield { type: 'partial', index, total: chunks.length, result, cached };
+    }
+
+    // Reduce: merge neighbouring results in document order until one is left
+    let merged = partials;
+    while (merged.length > 1) {
+      // Merging warning text would pass a degraded result off as a good one, and cache it
+      const failed = merged.filter(isFailure);
+      if (failed.length > 0) {
+        const reason = failed[0].replace(/^⚠️\s*/, '');
+        yield {
+          type: 'final',
+          result: `⚠️ ${failed.length} of ${merged.length} parts could not be processed, so they were not merged: ${reason}`,
+          chunks: chunks.length,
+          failed: failed.length
+        };
+        return;
+      }
+
+      const groups = groupForReduce(merged, chunkChars).map(group => group.join('\n\n'));
+      const next = new Array(groups.length);
+      for await (const { index, result } of this.mapChunks(`${kind}-merge`, options, groups, reduce, concurrency)) {
+        next[index] = result;
+      }
+      merged = next;
+    }
+
+    yield { type: 'final', result: merged[0], chunks: chunks.length };
+  }
+
+  /** Run work over items with at most `concurrency` in flight, yielding results as they settle */
+  async *mapChunks(kind, options, items, work, concurrency) {
+    const pending = new Map();
+    let next = 0;
+
+    const launch = () => {
+      const index = next++;
+      pending.set(index, this.cachedChunk(kind, options, items[index], work)
+        .then(({ result, cached }) => ({ index, result, cached })));
+    };
+
+    while (next < items.length && pending.size < concurrency) launch();
+    while (pending.size > 0) {
+      const settled = await Promise.race(pending.values());
+      pending.delete(settled.index);
+      if (next < items.length) launch();
+      yield settled;
+    }
+  }
+
+  async cachedChunk(kind, options, chunk, work) {
+    const key = chunkCacheKey(kind, this.fallbackMode, options, chunk);
+    if (this.chunkCache.has(key)) {
+      const result = this.chunkCache.get(key);
+      // Re-insert so the Map's order stays least recently used first
+      this.chunkCache.delete(key);
+      this.chunkCache.set(key, result);
+      return { result, cached: true };
+    }
+
+    const result = await work(chunk);
+    // Failures come back as warning text and are not worth keeping
+    if (typeof result === 'string' && !isFailure(result)) {
+      // The work may have switched to the Gemini fallback, which then produced the result
+      this.chunkCache.set(chunkCacheKey(kind, this.fallbackMode, options, chunk), result);
+      if (this.chunkCache.size > CHUNK_CACHE_SIZE) {
+        this.chunkCache.delete(this.chunkCache.keys().next().value);
+      }
+    }
+    return { result, cached: false };
+  }
+
   getCapabilities() {
     return this.capabilities;
   }
@@ -325,6 +504,99 @@ Text: ${text}`;
   }
 }
 
+// --- Chunking Helpers ---
+/**
+ * Split text into chunks of at most maxChars, keeping paragraphs whole where
+ * possible, then sentences, and only cutting between words as a last resort.
+ */
+export function splitIntoChunks(text, maxChars = CHUNK_CHARS) {
+  const units = [];
+  for (const paragraph of text.split(/\n\s*\n/)) {
+    const trimmed = paragraph.trim();
+    if (!trimmed) continue;
+    if (trimmed.length <= maxChars) {
+      units.push({ text: trimmed, paragraph: true });
+      continue;
+    }
+
+    let first = true;
+    // Every character lands in some sentence, including punctuation-only runs like a leading "..."
+    for (const sentence of trimmed.match(/[^.!?]*(?:[.!?]+["'\u201d\u2019)\]]*|$)/g)) {
+      for (const piece of splitWords(sentence.trim(), maxChars)) {
+        units.push({ text: piece, paragraph: first });
+        first = false;
+      }
+    }
+  }
+
+  const chunks = [];
+  let current = '';
+  for (const unit of units) {
+    const separator = unit.paragraph ? '\n\n' : ' ';
+    if (current && current.length + separator.length + unit.text.length > maxChars) {
+      chunks.push(current);
+      current = '';
+    }
+    current = current ? current + separator + unit.text : unit.text;
+  }
+  if (current) chunks.push(current);
+  return chunks;
+}
+
+function splitWords(text, maxChars) {
+  const pieces = [];
+  while (text.length > maxChars) {
+    let cut = text.lastIndexOf(' ', maxChars);
+    if (cut <= 0) cut = maxChars;
+    pieces.push(text.slice(0, cut));
+    text = text.slice(cut).trimStart();
+  }
+  if (text) pieces.push(text);
+  return pieces;
+}
+
+// Consecutive results packed into groups that fit a chunk, at least two per group so merging always converges
+function groupForReduce(results, maxChars) {
+  const groups = [];
+  let group = [];
+  let length = 0;
+  for (const result of results) {
+    if (group.length >= 2 && length + result.length > maxChars) {
+      groups.push(group);
+      group = [];
+      length = 0;
+    }
+    group.push(result);
+    length += result.length + 2;
+  }
+  if (group.length === 1 && groups.length > 0) {
+    groups[groups.length - 1].push(group[0]);
+  } else if (group.length > 0) {
+    groups.push(group);
+  }
+  return groups;
+}
+
+// The chunk's hash, plus the backend and options that change the output
+function chunkCacheKey(kind, fallbackMode, options, chunk) {
+  const { cache, concurrency, chunkChars, singlePass, ...shaping } = options;
+  const backend = fallbackMode ? 'gemini' : 'builtin';
+  return `${kind}:${backend}:${stableOptions(shaping)}:${chunk.length}:${hashText(chunk)}`;
+}
+
+// Failed calls return their error as text starting with ⚠️ rather than throwing
+function isFailure(result) {
+  return typeof result === 'string' && result.startsWith('⚠️');
+}
+
+async function finalResult(updates) {
+  let result;
+  for await (const update of updates) {
+    if (update.type === 'final') result = update.result;
+  }
+  return result;
+}
+
 // Create global instance
 const pocketMentorAPI = new PocketMentorAPI();
 
@@ -362,4 +634,12 @@ export async function generateStudyNotes(text, options) {
   return await pocketMentorAPI.generateStudyNotes(text, options);
 }
 
+export function summarizeLongText(text, options) {
+  return pocketMentorAPI.summarizeLongText(text, options);
+}
+
+export function generateLongStudyNotes(text, options) {
+  return pocketMentorAPI.generateLongStudyNotes(text, options);
+}
+
 export default pocketMentorAPI;
\ No newline at end of file
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Pocket Mentor+ Validator Benchmarks
+Measures how the extension validator scales with input size
+"""
+
+import argparse
+import json
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+from backend_test import (
+    API_METHODS, BACKGROUND_LISTENERS, PatternMatcher, PocketMentorExtensionTester,
+    QuietReporter, SnapshotCache, js_index_for, lex_js,
+)
+
+# Per scale step: extra scripts, KB of api.js/content.js/styles.css, icons, permissions
+TREE_SHAPE = {
+    "js_files": 8,
+    "script_kb": 256,
+    "css_kb": 128,
+    "icons": 16,
+    "permissions": 64,
+}
+
+# A metric only regresses when it is this much slower in relative and absolute terms
+DEFAULT_TOLERANCE = 0.25
+NOISE_FLOOR_SECONDS = 0.005
+
+# Committed results of a default run, which every run is compared against unless told otherwise
+DEFAULT_BASELINE = Path(__file__).with_name("backend_benchmark_baseline.json")
+
+# Literals the validator looks for in scripts
+SCAN_PATTERNS = API_METHODS + BACKGROUND_LISTENERS + (
+    "chrome.", "export", "module.exports", "try", "catch", "console.log", "console.error",
+    "window.ai", "chrome.storage", "getSelection", "createElement",
+)
+
+# Statement shapes for synthetic JavaScript, close to what the extension ships
+JS_LINES = [
+    "  const {name} = await chrome.storage.local.get(['{name}']);",
+    "  // retry the {name} request before giving up",
+    "  /* {name}: cached between calls */",
+    "  document.addEventListener('keydown', (e) => this.{name}(e));",
+    "  const el = document.createElement('div'); el.className = `pm-${{this.{name}}}`;",
+    "  try {{ result = await pocketMentorAPI.{api}(text); }} catch (error) {{ console.error('{name}', error); }}",
+    "  if (!{name}) {{ return /^\\s*{name}\\b/i.test(text) ? 1 : total / count; }}",
+    "  chrome.runtime.sendMessage({{ action: '{name}', data: window.getSelection().toString() }});",
+    "  export function {name}(notes) {{ return notes.filter(n => n.type === \"{name}\"); }}",
+]
+
+
+def synthetic_js(size: int, seed: int = 0) -> str:
+    """Generate roughly size characters of JavaScript-like text"""
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        line = rng.choice(JS_LINES).format(name=f"item{rng.randrange(1000)}", api=rng.choice(API_METHODS))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+def make_png(width: int, height: int) -> bytes:
+    """Encode a solid-colour RGBA PNG of the given size"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + b"\x4f\x46\xe5\xff" * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+def synthetic_css(size: int, seed: int = 0) -> str:
+    """Generate roughly size characters of theme-aware CSS"""
+    rng = random.Random(seed)
+    rules = [":root { --primary: #4f46e5; --bg: #ffffff; }",
+             ".dark-theme { --bg: #111827; }", ".light-theme { --bg: #ffffff; }"]
+    length = sum(len(r) + 1 for r in rules)
+    while length < size:
+        name = f"pm-item{rng.randrange(100000)}"
+        rule = f".{name} {{ color: var(--primary); padding: {rng.randrange(24)}px; }}"
+        if rng.random() < 0.05:
+            rule = f"@media (max-width: {rng.randrange(300, 900)}px) {{ {rule} }}"
+        rules.append(rule)
+        length += len(rule) + 1
+    return "\n".join(rules)
+
+
+def generate_tree(root: Path, scale: int) -> Dict[str, int]:
+    """Write a synthetic extension tree; every size in TREE_SHAPE is multiplied by scale"""
+    root.mkdir(parents=True, exist_ok=True)
+    script_size = TREE_SHAPE["script_kb"] * 1024 * scale
+    icon_sizes = [16, 32, 48, 128] * (TREE_SHAPE["icons"] * scale // 4)
+
+    manifest = {
+        "manifest_version": 3,
+        "name": "Pocket Mentor+ (synthetic)",
+        "version": "1.0.0",
+        "description": f"Synthetic benchmark tree at scale {scale}",
+        "icons": {"16": "icon16.png", "48": "icon48.png", "128": "icon128.png"},
+        "permissions": ["contextMenus", "activeTab", "scripting", "storage", "notifications"]
+                       + [f"synthetic.permission{i}" for i in range(TREE_SHAPE["permissions"] * scale)],
+        "background": {"service_worker": "background.js", "type": "module"},
+        "content_scripts": [{"matches": ["<all_urls>"], "js": ["content.js"]}],
+        "action": {"default_popup": "popup.html"},
+    }
+    files = {
+        "manifest.json": json.dumps(manifest, indent=2),
+        "api.js": ("class PocketMentorAPI {\n"
+                   + "".join(f"  async {m}(text) {{ return window.ai ? text : ''; }}\n" for m in API_METHODS)
+                   + "}\n" + synthetic_js(script_size, seed=1)
+                   + "\nexport default new PocketMentorAPI();\n"),
+        "background.js": ("import pocketMentorAPI from './api.js';\n"
+                          + "".join(f"{l}.addListener(() => {{}});\n" for l in BACKGROUND_LISTENERS)
+                          + "chrome.contextMenus.create({ id: 'pm' });\n"
+                          + synthetic_js(script_size // 4, seed=2)),
+        "content.js": ("chrome.runtime.onMessage.addListener(() => {});\n"
+                       + "document.addEventListener('keydown', () => window.getSelection());\n"
+                       + "document.body.appendChild(document.createElement('div'));\n"
+                       + synthetic_js(script_size, seed=3)),
+        "styles.css": synthetic_css(TREE_SHAPE["css_kb"] * 1024 * scale),
+    }
+    for page in ("popup", "notebook"):
+        files[f"{page}.html"] = ("<!DOCTYPE html>\n<html>\n<head>\n"
+                                 "<link rel=\"stylesheet\" href=\"styles.css\">\n</head>\n<body>\n"
+                                 f"<script type=\"module\" src=\"{page}.js\"></script>\n</body>\n</html>\n")
+        files[f"{page}.js"] = "import pocketMentorAPI from './api.js';\n" + synthetic_js(script_size // 8, seed=4)
+    for i in range(TREE_SHAPE["js_files"] * scale):
+        files[f"lib/module{i}.js"] = synthetic_js(16 * 1024, seed=100 + i)
+
+    total = 0
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        total += path.stat().st_size
+    for i, size in enumerate([16, 48, 128] + icon_sizes):
+        name = f"icon{size}.png" if i < 3 else f"icons/icon{i}-{size}.png"
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(make_png(size, size))
+        total += path.stat().st_size
+    return {"files": len(files) + 3 + len(icon_sizes), "bytes": total}
+
+
+def time_best(func, repeat: int) -> float:
+    """Best wall time of func over repeat runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_scanner(sizes: List[int], pattern_counts: List[int], repeat: int = 3) -> List[Dict[str, Any]]:
+    """Time the single-pass scanner against one str.find sweep per pattern"""
+    all_patterns = sorted(set(SCAN_PATTERNS))
+    # Extra literals beyond the real pattern set, so pattern count can grow
+    extra = [f"pocketMentor{i}" for i in range(max(pattern_counts))]
+    results = []
+
+    print("\n⏱️ Pattern scanner (best of {})".format(repeat))
+    print(f"{'bytes':>10} {'patterns':>9} {'trie ms':>9} {'sweep ms':>9} {'used':>6} {'ns/byte':>8}")
+    for size in sizes:
+        text = synthetic_js(size)
+        for count in pattern_counts:
+            patterns = (all_patterns + extra)[:count]
+            trie = PatternMatcher(patterns, trie=True)
+            sweep = PatternMatcher(patterns, trie=False)
+            matcher = PatternMatcher(patterns)
+
+            assert trie.scan(text).positions == sweep.scan(text).positions
+
+            trie_time = time_best(lambda: trie.scan(text), repeat)
+            sweep_time = time_best(lambda: sweep.scan(text), repeat)
+            # What the validator pays with the strategy it picks for this many patterns
+            scan_time = trie_time if matcher.uses_trie else sweep_time
+            result = {
+                "bytes": size,
+                "patterns": count,
+                "strategy": "trie" if matcher.uses_trie else "sweep",
+                "scan_seconds": scan_time,
+                "trie_seconds": trie_time,
+                "naive_seconds": sweep_time,
+                "ns_per_byte": scan_time * 1e9 / size,
+            }
+            results.append(result)
+            print(f"{size:>10} {count:>9} {trie_time * 1000:>9.2f} {sweep_time * 1000:>9.2f} "
+                  f"{result['strategy']:>6} {result['ns_per_byte']:>8.2f}")
+    return results
+
+
+def bench_lexer(sizes: List[int], repeat: int = 3) -> List[Dict[str, Any]]:
+    """Time the JavaScript token index across file sizes"""
+    results = []
+    print("\n⏱️ JavaScript lexer (best of {})".format(repeat))
+    print(f"{'bytes':>10} {'lex ms':>9} {'ns/byte':>8} {'index ms':>9}")
+    for size in sizes:
+        text = synthetic_js(size)
+        lex_time = time_best(lambda: lex_js(text), repeat)
+        # What a check pays: large scripts are scanned rather than tokenized
+        index_time = time_best(lambda: js_index_for(text).call_args("getURL"), repeat)
+        result = {"bytes": size, "lex_seconds": lex_time, "ns_per_byte": lex_time * 1e9 / size,
+                  "index_seconds": index_time}
+        results.append(result)
+        print(f"{size:>10} {lex_time * 1000:>9.2f} {result['ns_per_byte']:>8.2f} {index_time * 1000:>9.2f}")
+    return results
+
+
+def bench_trees(scales: List[int], repeat: int = 3, jobs: int = 1) -> List[Dict[str, Any]]:
+    """Time run_all_tests and each check on synthetic trees, cold and with a warm snapshot cache"""
+    results = []
+    print("\n⏱️ Synthetic extension trees (best of {})".format(repeat))
+    print(f"{'scale':>6} {'files':>6} {'bytes':>11} {'cold ms':>9} {'warm ms':>9}  slowest check")
+    workdir = Path(tempfile.mkdtemp(prefix="pocket-mentor-bench-"))
+    try:
+        for scale in scales:
+            root = workdir / f"scale{scale}"
+            shape = generate_tree(root, scale)
+
+            def run(snapshots: SnapshotCache):
+                tester = PocketMentorExtensionTester(str(root), snapshots=snapshots, reporter=QuietReporter())
+                return tester.run_all_tests(jobs=jobs)
+
+            cold_runs = []
+            for _ in range(repeat):
+                with SnapshotCache() as snapshots:
+                    started = time.perf_counter()
+                    records = run(snapshots)
+                    cold_runs.append((time.perf_counter() - started, records))
+            cold_time, cold_records = min(cold_runs, key=lambda r: r[0])
+
+            with SnapshotCache() as warm_cache:
+                run(warm_cache)
+                warm_time = time_best(lambda: run(warm_cache), repeat)
+
+            checks = {t.name: t.duration for t in cold_records.timings if t.kind == "check"}
+            slowest = max(checks, key=checks.get)
+            result = {
+                "scale": scale,
+                "files": shape["files"],
+                "bytes": shape["bytes"],
+                "cold_seconds": cold_time,
+                "warm_seconds": warm_time,
+                "checks": checks,
+            }
+            results.append(result)
+            print(f"{scale:>6} {shape['files']:>6} {shape['bytes']:>11} {cold_time * 1000:>9.2f} "
+                  f"{warm_time * 1000:>9.2f}  {slowest} ({checks[slowest] * 1000:.2f} ms)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def flatten_metrics(results: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
+    """Name every timing in a results document, e.g. trees/scale=4/test_css_file"""
+    metrics = {}
+    for entry in results.get("scanner", []):
+        metrics[f"scanner/bytes={entry['bytes']}/patterns={entry['patterns']}"] = entry["scan_seconds"]
+    for entry in results.get("lexer", []):
+        metrics[f"lexer/bytes={entry['bytes']}"] = entry["lex_seconds"]
+        if "index_seconds" in entry:
+            metrics[f"lexer/bytes={entry['bytes']}/index"] = entry["index_seconds"]
+    for entry in results.get("trees", []):
+        prefix = f"trees/scale={entry['scale']}"
+        metrics[f"{prefix}/cold"] = entry["cold_seconds"]
+        metrics[f"{prefix}/warm"] = entry["warm_seconds"]
+        for check, seconds in entry["checks"].items():
+            metrics[f"{prefix}/{check}"] = seconds
+    return metrics
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any],
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Describe every metric that is slower than the baseline beyond tolerance"""
+    current = flatten_metrics(results)
+    previous = flatten_metrics(baseline)
+    regressions = []
+    for name in sorted(current.keys() & previous.keys()):
+        now, before = current[name], previous[name]
+        if now > before * (1 + tolerance) and now - before > NOISE_FLOOR_SECONDS:
+            regressions.append(f"{name}: {before * 1000:.2f} ms -> {now * 1000:.2f} ms "
+                               f"(+{(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the Pocket Mentor+ extension validator")
+    parser.add_argument("--sizes", default="65536,262144,1048576,4194304",
+                        help="Comma-separated synthetic file sizes in bytes")
+    parser.add_argument("--patterns", default="8,16,32,64",
+                        help="Comma-separated pattern counts for the scanner benchmark")
+    parser.add_argument("--scales", default="1,4,16",
+                        help="Comma-separated scale factors for synthetic extension trees")
+    parser.add_argument("--suites", default="scanner,lexer,trees",
+                        help="Comma-separated benchmarks to run: scanner, lexer, trees")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Worker processes for the checks of each tree run (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--json", metavar="FILE", help="Write machine-readable results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", default=str(DEFAULT_BASELINE),
+                        help="Fail if any timing regressed against this earlier --json output "
+                             f"(default: {DEFAULT_BASELINE.name}; refresh it with --json)")
+    parser.add_argument("--no-baseline", dest="baseline", action="store_const", const=None,
+                        help="Do not compare against a baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown against the baseline (default: {DEFAULT_TOLERANCE})")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main benchmark runner"""
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    pattern_counts = [int(s) for s in args.patterns.split(",")]
+    scales = [int(s) for s in args.scales.split(",")]
+    suites = args.suites.split(",")
+
+    # Read before running, so --json can refresh the same file
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except OSError as e:
+            print(f"❌ Could not read baseline {args.baseline}: {e}")
+            sys.exit(1)
+
+    results = {}
+    if "scanner" in suites:
+        results["scanner"] = bench_scanner(sizes, pattern_counts, args.repeat)
+    if "lexer" in suites:
+        results["lexer"] = bench_lexer(sizes, args.repeat)
+    if "trees" in suites:
+        results["trees"] = bench_trees(scales, args.repeat, args.jobs)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} timings regressed against {args.baseline}:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,49 +4,1468 @@ Pocket Mentor+ Chrome Extension Testing Suite
 Tests the extension files, structure, and functionality
 """
 
+import argparse
+import collections
+import contextlib
+import cProfile
+import functools
+import glob
+import hashlib
+import io
 import json
+import mmap
 import os
+import posixpath
+import stat
+import struct
 import sys
 import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, FrozenSet, Iterable, List, Tuple, Any, Optional
+
+# Pattern sets at least this large are matched with one trie regex instead of a str.find sweep each;
+# below it the sweeps measured as fast or faster at every file size
+TRIE_MIN_PATTERNS = 64
+
+# Files at or above this size are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+
+# Default location of the incremental results cache, relative to the tree
+RESULTS_CACHE_FILE = ".pocket-mentor-cache.json"
+
+API_METHODS = (
+    "summarizeText",
+    "translateText",
+    "proofreadText",
+    "rewriteText",
+    "explainText",
+    "generateQuiz",
+    "generateStudyNotes",
+)
+
+BACKGROUND_LISTENERS = (
+    "chrome.runtime.onInstalled",
+    "chrome.contextMenus.onClicked",
+    "chrome.runtime.onMessage",
+)
+
+HTML_TAGS = ('<html', '<head>', '<body', '</html>')
+
+CSS_PATTERNS = frozenset((":root", "light-theme", "dark-theme", "@media"))
+
+# Most bytes each kind of entry point may load before the payload check fails
+PAYLOAD_BUDGETS = {
+    'service_worker': 256 * 1024,
+    'content_script': 64 * 1024,
+    'page': 512 * 1024,
+}
+
+# Manifest keys naming extension pages, as paths of nested keys
+MANIFEST_PAGES = (
+    ('action', 'default_popup'),
+    ('browser_action', 'default_popup'),
+    ('options_page',),
+    ('options_ui', 'page'),
+    ('side_panel', 'default_path'),
+    ('devtools_page',),
+)
+
+# Image budgets: largest single image, most bytes per pixel of real or declared size, and
+# widest side in pixels. Raw RGBA is 4 bytes per pixel, so a compressed image above that
+# carries dead weight; nothing an extension draws needs more than 512px.
+ASSET_BUDGETS = {
+    'image_bytes': 256 * 1024,
+    'image_bytes_per_pixel': 4.0,
+    'image_max_side': 512,
+}
+
+IMAGE_SUFFIXES = ('.png', '.svg')
+# Icon files named for their size, e.g. icon48.png
+ICON_FILE_NAME = re.compile(r"(?:^|/)icon[-_]?(\d+)\.png$", re.I)
+
+# Directories that are never part of the packaged extension
+UNPACKAGED_DIRS = ('node_modules', '__pycache__')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+SVG_HEADER_BYTES = 4096
+SVG_ROOT_TAG = re.compile(r"<svg\b[^>]*>", re.I)
+SVG_ATTRIBUTE = re.compile(r"""\b(width|height|viewBox)\s*=\s*["']([^"']*)["']""", re.I)
+
+HTML_SCRIPT_SRC = re.compile(r"""<script\b[^>]*?\bsrc\s*=\s*["']?([^"'\s>]+)""", re.I)
+HTML_LINK_TAG = re.compile(r"<link\b[^>]*>", re.I)
+HTML_ATTRIBUTE = re.compile(r"""\b(rel|href)\s*=\s*["']?([^"'\s>]+)""", re.I)
+HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+CSS_IMPORT = re.compile(r"""@import\s+(?:url\(\s*)?["']?([^"')\s;]+)""", re.I)
+URL_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*:", re.I)
+
+# Rule blocks two stylesheets must share before the overlap is reported
+CSS_SHARED_MIN_BYTES = 512
+
+# Most bytes of unused rules a loaded stylesheet may carry before the selector check warns
+CSS_BUDGETS = {
+    'css_unused_bytes': 2 * 1024,
+}
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+# At-rules whose blocks hold ordinary style rules; others (keyframes, font-face) are left alone
+CSS_GROUPING_RULES = frozenset(('@media', '@supports', '@layer', '@container', '@document'))
+CSS_EMPTY_GROUP = re.compile(r"@(?:media|supports|layer|container|document)\b[^{};]*\{\s*\}")
+# Braces, and strings whose braces do not count; a lone quote opens a string that never closes
+CSS_BLOCK_TOKEN = re.compile(r"""[{}]|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|["']""", re.S)
+CSS_SELECTOR_NAME = re.compile(r"([.#])(-?[_a-zA-Z][\w-]*)")
+# Parts of a selector whose class and id names need not exist for it to match
+CSS_SELECTOR_IGNORED = re.compile(r"""\[[^\]]*\]|"[^"]*"|'[^']*'|:not\([^()]*\)""")
+JS_TEMPLATE_LITERAL = re.compile(r"`(?:[^`\\]|\\.)*`", re.S)
+JS_INTERPOLATION = re.compile(r"\$\{[^{}`]*\}")
+# A selector followed by a declaration, which plain HTML templates never contain
+CSS_TEMPLATE_RULE = re.compile(r"[\w\])*]\s*\{\s*-{0,2}[a-zA-Z][\w-]*\s*:")
+MARKUP_NAME = re.compile(r"[\w-]+")
+MARKUP_SEPARATORS = {code: ' ' for code in range(128) if not re.match(r"[\w-]", chr(code))}
+# A name ending in a dash right before `${`, matched backwards from that dash
+TEMPLATE_NAME_PREFIX_REVERSED = re.compile(r"-[\w-]+")
+TEMPLATE_NAME_MAX = 256
+TEMPLATE_NAME_SUFFIX = re.compile(r"\}(-[\w-]+)")
+
+
+def format_bytes(size: float) -> str:
+    """Human-readable byte count, e.g. 12.3 KB"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} MB"
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte count with an optional K or M suffix, e.g. 64K"""
+    text = text.strip().upper().rstrip('B')
+    multiplier = {'K': 1024, 'M': 1024 * 1024}.get(text[-1:], 1)
+    return int(float(text.rstrip('KM')) * multiplier)
+
+
+def image_dimensions(name: str, header: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    """Return (format, width, height) from the first bytes of a PNG or SVG file.
+
+    SVGs without width/height fall back to the viewBox; dimensions that cannot
+    be determined are None. Raises ValueError when the header is not valid.
+    """
+    if name.lower().endswith('.png'):
+        if header[:8] != PNG_SIGNATURE or header[12:16] != b'IHDR' or len(header) < 24:
+            raise ValueError("not a valid PNG header")
+        width, height = struct.unpack('>II', header[16:24])
+        return 'PNG', width, height
+
+    tag = SVG_ROOT_TAG.search(header.decode('utf-8', errors='replace'))
+    if tag is None:
+        raise ValueError(f"no <svg> element in the first {SVG_HEADER_BYTES} bytes")
+    attributes = {key.lower(): value for key, value in SVG_ATTRIBUTE.findall(tag.group())}
+
+    def length(value: Optional[str]) -> Optional[int]:
+        match = re.match(r"\s*([\d.]+)\s*(px)?\s*$", value or '')
+        return round(float(match.group(1))) if match else None
+
+    width, height = length(attributes.get('width')), length(attributes.get('height'))
+    view_box = attributes.get('viewbox', '').replace(',', ' ').split()
+    if (width is None or height is None) and len(view_box) == 4:
+        width, height = length(view_box[2]), length(view_box[3])
+    return 'SVG', width, height
+
+
+def walk_tree(root: Path, ignore: Tuple[str, ...] = ()):
+    """Yield every regular file under root, skipping hidden entries and ignored names.
+
+    A subdirectory with its own manifest.json is a separate extension tree, such as a
+    variant build kept next to the source, and is not descended into.
+    """
+    pending = [str(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name in ignore:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if not os.path.isfile(os.path.join(entry.path, 'manifest.json')):
+                    pending.append(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
+def list_packaged_files(root: Path, suffixes: Tuple[str, ...]) -> List[str]:
+    """Sorted tree-relative paths of packaged files with one of the given suffixes"""
+    return sorted(
+        Path(os.path.relpath(entry.path, root)).as_posix()
+        for entry in walk_tree(root, UNPACKAGED_DIRS)
+        if entry.name.lower().endswith(suffixes)
+    )
+
+
+def find_all(text: str, pattern: str) -> List[int]:
+    """Start of every occurrence of pattern, overlapping ones included"""
+    found = []
+    i = text.find(pattern)
+    while i != -1:
+        found.append(i)
+        i = text.find(pattern, i + 1)
+    return found
+
+
+def trie_pattern(patterns: Iterable[str]) -> str:
+    """Build a regex for a set of literals with shared prefixes factored out.
+
+    Matching then costs one trie walk per position instead of one attempt per
+    literal, and greedy optional groups make the longest literal win.
+    """
+    trie: Dict[str, Any] = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ''
+        if len(alternatives) == 1 and '' not in node:
+            return alternatives[0]
+        body = '(?:' + '|'.join(alternatives) + ')'
+        return body + '?' if '' in node else body
+
+    return build(trie)
+
+
+class PatternMatcher:
+    """Finds every occurrence of a set of literals.
+
+    Small sets use one str.find sweep per literal, which beats a combined
+    regex below TRIE_MIN_PATTERNS literals (see backend_benchmark.py --suites
+    scanner); the checks here scan 4-6. Larger sets use one trie regex pass:
+    each search reports the longest literal starting at a position, and the
+    shorter literals that are prefixes of it come from a precomputed table.
+    Either way overlapping and nested occurrences are all found.
+    """
+
+    def __init__(self, patterns: Iterable[str], trie: Optional[bool] = None):
+        self.patterns = frozenset(patterns)
+        # None picks the strategy by pattern count; the benchmark forces each one
+        self.uses_trie = len(self.patterns) >= TRIE_MIN_PATTERNS if trie is None else trie
+        if self.uses_trie:
+            self._regex = re.compile(trie_pattern(self.patterns))
+            self._prefixes = {
+                longest: [p for p in self.patterns if longest.startswith(p)]
+                for longest in self.patterns
+            }
+
+    def scan(self, text: str) -> 'PatternIndex':
+        """Build a pattern -> positions index for text"""
+        if not self.uses_trie:
+            return PatternIndex({p: find_all(text, p) for p in self.patterns})
+
+        positions: Dict[str, List[int]] = {p: [] for p in self.patterns}
+        search = self._regex.search
+        prefixes = self._prefixes
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            for pattern in prefixes[match.group()]:
+                positions[pattern].append(start)
+            match = search(text, start + 1)
+        return PatternIndex(positions)
+
+
+@functools.lru_cache(maxsize=32)
+def pattern_matcher(patterns: FrozenSet[str]) -> PatternMatcher:
+    """Compile a matcher once per distinct pattern set"""
+    return PatternMatcher(patterns)
+
+
+class PatternIndex:
+    """Positions of each scanned pattern within one file"""
+
+    __slots__ = ('positions',)
+
+    def __init__(self, positions: Dict[str, List[int]]):
+        self.positions = positions
+
+    def __contains__(self, pattern: str) -> bool:
+        # A KeyError here means a check asked about a pattern it never scanned for
+        return bool(self.positions[pattern])
+
+    def count(self, pattern: str) -> int:
+        return len(self.positions[pattern])
+
+
+# Keywords after which a '/' starts a regex literal rather than a division
+REGEX_PRECEDING_KEYWORDS = frozenset((
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+    "throw", "case", "do", "else", "yield", "await",
+))
+
+# Keywords that can be followed by '(' without being a call
+JS_KEYWORDS = REGEX_PRECEDING_KEYWORDS | frozenset((
+    "if", "for", "while", "switch", "catch", "function", "class", "try",
+    "finally", "const", "let", "var", "export", "import", "async", "super",
+))
+
+# Keywords whose parenthesized condition can be followed by a regex literal, as in `if (x) /re/.test(y)`
+JS_CONDITION_KEYWORDS = frozenset(("if", "while", "for"))
+
+JS_NAME = r"[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*"
+JS_QUOTED = r"""'(?:[^'\\\n]|\\[\s\S])*'|"(?:[^"\\\n]|\\[\s\S])*\""""
+
+# Only the tokens the index needs. Everything else, like operators and
+# punctuation, is skipped by the regex engine rather than a Python loop; the
+# leading lookahead lets it reject most skipped positions on the first character.
+# A whole member chain is one match, with an optional call and first argument.
+JS_TOKEN_SOURCE = r"""
+    (?=[{first}])(?:
+      (?P<chain>{name}(?:\s*\??\.\s*{name})*)
+      (?P<call>\s*\(\s*(?P<arg>{quoted}|`(?:[^`\\$]|\\[\s\S]|\$(?!\{{))*`)?)?
+    | (?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+    | (?P<string>'(?:[^'\\\n]|\\[\s\S])*'?|"(?:[^"\\\n]|\\[\s\S])*"?)
+    | (?P<number>\.?\d[\w.]*)
+    | (?P<slash>/)
+    | (?P<tick>`)
+    {extra})
+"""
+JS_TOKEN_FIRST = r"""\w$.\u0080-\uffff/'"`"""
+JS_TOKEN = re.compile(JS_TOKEN_SOURCE.format(
+    first=JS_TOKEN_FIRST, name=JS_NAME, quoted=JS_QUOTED, extra=''), re.X)
+# Inside a ${...} substitution braces are tracked too, to find the one that resumes the template
+JS_TOKEN_IN_TEMPLATE = re.compile(JS_TOKEN_SOURCE.format(
+    first=JS_TOKEN_FIRST + '{}', name=JS_NAME, quoted=JS_QUOTED, extra='| (?P<brace>[{}])'), re.X)
+JS_CHAIN_DOT = re.compile(r"\s*\??\.\s*")
+
+# Scripts larger than this are answered by JsTextScan instead of being tokenized
+JS_INDEX_MAX_BYTES = 256 * 1024
+JS_SCAN_DECLARATION = re.compile(
+    r"(?:class(?<![\w$]class)|function(?<![\w$]function))\s*\*?\s*(" + JS_NAME + ")")
+JS_SCAN_IMPORT = re.compile(
+    r"(?:from(?<![\w$.]from)|import(?<![\w$.]import))\s*"
+    r"(?:(?P<static>" + JS_QUOTED + r")|\(\s*(?P<dynamic>" + JS_QUOTED + r"))")
+
+JS_REGEX_LITERAL = re.compile(r"/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+
+# Inside a template literal: the next escape, closing backtick or substitution
+JS_TEMPLATE_PART = re.compile(r"\\[\s\S]|`|\$\{")
+
+
+class JsIndex:
+    """Identifiers, member paths and call sites of one script, outside comments and strings"""
+
+    __slots__ = ('identifiers', 'paths', 'namespaces', 'calls', 'declarations', 'imports')
+
+    def __init__(self):
+        self.identifiers: Dict[str, List[int]] = {}
+        # Dotted member paths of two or more segments, e.g. chrome.runtime.onMessage
+        self.paths: Dict[str, List[int]] = {}
+        # First segment of every dotted path, e.g. chrome
+        self.namespaces = set()
+        # Callee (full path and last segment) -> first argument if it is a string literal
+        self.calls: Dict[str, List[Optional[str]]] = {}
+        # Names introduced by class and function declarations
+        self.declarations = set()
+        # Module specifiers of import/export-from statements and import() calls, with a dynamic flag
+        self.imports: List[Tuple[str, bool]] = []
+
+    def has_identifier(self, name: str) -> bool:
+        return name in self.identifiers
+
+    def has_path(self, path: str) -> bool:
+        return path in self.paths
+
+    def uses_namespace(self, name: str) -> bool:
+        return name in self.namespaces
+
+    def has_call(self, callee: str, first_arg: Optional[str] = None) -> bool:
+        """Check for a call, optionally with a given string literal as first argument"""
+        args = self.calls.get(callee)
+        if args is None:
+            return False
+        return first_arg is None or first_arg in args
+
+    def call_args(self, callee: str) -> List[Optional[str]]:
+        """First arguments of every call to callee, None where it is not a string literal"""
+        return self.calls.get(callee, [])
+
+
+class JsTextScan:
+    """Answers the JsIndex questions with regex searches over the raw text.
+
+    Used for scripts above JS_INDEX_MAX_BYTES, where tokenizing would cost far
+    more than the substring checks the token index replaced. Like those
+    checks, it does not skip comments or strings.
+    """
+
+    __slots__ = ('text', '_declarations', '_imports')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._declarations = None
+        self._imports = None
+
+    @property
+    def declarations(self) -> set:
+        if self._declarations is None:
+            self._declarations = set(JS_SCAN_DECLARATION.findall(self.text))
+        return self._declarations
+
+    @property
+    def imports(self) -> List[Tuple[str, bool]]:
+        if self._imports is None:
+            self._imports = [
+                (m.group('static')[1:-1], False) if m.group('static') else (m.group('dynamic')[1:-1], True)
+                for m in JS_SCAN_IMPORT.finditer(self.text)
+            ]
+        return self._imports
+
+    @staticmethod
+    def _path(path: str) -> str:
+        # The boundary check follows the first name, so the regex engine can look for that literal first
+        first, *rest = [re.escape(name) for name in path.split('.')]
+        return r'\s*\??\.\s*'.join([first + r'(?<![\w$]' + first + ')'] + rest)
+
+    def has_identifier(self, name: str) -> bool:
+        return re.search(self._path(name) + r'(?![\w$])', self.text) is not None
+
+    def has_path(self, path: str) -> bool:
+        return re.search(self._path(path) + r'(?![\w$])', self.text) is not None
+
+    def uses_namespace(self, name: str) -> bool:
+        return re.search(self._path(name) + r'\s*\??\.\s*[A-Za-z_$]', self.text) is not None
+
+    def has_call(self, callee: str, first_arg: Optional[str] = None) -> bool:
+        return any(first_arg is None or arg == first_arg for arg in self.call_args(callee))
+
+    def call_args(self, callee: str) -> List[Optional[str]]:
+        pattern = self._path(callee) + r'\s*\(\s*(' + JS_QUOTED + r')?'
+        return [m.group(1)[1:-1] if m.group(1) else None for m in re.finditer(pattern, self.text)]
+
+
+def regex_allowed(text: str, slash: int, comment: Tuple[int, int]) -> bool:
+    """Decide whether the '/' at slash starts a regex literal, from the code before it"""
+    i = slash - 1
+    while True:
+        while i >= 0 and text[i] in ' \t\r\n':
+            i -= 1
+        # Step over the comment matched last, if it sits right before the slash
+        if comment[0] <= i < comment[1]:
+            i = comment[0] - 1
+            continue
+        break
+    if i < 0:
+        return True
+
+    c = text[i]
+    if c == '_' or c == '$' or c.isalnum():
+        end = i + 1
+        while i >= 0 and (text[i] == '_' or text[i] == '$' or text[i].isalnum()):
+            i -= 1
+        return text[i + 1:end] in REGEX_PRECEDING_KEYWORDS
+    if c == ')':
+        # Division, unless the parentheses hold an if/while/for condition
+        depth = 0
+        while i >= 0:
+            if text[i] == ')':
+                depth += 1
+            elif text[i] == '(':
+                depth -= 1
+                if depth == 0:
+                    break
+            i -= 1
+        i -= 1
+        while i >= 0 and text[i] in ' \t\r\n':
+            i -= 1
+        end = i + 1
+        while i >= 0 and (text[i] == '_' or text[i] == '$' or text[i].isalnum()):
+            i -= 1
+        return text[i + 1:end] in JS_CONDITION_KEYWORDS
+    # After a literal, a closing bracket or another regex it is a division
+    return c not in ']}\'"`/'
+
+
+def lex_js(text: str) -> JsIndex:
+    """Build a JsIndex in one pass, skipping comments, strings and regex literals.
+
+    This is a tokenizer rather than a parser: each match is a comment, a
+    string, a member chain joined across '.' and '?.' (with the call and
+    string first argument that follow it), a number, a '/' or a template
+    literal. Template substitutions are lexed as code, and a '/' is read as a
+    regex literal from the code just before it.
+    """
+    index = JsIndex()
+    identifiers = index.identifiers
+    calls = index.calls
+    search_template = JS_TEMPLATE_PART.search
+    split_chain = JS_CHAIN_DOT.split
+
+    end = len(text)
+    comment = (0, 0)              # span of the last comment, for regex_allowed
+    last_chain = None             # the last token, if it was a bare name
+    last_end = 0
+    declare_end = -1              # end of a 'class' or 'function' keyword
+    depth = 0
+    templates: List[int] = []     # brace depth at each open ${ substitution
+
+    def scan_template(pos: int) -> Tuple[int, Optional[str]]:
+        """Skip template text from pos; returns where code resumes and the text if the literal closed"""
+        text_start = pos
+        while True:
+            part = search_template(text, pos)
+            if part is None:
+                return end, None
+            pos = part.end()
+            if part.group() == '`':
+                return pos, text[text_start:part.start()]
+            if part.group() == '${':
+                templates.append(depth)
+                return pos, None
+
+    pos = 0
+    while pos < end:
+        # Matching restarts after anything skipped by hand: templates, regex literals, substitutions
+        resume = end
+        for m in (JS_TOKEN_IN_TEMPLATE if templates else JS_TOKEN).finditer(text, pos):
+            kind = m.lastgroup
+            start = m.start()
+
+            if kind == 'chain':
+                chain = m.group()
+                if '.' not in chain:
+                    # The common case: a bare name with no call after it
+                    identifiers.setdefault(chain, []).append(start)
+                    if declare_end >= 0:
+                        if text[declare_end:start].strip() in ('', '*'):
+                            index.declarations.add(chain)
+                        declare_end = -1
+                    elif chain == 'class' or chain == 'function':
+                        declare_end = m.end()
+                    last_chain, last_end = chain, m.end()
+                    continue
+                names = split_chain(chain)
+            elif kind == 'call' or kind == 'arg':
+                chain = m.group('chain')
+                names = split_chain(chain) if '.' in chain else [chain]
+            else:
+                names = None
+
+            if names is not None:
+                # A member chain, or a chain followed by a call
+                for name in names:
+                    identifiers.setdefault(name, []).append(start)
+                declared = declare_end >= 0 and text[declare_end:start].strip() in ('', '*')
+                declare_end = -1
+                if declared:
+                    index.declarations.add(names[0])
+                elif len(names) > 1:
+                    index.namespaces.add(names[0])
+                    for i in range(2, len(names) + 1):
+                        index.paths.setdefault('.'.join(names[:i]), []).append(start)
+
+                if kind == 'chain':
+                    last_chain, last_end = chain, m.end()
+                    continue
+                arg = m.group('arg')
+                literal = arg[1:-1] if arg is not None else None
+                if chain == 'import':
+                    if literal is not None:
+                        index.imports.append((literal, True))
+                elif not declared and not (len(names) == 1 and chain in JS_KEYWORDS):
+                    calls.setdefault(chain if len(names) == 1 else '.'.join(names), []).append(literal)
+                    if len(names) > 1:
+                        calls.setdefault(names[-1], []).append(literal)
+                last_chain = None
+                continue
+
+            declare_end = -1
+            if kind == 'comment':
+                comment = m.span()
+                continue
+
+            literal = None
+            if kind == 'string':
+                token = m.group()
+                closed = len(token) > 1 and token[-1] == token[0]
+                literal = token[1:-1] if closed else token[1:]
+            elif kind == 'tick':
+                resume, literal = scan_template(m.end())
+            elif kind == 'brace':
+                if m.group() == '{':
+                    depth += 1
+                elif depth == templates[-1]:
+                    # The substitution is over; the template text continues
+                    templates.pop()
+                    resume, _ = scan_template(m.end())
+                else:
+                    depth -= 1
+            elif kind == 'slash' and regex_allowed(text, start, comment):
+                regex = JS_REGEX_LITERAL.match(text, start)
+                if regex is not None:
+                    resume = regex.end()
+
+            if literal is not None and (last_chain == 'from' or last_chain == 'import') \
+                    and (last_end == start or text[last_end:start].isspace()):
+                index.imports.append((literal, False))
+            last_chain = None
+            if resume != end or kind == 'tick':
+                break
+        pos = resume
+
+    return index
+
+
+def js_index_for(text: str):
+    """A JsIndex for normal scripts, or a JsTextScan for ones too large to tokenize cheaply"""
+    return lex_js(text) if len(text) <= JS_INDEX_MAX_BYTES else JsTextScan(text)
+
+
+class CssRule:
+    """One style rule with its position in the stylesheet and the at-rules around it"""
+
+    __slots__ = ('selectors', 'body', 'context', 'start', 'brace', 'end', 'size', 'key')
+
+    def __init__(self, text: str, start: int, brace: int, end: int, context: str):
+        self.selectors = split_selectors(text[start:brace])
+        self.body = text[brace + 1:end - 1]
+        self.context = context
+        self.start = start
+        self.brace = brace
+        self.end = end
+        self.size = len(text[start:end].encode('utf-8'))
+        # Identity for duplicate detection: context, selectors and declarations
+        declarations = " ".join(self.body.split())
+        for mark in ":;,":
+            declarations = declarations.replace(f" {mark}", mark).replace(f"{mark} ", mark)
+        self.key = (context, ",".join(self.selectors), declarations.strip(" ;"))
+
+
+def split_selectors(prelude: str) -> List[str]:
+    """Split a selector list on top-level commas, normalizing whitespace"""
+    if not any(bracket in prelude for bracket in '()[]'):
+        return [" ".join(selector.split()) for selector in prelude.split(',') if selector.strip()]
+    selectors, depth, current = [], 0, []
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    selectors.append(''.join(current))
+    return [" ".join(selector.split()) for selector in selectors if selector.strip()]
+
+
+def css_block_end(text: str, brace: int, end: int) -> int:
+    """Position just past the brace closing the block opened at brace"""
+    depth = 0
+    for match in CSS_BLOCK_TOKEN.finditer(text, brace, end):
+        token = match.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        elif len(token) == 1:
+            # A string left open runs to the end of the enclosing block
+            return end
+    return end
+
+
+def parse_css(text: str) -> List[CssRule]:
+    """Style rules in source order, including those nested in @media and similar blocks"""
+    # Comments become spaces so rule offsets still index the original text
+    stripped = CSS_COMMENT.sub(lambda m: re.sub(r"\S", " ", m.group()), text)
+    rules: List[CssRule] = []
+    pending = [(0, len(stripped), '')]
+    while pending:
+        pos, end, context = pending.pop()
+        block_rules = []
+        while pos < end:
+            brace = stripped.find('{', pos, end)
+            if brace == -1:
+                break
+            semicolon = stripped.find(';', pos, brace)
+            if semicolon != -1:
+                # A statement at-rule such as @import or @charset
+                pos = semicolon + 1
+                continue
+            close = css_block_end(stripped, brace, end)
+            prelude = stripped[pos:brace]
+            start = pos + len(prelude) - len(prelude.lstrip())
+            prelude = prelude.strip()
+            if prelude.startswith('@'):
+                if prelude.split(None, 1)[0].lower() in CSS_GROUPING_RULES:
+                    pending.append((brace + 1, close - 1, f"{context} {prelude}".strip()))
+            elif prelude:
+                block_rules.append(CssRule(stripped, start, brace, close, context))
+            pos = close
+        rules.extend(block_rules)
+    rules.sort(key=lambda rule: rule.start)
+    for rule in rules:
+        rule.body = text[rule.brace + 1:rule.end - 1]
+    return rules
+
+
+def css_in_js(text: str) -> Tuple[str, List[str]]:
+    """Split script text into markup-only text and the stylesheets its template literals inject"""
+    stylesheets = []
+
+    def extract(match):
+        literal = match.group()
+        # Interpolations become filler of the same length so positions line up
+        css = JS_INTERPOLATION.sub(lambda m: "0" * len(m.group()), literal[1:-1])
+        if not CSS_TEMPLATE_RULE.search(css):
+            return literal
+        stylesheets.append(css)
+        return "``"
+
+    return JS_TEMPLATE_LITERAL.sub(extract, text), stylesheets
+
+
+def markup_names(text: str) -> set:
+    """Every run of word characters and dashes in text, as MARKUP_NAME would find them"""
+    # Splitting ASCII text on punctuation is several times faster than findall, but
+    # translate loses that edge on text with emoji or other non-ASCII characters
+    if not text.isascii():
+        return set(MARKUP_NAME.findall(text))
+    return set(text.translate(MARKUP_SEPARATORS).split())
+
+
+def template_prefixes(text: str) -> set:
+    """Names like `status-` that a template literal completes, e.g. `status-${type}`"""
+    prefixes = set()
+    pos = text.find('-${')
+    while pos != -1:
+        before = text[max(0, pos - TEMPLATE_NAME_MAX):pos + 1][::-1]
+        match = TEMPLATE_NAME_PREFIX_REVERSED.match(before)
+        if match:
+            prefixes.add(match.group()[::-1])
+        pos = text.find('-${', pos + 3)
+    return prefixes
+
+
+class SelectorUsage:
+    """Class and id names that the extension's markup and scripts can put on elements"""
+
+    def __init__(self, sources: Iterable[str] = ()):
+        self.names = set()
+        prefixes, suffixes = set(), set()
+        for text in sources:
+            self.names.update(markup_names(text))
+            # `status-${type}` and `${theme}-theme` can produce any name with that prefix or suffix
+            if '${' in text:
+                prefixes.update(template_prefixes(text))
+                suffixes.update(TEMPLATE_NAME_SUFFIX.findall(text))
+        self.prefixes = tuple(sorted(prefixes))
+        self.suffixes = tuple(sorted(suffixes))
+        self._selectors: Dict[str, bool] = {}
+
+    @classmethod
+    def combine(cls, usages: Iterable['SelectorUsage']) -> 'SelectorUsage':
+        """Usage of several sources from the usage of each, without scanning them again"""
+        combined = cls()
+        prefixes, suffixes = set(), set()
+        for usage in usages:
+            combined.names |= usage.names
+            prefixes.update(usage.prefixes)
+            suffixes.update(usage.suffixes)
+        combined.prefixes = tuple(sorted(prefixes))
+        combined.suffixes = tuple(sorted(suffixes))
+        return combined
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names or name.startswith(self.prefixes) or name.endswith(self.suffixes)
+
+    def selector_used(self, selector: str) -> bool:
+        """Whether every class and id the selector requires can exist"""
+        used = self._selectors.get(selector)
+        if used is None:
+            names = CSS_SELECTOR_NAME.findall(CSS_SELECTOR_IGNORED.sub("", selector))
+            used = self._selectors[selector] = all(name in self for _, name in names)
+        return used
+
+
+def prune_css(text: str, usage: SelectorUsage, rules: Optional[List[CssRule]] = None) -> str:
+    """Drop rules nothing can match, unused selectors, and earlier copies of repeated rules"""
+    rules = parse_css(text) if rules is None else rules
+    last = {rule.key: i for i, rule in enumerate(rules)}
+    pieces, pos = [], 0
+    for i, rule in enumerate(rules):
+        used = [selector for selector in rule.selectors if usage.selector_used(selector)]
+        # An identical later rule wins the cascade anyway, so earlier copies can go
+        if not used or last[rule.key] != i:
+            pieces.append(text[pos:rule.start])
+            pos = rule.end
+        elif len(used) < len(rule.selectors):
+            pieces.append(text[pos:rule.start])
+            pieces.append(", ".join(used) + " ")
+            pos = rule.brace
+    pieces.append(text[pos:])
+    pruned, previous = "".join(pieces), None
+    while pruned != previous:
+        previous, pruned = pruned, CSS_EMPTY_GROUP.sub("", pruned)
+    return pruned
+
+
+class FileSnapshot:
+    """Immutable view of one file's bytes, read and decoded lazily on first use.
+
+    A pickled snapshot keeps only the file's identity, timings and digest, so a check run
+    in a pool worker can hand back what it read without sending the content.
+    """
+
+    __slots__ = ('path', 'mtime_ns', 'size', 'loaded_ns', 'read_ns', 'decode_ns',
+                 '_data', '_text', '_digest', '_indexes', '_js_index', '_css_rules', '_markup',
+                 '_usage')
+
+    def __init__(self, path: Path, mtime_ns: int, size: int):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # perf_counter_ns when the bytes were read, and how long reading and decoding took
+        self.loaded_ns = 0
+        self.read_ns = 0
+        self.decode_ns = 0
+        self._data = None
+        self._text = None
+        self._digest = None
+        self._indexes: Dict[FrozenSet[str], PatternIndex] = {}
+        self._js_index = None
+        self._css_rules = None
+        self._markup = None
+        self._usage = None
+
+    def __getstate__(self):
+        return (self.path, self.mtime_ns, self.size, self.loaded_ns, self.read_ns, self.decode_ns,
+                self._digest)
+
+    def __setstate__(self, state):
+        self.__init__(*state[:3])
+        self.loaded_ns, self.read_ns, self.decode_ns, self._digest = state[3:]
+
+    @property
+    def data(self):
+        """Raw file bytes (an mmap for large files)"""
+        if self._data is None:
+            started = time.perf_counter_ns()
+            with open(self.path, 'rb') as f:
+                if self.size >= MMAP_THRESHOLD:
+                    self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    self._data = f.read()
+            self.loaded_ns = time.perf_counter_ns()
+            self.read_ns = self.loaded_ns - started
+        return self._data
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the file content"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.data).hexdigest()
+        return self._digest
+
+    def head(self, size: int) -> bytes:
+        """The first size bytes, read without loading the whole file"""
+        if self._data is not None:
+            return bytes(self._data[:size])
+        with open(self.path, 'rb') as f:
+            return f.read(size)
+
+    @property
+    def text(self) -> str:
+        """File content decoded as UTF-8"""
+        if self._text is None:
+            data = self.data
+            started = time.perf_counter_ns()
+            self._text = str(memoryview(data), 'utf-8')
+            self.decode_ns = time.perf_counter_ns() - started
+        return self._text
+
+    def index(self, patterns: FrozenSet[str]) -> PatternIndex:
+        """Scan the text for a pattern set once and reuse the index afterwards"""
+        index = self._indexes.get(patterns)
+        if index is None:
+            index = self._indexes[patterns] = pattern_matcher(patterns).scan(self.text)
+        return index
+
+    def js_index(self) -> JsIndex:
+        """Lex the text as JavaScript once and reuse the index afterwards.
+
+        Scripts above JS_INDEX_MAX_BYTES get a JsTextScan with the same queries instead.
+        """
+        if self._js_index is None:
+            self._js_index = js_index_for(self.text)
+        return self._js_index
+
+    def css_rules(self) -> List[CssRule]:
+        """Parse the text as a stylesheet once and reuse the rules afterwards"""
+        if self._css_rules is None:
+            self._css_rules = parse_css(self.text)
+        return self._css_rules
+
+    def markup(self) -> Tuple[str, List[Tuple[str, List[CssRule]]]]:
+        """The text with script-injected CSS removed, and each injected stylesheet with its rules"""
+        if self._markup is None:
+            if self.path.suffix == '.js':
+                text, stylesheets = css_in_js(self.text)
+                self._markup = (text, [(css, parse_css(css)) for css in stylesheets])
+            else:
+                self._markup = (self.text, [])
+        return self._markup
+
+    def selector_usage(self) -> SelectorUsage:
+        """Class and id names the markup can produce, collected once"""
+        if self._usage is None:
+            self._usage = SelectorUsage([self.markup()[0]])
+        return self._usage
+
+    def close(self):
+        """Release the memory map of a large file; decoded text and indexes stay usable"""
+        data, self._data = self._data, None
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+class SnapshotCache:
+    """Process-wide cache of file snapshots keyed by path, mtime and size.
+
+    A snapshot is closed when a newer one replaces it or its file disappears; close()
+    releases everything, and the cache can be used as a context manager.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, FileSnapshot] = {}
+
+    def __enter__(self) -> 'SnapshotCache':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, path: Path) -> Optional[FileSnapshot]:
+        """Return a snapshot of path, or None if it is not a regular file"""
+        key = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.discard(key)
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            self.discard(key)
+            return None
+
+        snapshot = self._entries.get(key)
+        if snapshot is None or snapshot.mtime_ns != st.st_mtime_ns or snapshot.size != st.st_size:
+            replaced = snapshot
+            snapshot = self._entries[key] = FileSnapshot(Path(path), st.st_mtime_ns, st.st_size)
+            if replaced is not None:
+                replaced.close()
+        return snapshot
+
+    def discard(self, key: str):
+        """Drop and close the snapshot stored under an absolute path, if any"""
+        snapshot = self._entries.pop(key, None)
+        if snapshot is not None:
+            snapshot.close()
+
+    def prune(self):
+        """Drop snapshots whose files were deleted or changed since they were taken"""
+        for key, snapshot in list(self._entries.items()):
+            try:
+                st = os.stat(key)
+                current = st.st_mtime_ns == snapshot.mtime_ns and st.st_size == snapshot.size
+            except OSError:
+                current = False
+            if not current:
+                self.discard(key)
+
+    def clear(self):
+        self.close()
+
+    def close(self):
+        """Close and drop every snapshot"""
+        snapshots = list(self._entries.values())
+        self._entries.clear()
+        for snapshot in snapshots:
+            snapshot.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every tester in the process so repeated runs reuse unchanged files
+SNAPSHOT_CACHE = SnapshotCache()
+
+
+class CheckResult:
+    """Outcome of one assertion made by a check"""
+
+    __slots__ = ('name', 'status', 'severity', 'file', 'message', 'duration', 'check')
+
+    def __init__(self, name: str, status: str, severity: str, message: str,
+                 file: Optional[str] = None, duration: float = 0.0, check: str = ''):
+        self.name = name
+        self.status = status          # 'passed' or 'failed'
+        self.severity = severity      # 'info', 'warning' or 'error'
+        self.file = file
+        self.message = message
+        self.duration = duration      # seconds spent producing this result
+        self.check = check            # name of the test_* method that reported it
+
+    @property
+    def passed(self) -> bool:
+        return self.status == 'passed'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CheckResult':
+        return cls(**data)
+
+
+class Timing:
+    """Wall time of one check or one file read during a run"""
+
+    __slots__ = ('kind', 'name', 'duration', 'size', 'cached')
+
+    def __init__(self, kind: str, name: str, duration: float, size: Optional[int] = None,
+                 cached: bool = False):
+        self.kind = kind              # 'check' or 'read'
+        self.name = name              # test_* method or file name
+        self.duration = duration      # seconds
+        self.size = size              # bytes read, for 'read' timings
+        self.cached = cached          # replayed from the incremental cache
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class RunResults(list):
+    """Result records of one run, with per-check and per-read timings alongside"""
+
+    def __init__(self, records: Iterable[CheckResult] = (), timings: Optional[List[Timing]] = None):
+        super().__init__(records)
+        self.timings: List[Timing] = timings if timings is not None else []
+
+    def slowest(self, count: int) -> List[Timing]:
+        return sorted(self.timings, key=lambda t: t.duration, reverse=True)[:count]
+
+
+def summarize(records: List[CheckResult]) -> Dict[str, Any]:
+    """Aggregate counts for a list of results"""
+    total = len(records)
+    passed = sum(1 for r in records if r.passed)
+    return {
+        'total_tests': total,
+        'passed': passed,
+        'failed': total - passed,
+        'errors': sum(1 for r in records if r.severity == 'error'),
+        'warnings': sum(1 for r in records if r.severity == 'warning'),
+        'success_rate': (passed / total * 100) if total > 0 else 0,
+    }
+
+
+class Reporter:
+    """Collects report output in memory and writes it to the stream in one go"""
+
+    def __init__(self, stream=None, slowest: int = 0):
+        self.stream = stream if stream is not None else sys.stdout
+        self.slowest = slowest
+        self.out = io.StringIO()
+
+    def start(self, extension_path: Path):
+        pass
+
+    def note(self, text: str):
+        pass
+
+    def section(self, text: str):
+        pass
+
+    def result(self, record: CheckResult):
+        pass
+
+    def finish(self, extension_path: Path, records: List[CheckResult]):
+        pass
+
+    def render_batch(self, reports: List[Tuple[str, List[CheckResult], str]]):
+        """Report on several trees; each report is (path, records, human output)"""
+        pass
+
+    def flush(self):
+        self.stream.write(self.out.getvalue())
+        self.stream.flush()
+        self.out = io.StringIO()
+
+
+class HumanReporter(Reporter):
+    """Emoji progress lines and a summary with next steps"""
+
+    def write(self, text: str = ""):
+        self.out.write(text + "\n")
+
+    def start(self, extension_path: Path):
+        self.write("🚀 Starting Pocket Mentor+ Extension Tests...\n")
+
+    def note(self, text: str):
+        self.write(text)
+
+    def section(self, text: str):
+        self.write(text)
+
+    def result(self, record: CheckResult):
+        icon = {'info': "✅", 'warning': "⚠️", 'error': "❌"}[record.severity]
+        self.write(f"{icon} {record.name}: {record.message}")
+
+    def finish(self, extension_path: Path, records: List[CheckResult]):
+        summary = summarize(records)
+        errors = [r for r in records if r.severity == 'error']
+        warnings = [r for r in records if r.severity == 'warning']
+
+        self.write(f"\n📊 Test Summary:")
+        self.write(f"Total Tests: {summary['total_tests']}")
+        self.write(f"✅ Passed: {summary['passed']}")
+        self.write(f"❌ Failed: {summary['failed']}")
+        self.write(f"⚠️ Warnings: {summary['warnings']}")
+        self.write(f"Success Rate: {summary['success_rate']:.1f}%")
+        
+        if errors:
+            self.write(f"\n❌ Critical Issues ({len(errors)}):")
+            for error in errors:
+                self.write(f"  • {error.name}: {error.message}")
+        
+        if warnings:
+            self.write(f"\n⚠️ Warnings ({len(warnings)}):")
+            for warning in warnings:
+                self.write(f"  • {warning.name}: {warning.message}")
+        
+        self.write(f"\n🎯 Next Steps:")
+        if not errors:
+            self.write("✅ Extension structure is valid!")
+            self.write("📝 Load the extension in Chrome for functional testing:")
+            self.write("   1. Go to chrome://extensions/")
+            self.write("   2. Enable Developer mode")
+            self.write("   3. Click 'Load unpacked' and select /app folder")
+            self.write("   4. Enable Chrome AI flags:")
+            self.write("      - chrome://flags/#optimization-guide-on-device-model")
+            self.write("      - chrome://flags/#prompt-api-for-gemini-nano")
+            self.write("   5. Restart Chrome and test functionality")
+        else:
+            self.write("🔧 Fix critical issues before loading the extension")
+            self.write("📖 Check Chrome Extension documentation for guidance")
+
+        if self.slowest and isinstance(records, RunResults):
+            self.write_slowest(records.slowest(self.slowest))
+
+    def write_slowest(self, timings: List[Timing], label: str = ""):
+        self.write(f"\n🐢 Slowest {len(timings)}{label}:")
+        for timing in timings:
+            detail = " (cached)" if timing.cached else ""
+            if timing.size is not None:
+                detail = f" ({timing.size} bytes)"
+            self.write(f"  {timing.duration * 1000:9.2f} ms  {timing.kind:<5} {timing.name}{detail}")
+
+    def render_batch(self, reports: List[Tuple[str, List[CheckResult], str]]):
+        for path, records, output in reports:
+            self.write(f"\n{'=' * 60}\n📁 {path}\n{'=' * 60}")
+            self.out.write(output)
+
+        self.write(f"\n📦 Batch Summary ({len(reports)} trees):")
+        for path, records, output in reports:
+            summary = summarize(records)
+            status = "✅" if summary['failed'] == 0 else "❌"
+            self.write(f"{status} {path}: {summary['passed']}/{summary['total_tests']} passed, "
+                       f"{summary['errors']} errors, {summary['warnings']} warnings "
+                       f"({summary['success_rate']:.1f}%)")
+
+        if self.slowest:
+            for path, records, _ in reports:
+                if isinstance(records, RunResults):
+                    self.write_slowest(records.slowest(self.slowest), f" in {path}")
+
+
+class JsonReporter(Reporter):
+    """One JSON document with a summary and every result record"""
+
+    @staticmethod
+    def tree_report(path: str, records: List[CheckResult]) -> Dict[str, Any]:
+        return {
+            'extension_path': path,
+            'summary': summarize(records),
+            'results': [r.to_dict() for r in records],
+            'timings': [t.to_dict() for t in getattr(records, 'timings', [])],
+        }
+
+    def finish(self, extension_path: Path, records: List[CheckResult]):
+        json.dump(self.tree_report(str(extension_path), records), self.out, indent=2, ensure_ascii=False)
+        self.out.write("\n")
+
+    def render_batch(self, reports: List[Tuple[str, List[CheckResult], str]]):
+        trees = [self.tree_report(path, records) for path, records, _ in reports]
+        all_records = [r for _, records, _ in reports for r in records]
+        json.dump({'summary': summarize(all_records), 'trees': trees}, self.out, indent=2, ensure_ascii=False)
+        self.out.write("\n")
+
+
+class JUnitReporter(Reporter):
+    """JUnit XML with one testsuite per check; warnings are failures of type 'warning'"""
+
+    def finish(self, extension_path: Path, records: List[CheckResult]):
+        self.render_batch([(str(extension_path), records, '')])
+
+    def render_batch(self, reports: List[Tuple[str, List[CheckResult], str]]):
+        root = ET.Element('testsuites')
+        all_records = []
+        for path, records, _ in reports:
+            all_records.extend(records)
+            suites: Dict[str, List[CheckResult]] = {}
+            for record in records:
+                suites.setdefault(record.check, []).append(record)
+            check_times = {t.name: t.duration for t in getattr(records, 'timings', []) if t.kind == 'check'}
+            for check, suite_records in suites.items():
+                summary = summarize(suite_records)
+                suite_time = check_times.get(check, sum(r.duration for r in suite_records))
+                suite = ET.SubElement(root, 'testsuite', {
+                    'name': f"{path}:{check}",
+                    'tests': str(summary['total_tests']),
+                    'failures': str(summary['failed']),
+                    'time': f"{suite_time:.6f}",
+                })
+                for record in suite_records:
+                    case = ET.SubElement(suite, 'testcase', {
+                        'classname': check,
+                        'name': record.name,
+                        'time': f"{record.duration:.6f}",
+                    })
+                    if record.file:
+                        case.set('file', record.file)
+                    if not record.passed:
+                        failure = ET.SubElement(case, 'failure', {
+                            'type': record.severity,
+                            'message': record.message,
+                        })
+                        failure.text = record.message
+        summary = summarize(all_records)
+        root.set('tests', str(summary['total_tests']))
+        root.set('failures', str(summary['failed']))
+        root.set('time', f"{sum(r.duration for r in all_records):.6f}")
+        self.out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.out.write(ET.tostring(root, encoding='unicode'))
+        self.out.write("\n")
+
+
+class QuietReporter(Reporter):
+    """No output at all; only the exit code reports the outcome"""
+
+
+REPORTERS = {
+    'human': HumanReporter,
+    'json': JsonReporter,
+    'junit': JUnitReporter,
+    'quiet': QuietReporter,
+}
+
+
+class CheckBuffer:
+    """Output and results recorded by one check, replayed in check order"""
+
+    __slots__ = ('name', 'events', 'inputs', 'listings', 'mark_ns', 'duration_ns', 'cached')
+
+    def __init__(self, name: str):
+        self.name = name
+        # ('section', text) and ('result', CheckResult) events
+        self.events: List[Tuple] = []
+        # Every file the check looked at, with None for files that were missing
+        self.inputs: Dict[str, Optional[FileSnapshot]] = {}
+        # Directory listings the check relied on, keyed by the comma-joined suffixes
+        self.listings: Dict[str, List[str]] = {}
+        # When the previous result was logged, to time each result
+        self.mark_ns = time.perf_counter_ns()
+        # Wall time of the whole check, and whether it was replayed from a cache
+        self.duration_ns = 0
+        self.cached = False
+
+
+def validator_fingerprint() -> str:
+    """Hash of this script, so cached results are dropped when the checks change"""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+class ResultsCache:
+    """On-disk cache of check results keyed by the content hashes of their inputs"""
+
+    def __init__(self, path: Path, extension_path: Path, settings: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.extension_path = Path(extension_path)
+        # Settings that change check outcomes, such as budgets, are part of the fingerprint
+        self.fingerprint = validator_fingerprint() + json.dumps(settings or {}, sort_keys=True)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.reused = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.fingerprint:
+                self.entries = data.get('checks', {})
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, name: str, snapshots: 'SnapshotCache') -> Optional[CheckBuffer]:
+        """Return the cached buffer for a check if none of its inputs changed"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+
+        for input_name, recorded in entry['inputs'].items():
+            snapshot = snapshots.get(self.extension_path / input_name)
+            if recorded is None or snapshot is None:
+                if recorded is not snapshot:
+                    return None
+                continue
+            # Unchanged mtime and size skip hashing, as git does for its index
+            if snapshot.mtime_ns == recorded['mtime_ns'] and snapshot.size == recorded['size']:
+                continue
+            if snapshot.digest != recorded['sha256']:
+                return None
+
+        # A file added or removed changes what a tree-wide check looks at
+        for suffixes, listing in entry.get('listings', {}).items():
+            if list_packaged_files(self.extension_path, tuple(suffixes.split(','))) != listing:
+                return None
+
+        buffer = CheckBuffer(name)
+        buffer.events = [
+            ('result', CheckResult.from_dict(value)) if kind == 'result' else (kind, value)
+            for kind, value in entry['events']
+        ]
+        buffer.duration_ns = entry.get('duration_ns', 0)
+        buffer.cached = True
+        self.reused += 1
+        return buffer
+
+    def store(self, buffer: CheckBuffer):
+        """Record a freshly run check and the state of its inputs"""
+        self.entries[buffer.name] = {
+            'inputs': {
+                input_name: None if snapshot is None else {
+                    'sha256': snapshot.digest,
+                    'mtime_ns': snapshot.mtime_ns,
+                    'size': snapshot.size,
+                }
+                for input_name, snapshot in buffer.inputs.items()
+            },
+            'listings': buffer.listings,
+            'events': [
+                (kind, value.to_dict() if kind == 'result' else value)
+                for kind, value in buffer.events
+            ],
+            'duration_ns': buffer.duration_ns,
+        }
+
+    def save(self):
+        """Write the cache atomically next to its final location"""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.fingerprint, 'checks': self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not write results cache {self.path}: {e}", file=sys.stderr)
+
 
 class PocketMentorExtensionTester:
-    def __init__(self, extension_path: str = "/app"):
+    def __init__(self, extension_path: str = "/app", snapshots: Optional[SnapshotCache] = None,
+                 reporter: Optional[Reporter] = None, budgets: Optional[Dict[str, int]] = None):
         self.extension_path = Path(extension_path)
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.errors = []
-        self.warnings = []
+        self.budgets = {**PAYLOAD_BUDGETS, **ASSET_BUDGETS, **CSS_BUDGETS, **(budgets or {})}
+        self.snapshots = snapshots if snapshots is not None else SNAPSHOT_CACHE
+        self.reporter = reporter if reporter is not None else HumanReporter()
+        self._run_snapshots: Dict[str, Optional[FileSnapshot]] = {}
+        # The buffer of the check that is running, if any
+        self._buffer: Optional[CheckBuffer] = None
+        self.records = RunResults()
+        self._run_started_ns = 0
         
-    def log_test(self, test_name: str, passed: bool, message: str, is_warning: bool = False):
+    def snapshot(self, name: str) -> Optional[FileSnapshot]:
+        """Return the snapshot of an extension file, loading it at most once per run"""
+        if name not in self._run_snapshots:
+            self._run_snapshots[name] = self.snapshots.get(self.extension_path / name)
+        snapshot = self._run_snapshots[name]
+        if self._buffer is not None:
+            self._buffer.inputs[name] = snapshot
+        return snapshot
+
+    def packaged_files(self, suffixes: Tuple[str, ...]) -> List[str]:
+        """Packaged files with the given suffixes, remembered as an input of the running check"""
+        files = list_packaged_files(self.extension_path, suffixes)
+        if self._buffer is not None:
+            self._buffer.listings[','.join(suffixes)] = files
+        return files
+
+    def exists(self, name: str) -> bool:
+        """Check whether an extension file exists in this run's snapshot"""
+        return self.snapshot(name) is not None
+
+    def emit(self, text: str):
+        """Report a section heading, or record it when running inside a check buffer"""
+        if self._buffer is not None:
+            self._buffer.events.append(('section', text))
+        else:
+            self.reporter.section(text)
+
+    def log_test(self, test_name: str, passed: bool, message: str, is_warning: bool = False,
+                 file: Optional[str] = None):
         """Log test results"""
-        self.tests_run += 1
         if passed:
-            self.tests_passed += 1
-            print(f"✅ {test_name}: {message}")
+            status, severity = 'passed', 'info'
         else:
-            if is_warning:
-                self.warnings.append(f"{test_name}: {message}")
-                print(f"⚠️ {test_name}: {message}")
-            else:
-                self.errors.append(f"{test_name}: {message}")
-                print(f"❌ {test_name}: {message}")
+            status, severity = 'failed', 'warning' if is_warning else 'error'
+
+        buffer = self._buffer
+        if buffer is None:
+            self._record_result(CheckResult(test_name, status, severity, message, file))
+            return
+
+        now = time.perf_counter_ns()
+        record = CheckResult(test_name, status, severity, message, file,
+                             (now - buffer.mark_ns) / 1e9, buffer.name)
+        buffer.mark_ns = now
+        buffer.events.append(('result', record))
+
+    def _record_result(self, record: CheckResult):
+        """Keep a result and hand it to the reporter"""
+        self.records.append(record)
+        self.reporter.result(record)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate counts for the results recorded so far"""
+        return summarize(self.records)
     
     def test_manifest_json(self) -> bool:
         """Test manifest.json validity and structure"""
-        print("\n🔍 Testing manifest.json...")
+        self.emit("\n🔍 Testing manifest.json...")
         
-        manifest_path = self.extension_path / "manifest.json"
-        if not manifest_path.exists():
-            self.log_test("Manifest Existence", False, "manifest.json not found")
+        manifest_file = self.snapshot("manifest.json")
+        if manifest_file is None:
+            self.log_test("Manifest Existence", False, "manifest.json not found", file="manifest.json")
             return False
         
         try:
-            with open(manifest_path, 'r', encoding='utf-8') as f:
-                manifest = json.load(f)
+            manifest = json.loads(manifest_file.text)
         except json.JSONDecodeError as e:
-            self.log_test("Manifest JSON", False, f"Invalid JSON: {e}")
+            self.log_test("Manifest JSON", False, f"Invalid JSON: {e}", file="manifest.json")
             return False
         
         # Check required fields
@@ -59,52 +1478,52 @@ class PocketMentorExtensionTester:
         
         for field, expected in required_fields.items():
             if field not in manifest:
-                self.log_test(f"Manifest Field: {field}", False, f"Missing required field")
+                self.log_test(f"Manifest Field: {field}", False, f"Missing required field", file="manifest.json")
                 continue
             
             if field == 'manifest_version' and manifest[field] != expected:
-                self.log_test(f"Manifest Field: {field}", False, f"Expected {expected}, got {manifest[field]}")
+                self.log_test(f"Manifest Field: {field}", False, f"Expected {expected}, got {manifest[field]}", file="manifest.json")
                 continue
             elif expected == 'string' and not isinstance(manifest[field], str):
-                self.log_test(f"Manifest Field: {field}", False, f"Expected string, got {type(manifest[field])}")
+                self.log_test(f"Manifest Field: {field}", False, f"Expected string, got {type(manifest[field])}", file="manifest.json")
                 continue
             
-            self.log_test(f"Manifest Field: {field}", True, f"Valid {expected}")
+            self.log_test(f"Manifest Field: {field}", True, f"Valid {expected}", file="manifest.json")
         
         # Check permissions
         required_permissions = ['contextMenus', 'activeTab', 'scripting', 'storage', 'notifications']
         if 'permissions' in manifest:
             missing_perms = [p for p in required_permissions if p not in manifest['permissions']]
             if missing_perms:
-                self.log_test("Manifest Permissions", False, f"Missing permissions: {missing_perms}")
+                self.log_test("Manifest Permissions", False, f"Missing permissions: {missing_perms}", file="manifest.json")
             else:
-                self.log_test("Manifest Permissions", True, "All required permissions present")
+                self.log_test("Manifest Permissions", True, "All required permissions present", file="manifest.json")
         else:
-            self.log_test("Manifest Permissions", False, "No permissions field found")
+            self.log_test("Manifest Permissions", False, "No permissions field found", file="manifest.json")
         
         # Check service worker
         if 'background' in manifest and 'service_worker' in manifest['background']:
             sw_file = manifest['background']['service_worker']
-            if (self.extension_path / sw_file).exists():
-                self.log_test("Service Worker", True, f"Service worker file exists: {sw_file}")
+            if self.exists(sw_file):
+                self.log_test("Service Worker", True, f"Service worker file exists: {sw_file}", file=sw_file)
             else:
-                self.log_test("Service Worker", False, f"Service worker file not found: {sw_file}")
+                self.log_test("Service Worker", False, f"Service worker file not found: {sw_file}", file=sw_file)
         else:
-            self.log_test("Service Worker", False, "Service worker not configured")
+            self.log_test("Service Worker", False, "Service worker not configured", file="manifest.json")
         
         # Check icons
         if 'icons' in manifest:
             for size, icon_path in manifest['icons'].items():
-                if (self.extension_path / icon_path).exists():
-                    self.log_test(f"Icon {size}", True, f"Icon file exists: {icon_path}")
+                if self.exists(icon_path):
+                    self.log_test(f"Icon {size}", True, f"Icon file exists: {icon_path}", file=icon_path)
                 else:
-                    self.log_test(f"Icon {size}", False, f"Icon file not found: {icon_path}")
+                    self.log_test(f"Icon {size}", False, f"Icon file not found: {icon_path}", file=icon_path)
         
         return True
     
     def test_file_structure(self) -> bool:
         """Test required files exist"""
-        print("\n🔍 Testing file structure...")
+        self.emit("\n🔍 Testing file structure...")
         
         required_files = [
             "manifest.json",
@@ -119,365 +1538,1000 @@ class PocketMentorExtensionTester:
         ]
         
         for file in required_files:
-            file_path = self.extension_path / file
-            if file_path.exists():
-                self.log_test(f"File: {file}", True, "File exists")
+            if self.exists(file):
+                self.log_test(f"File: {file}", True, "File exists", file=file)
             else:
-                self.log_test(f"File: {file}", False, "File not found")
+                self.log_test(f"File: {file}", False, "File not found", file=file)
         
         # Check icon files
         icon_files = ["icon16.png", "icon48.png", "icon128.png"]
         for icon in icon_files:
-            icon_path = self.extension_path / icon
-            if icon_path.exists():
-                self.log_test(f"Icon: {icon}", True, "Icon file exists")
+            if self.exists(icon):
+                self.log_test(f"Icon: {icon}", True, "Icon file exists", file=icon)
             else:
-                self.log_test(f"Icon: {icon}", False, "Icon file not found")
+                self.log_test(f"Icon: {icon}", False, "Icon file not found", file=icon)
         
         return True
     
     def test_html_files(self) -> bool:
         """Test HTML files for basic structure"""
-        print("\n🔍 Testing HTML files...")
+        self.emit("\n🔍 Testing HTML files...")
         
         html_files = ["popup.html", "notebook.html"]
         
         for html_file in html_files:
-            file_path = self.extension_path / html_file
-            if not file_path.exists():
-                self.log_test(f"HTML: {html_file}", False, "File not found")
+            snapshot = self.snapshot(html_file)
+            if snapshot is None:
+                self.log_test(f"HTML: {html_file}", False, "File not found", file=html_file)
                 continue
             
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = snapshot.text
+                js_file = html_file.replace('.html', '.js')
+                index = snapshot.index(frozenset(HTML_TAGS + ('styles.css', js_file)))
                 
                 # Check basic HTML structure
                 if not content.strip().startswith('<!DOCTYPE html>'):
-                    self.log_test(f"HTML: {html_file} DOCTYPE", False, "Missing DOCTYPE declaration")
+                    self.log_test(f"HTML: {html_file} DOCTYPE", False, "Missing DOCTYPE declaration", file=html_file)
                 else:
-                    self.log_test(f"HTML: {html_file} DOCTYPE", True, "Valid DOCTYPE")
+                    self.log_test(f"HTML: {html_file} DOCTYPE", True, "Valid DOCTYPE", file=html_file)
                 
-                required_tags = ['<html', '<head>', '<body', '</html>']
-                for tag in required_tags:
-                    if tag not in content:
-                        self.log_test(f"HTML: {html_file} {tag}", False, f"Missing {tag} tag")
+                for tag in HTML_TAGS:
+                    if tag not in index:
+                        self.log_test(f"HTML: {html_file} {tag}", False, f"Missing {tag} tag", file=html_file)
                     else:
-                        self.log_test(f"HTML: {html_file} {tag}", True, f"Has {tag} tag")
+                        self.log_test(f"HTML: {html_file} {tag}", True, f"Has {tag} tag", file=html_file)
                 
                 # Check for CSS inclusion
-                if 'styles.css' in content:
-                    self.log_test(f"HTML: {html_file} CSS", True, "Includes styles.css")
+                if 'styles.css' in index:
+                    self.log_test(f"HTML: {html_file} CSS", True, "Includes styles.css", file=html_file)
                 else:
-                    self.log_test(f"HTML: {html_file} CSS", False, "Missing styles.css inclusion")
+                    self.log_test(f"HTML: {html_file} CSS", False, "Missing styles.css inclusion", file=html_file)
                 
                 # Check for corresponding JS file
-                js_file = html_file.replace('.html', '.js')
-                if js_file in content:
-                    self.log_test(f"HTML: {html_file} JS", True, f"Includes {js_file}")
+                if js_file in index:
+                    self.log_test(f"HTML: {html_file} JS", True, f"Includes {js_file}", file=html_file)
                 else:
-                    self.log_test(f"HTML: {html_file} JS", False, f"Missing {js_file} inclusion")
+                    self.log_test(f"HTML: {html_file} JS", False, f"Missing {js_file} inclusion", file=html_file)
                 
             except Exception as e:
-                self.log_test(f"HTML: {html_file}", False, f"Error reading file: {e}")
+                self.log_test(f"HTML: {html_file}", False, f"Error reading file: {e}", file=html_file)
         
         return True
     
     def test_javascript_files(self) -> bool:
         """Test JavaScript files for basic syntax and structure"""
-        print("\n🔍 Testing JavaScript files...")
+        self.emit("\n🔍 Testing JavaScript files...")
         
         js_files = ["api.js", "background.js", "popup.js", "notebook.js", "content.js"]
         
         for js_file in js_files:
-            file_path = self.extension_path / js_file
-            if not file_path.exists():
-                self.log_test(f"JS: {js_file}", False, "File not found")
+            snapshot = self.snapshot(js_file)
+            if snapshot is None:
+                self.log_test(f"JS: {js_file}", False, "File not found", file=js_file)
                 continue
             
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = snapshot.text
+                js = snapshot.js_index()
                 
                 # Check for basic syntax issues
                 if content.strip():
-                    self.log_test(f"JS: {js_file} Content", True, "File has content")
+                    self.log_test(f"JS: {js_file} Content", True, "File has content", file=js_file)
                 else:
-                    self.log_test(f"JS: {js_file} Content", False, "File is empty")
+                    self.log_test(f"JS: {js_file} Content", False, "File is empty", file=js_file)
                     continue
                 
                 # Check for Chrome API usage (where expected)
                 if js_file in ["background.js", "popup.js", "content.js"]:
-                    if "chrome." in content:
-                        self.log_test(f"JS: {js_file} Chrome API", True, "Uses Chrome APIs")
+                    if js.uses_namespace("chrome"):
+                        self.log_test(f"JS: {js_file} Chrome API", True, "Uses Chrome APIs", file=js_file)
                     else:
-                        self.log_test(f"JS: {js_file} Chrome API", False, "No Chrome API usage detected", True)
+                        self.log_test(f"JS: {js_file} Chrome API", False, "No Chrome API usage detected", True, file=js_file)
                 
                 # Check for ES6 modules (where expected)
                 if js_file in ["api.js", "background.js"]:
-                    if "export" in content or "module.exports" in content:
-                        self.log_test(f"JS: {js_file} Exports", True, "Has exports")
+                    if js.has_identifier("export") or js.has_path("module.exports"):
+                        self.log_test(f"JS: {js_file} Exports", True, "Has exports", file=js_file)
+                    elif js.has_identifier("import"):
+                        self.log_test(f"JS: {js_file} Exports", True, "Uses ES module imports", file=js_file)
                     else:
-                        self.log_test(f"JS: {js_file} Exports", False, "No exports found", True)
+                        self.log_test(f"JS: {js_file} Exports", False, "No exports found", True, file=js_file)
                 
                 # Check for error handling
-                if "try" in content and "catch" in content:
-                    self.log_test(f"JS: {js_file} Error Handling", True, "Has error handling")
+                if js.has_identifier("try") and js.has_identifier("catch"):
+                    self.log_test(f"JS: {js_file} Error Handling", True, "Has error handling", file=js_file)
                 else:
-                    self.log_test(f"JS: {js_file} Error Handling", False, "No error handling detected", True)
+                    self.log_test(f"JS: {js_file} Error Handling", False, "No error handling detected", True, file=js_file)
                 
                 # Check for console logging
-                if "console.log" in content or "console.error" in content:
-                    self.log_test(f"JS: {js_file} Logging", True, "Has logging")
+                if js.has_path("console.log") or js.has_path("console.error"):
+                    self.log_test(f"JS: {js_file} Logging", True, "Has logging", file=js_file)
                 else:
-                    self.log_test(f"JS: {js_file} Logging", False, "No logging detected", True)
+                    self.log_test(f"JS: {js_file} Logging", False, "No logging detected", True, file=js_file)
                 
             except Exception as e:
-                self.log_test(f"JS: {js_file}", False, f"Error reading file: {e}")
+                self.log_test(f"JS: {js_file}", False, f"Error reading file: {e}", file=js_file)
         
         return True
     
     def test_css_file(self) -> bool:
         """Test CSS file structure"""
-        print("\n🔍 Testing CSS file...")
+        self.emit("\n🔍 Testing CSS file...")
         
-        css_path = self.extension_path / "styles.css"
-        if not css_path.exists():
-            self.log_test("CSS File", False, "styles.css not found")
+        snapshot = self.snapshot("styles.css")
+        if snapshot is None:
+            self.log_test("CSS File", False, "styles.css not found", file="styles.css")
             return False
         
         try:
-            with open(css_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = snapshot.text
+            index = snapshot.index(CSS_PATTERNS)
             
             if content.strip():
-                self.log_test("CSS Content", True, "CSS file has content")
+                self.log_test("CSS Content", True, "CSS file has content", file="styles.css")
             else:
-                self.log_test("CSS Content", False, "CSS file is empty")
+                self.log_test("CSS Content", False, "CSS file is empty", file="styles.css")
                 return False
             
             # Check for CSS variables
-            if ":root" in content:
-                self.log_test("CSS Variables", True, "Uses CSS variables")
+            if ":root" in index:
+                self.log_test("CSS Variables", True, "Uses CSS variables", file="styles.css")
             else:
-                self.log_test("CSS Variables", False, "No CSS variables found", True)
+                self.log_test("CSS Variables", False, "No CSS variables found", True, file="styles.css")
             
             # Check for theme support
-            if "light-theme" in content and "dark-theme" in content:
-                self.log_test("CSS Themes", True, "Has theme support")
+            if "light-theme" in index and "dark-theme" in index:
+                self.log_test("CSS Themes", True, "Has theme support", file="styles.css")
             else:
-                self.log_test("CSS Themes", False, "No theme support detected")
+                self.log_test("CSS Themes", False, "No theme support detected", file="styles.css")
             
             # Check for responsive design
-            if "@media" in content:
-                self.log_test("CSS Responsive", True, "Has responsive design")
+            if "@media" in index:
+                self.log_test("CSS Responsive", True, "Has responsive design", file="styles.css")
             else:
-                self.log_test("CSS Responsive", False, "No responsive design detected", True)
+                self.log_test("CSS Responsive", False, "No responsive design detected", True, file="styles.css")
             
         except Exception as e:
-            self.log_test("CSS File", False, f"Error reading CSS file: {e}")
+            self.log_test("CSS File", False, f"Error reading CSS file: {e}", file="styles.css")
         
         return True
     
     def test_api_structure(self) -> bool:
         """Test API wrapper structure"""
-        print("\n🔍 Testing API structure...")
+        self.emit("\n🔍 Testing API structure...")
         
-        api_path = self.extension_path / "api.js"
-        if not api_path.exists():
-            self.log_test("API File", False, "api.js not found")
+        snapshot = self.snapshot("api.js")
+        if snapshot is None:
+            self.log_test("API File", False, "api.js not found", file="api.js")
             return False
         
         try:
-            with open(api_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            js = snapshot.js_index()
             
             # Check for main API class
-            if "class PocketMentorAPI" in content:
-                self.log_test("API Class", True, "PocketMentorAPI class found")
+            if "PocketMentorAPI" in js.declarations:
+                self.log_test("API Class", True, "PocketMentorAPI class found", file="api.js")
             else:
-                self.log_test("API Class", False, "PocketMentorAPI class not found")
+                self.log_test("API Class", False, "PocketMentorAPI class not found", file="api.js")
             
             # Check for AI API methods
-            expected_methods = [
-                "summarizeText",
-                "translateText", 
-                "proofreadText",
-                "rewriteText",
-                "explainText",
-                "generateQuiz",
-                "generateStudyNotes"
-            ]
-            
-            for method in expected_methods:
-                if method in content:
-                    self.log_test(f"API Method: {method}", True, "Method found")
+            for method in API_METHODS:
+                if js.has_identifier(method):
+                    self.log_test(f"API Method: {method}", True, "Method found", file="api.js")
                 else:
-                    self.log_test(f"API Method: {method}", False, "Method not found")
+                    self.log_test(f"API Method: {method}", False, "Method not found", file="api.js")
             
             # Check for Chrome AI API usage
-            if "window.ai" in content or "chrome.aiOriginTrial" in content:
-                self.log_test("API Chrome AI", True, "Uses Chrome AI APIs")
+            if js.has_path("window.ai") or js.has_path("chrome.aiOriginTrial"):
+                self.log_test("API Chrome AI", True, "Uses Chrome AI APIs", file="api.js")
             else:
-                self.log_test("API Chrome AI", False, "No Chrome AI API usage")
+                self.log_test("API Chrome AI", False, "No Chrome AI API usage", file="api.js")
             
         except Exception as e:
-            self.log_test("API Structure", False, f"Error reading API file: {e}")
+            self.log_test("API Structure", False, f"Error reading API file: {e}", file="api.js")
         
         return True
     
     def test_background_script(self) -> bool:
         """Test background script structure"""
-        print("\n🔍 Testing background script...")
+        self.emit("\n🔍 Testing background script...")
         
-        bg_path = self.extension_path / "background.js"
-        if not bg_path.exists():
-            self.log_test("Background Script", False, "background.js not found")
+        snapshot = self.snapshot("background.js")
+        if snapshot is None:
+            self.log_test("Background Script", False, "background.js not found", file="background.js")
             return False
         
         try:
-            with open(bg_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            js = snapshot.js_index()
             
             # Check for event listeners
-            expected_listeners = [
-                "chrome.runtime.onInstalled",
-                "chrome.contextMenus.onClicked", 
-                "chrome.runtime.onMessage"
-            ]
-            
-            for listener in expected_listeners:
-                if listener in content:
-                    self.log_test(f"Background: {listener}", True, "Event listener found")
+            for listener in BACKGROUND_LISTENERS:
+                if js.has_path(listener):
+                    self.log_test(f"Background: {listener}", True, "Event listener found", file="background.js")
                 else:
-                    self.log_test(f"Background: {listener}", False, "Event listener not found")
+                    self.log_test(f"Background: {listener}", False, "Event listener not found", file="background.js")
             
             # Check for context menu creation
-            if "createContextMenus" in content or "chrome.contextMenus.create" in content:
-                self.log_test("Background: Context Menus", True, "Context menu creation found")
+            if js.has_identifier("createContextMenus") or js.has_path("chrome.contextMenus.create"):
+                self.log_test("Background: Context Menus", True, "Context menu creation found", file="background.js")
             else:
-                self.log_test("Background: Context Menus", False, "No context menu creation")
+                self.log_test("Background: Context Menus", False, "No context menu creation", file="background.js")
             
             # Check for storage usage
-            if "chrome.storage" in content:
-                self.log_test("Background: Storage", True, "Uses Chrome storage")
+            if js.has_path("chrome.storage"):
+                self.log_test("Background: Storage", True, "Uses Chrome storage", file="background.js")
             else:
-                self.log_test("Background: Storage", False, "No storage usage")
+                self.log_test("Background: Storage", False, "No storage usage", file="background.js")
             
         except Exception as e:
-            self.log_test("Background Script", False, f"Error reading background script: {e}")
+            self.log_test("Background Script", False, f"Error reading background script: {e}", file="background.js")
         
         return True
     
     def test_content_script(self) -> bool:
         """Test content script structure"""
-        print("\n🔍 Testing content script...")
+        self.emit("\n🔍 Testing content script...")
         
-        content_path = self.extension_path / "content.js"
-        if not content_path.exists():
-            self.log_test("Content Script", False, "content.js not found")
+        snapshot = self.snapshot("content.js")
+        if snapshot is None:
+            self.log_test("Content Script", False, "content.js not found", file="content.js")
             return False
         
         try:
-            with open(content_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            js = snapshot.js_index()
             
             # Check for message listeners
-            if "chrome.runtime.onMessage" in content:
-                self.log_test("Content: Message Listener", True, "Has message listener")
+            if js.has_path("chrome.runtime.onMessage"):
+                self.log_test("Content: Message Listener", True, "Has message listener", file="content.js")
             else:
-                self.log_test("Content: Message Listener", False, "No message listener")
+                self.log_test("Content: Message Listener", False, "No message listener", file="content.js")
             
             # Check for selection handling
-            if "getSelection" in content or "window.getSelection" in content:
-                self.log_test("Content: Selection", True, "Handles text selection")
+            if js.has_identifier("getSelection"):
+                self.log_test("Content: Selection", True, "Handles text selection", file="content.js")
             else:
-                self.log_test("Content: Selection", False, "No selection handling")
+                self.log_test("Content: Selection", False, "No selection handling", file="content.js")
             
             # Check for keyboard shortcuts
-            if "addEventListener('keydown'" in content:
-                self.log_test("Content: Keyboard", True, "Has keyboard event handling")
+            if js.has_call("addEventListener", "keydown"):
+                self.log_test("Content: Keyboard", True, "Has keyboard event handling", file="content.js")
             else:
-                self.log_test("Content: Keyboard", False, "No keyboard handling")
+                self.log_test("Content: Keyboard", False, "No keyboard handling", file="content.js")
             
             # Check for tooltip/UI injection
-            if "createElement" in content:
-                self.log_test("Content: UI Injection", True, "Can inject UI elements")
+            if js.has_call("createElement"):
+                self.log_test("Content: UI Injection", True, "Can inject UI elements", file="content.js")
             else:
-                self.log_test("Content: UI Injection", False, "No UI injection")
+                self.log_test("Content: UI Injection", False, "No UI injection", file="content.js")
             
         except Exception as e:
-            self.log_test("Content Script", False, f"Error reading content script: {e}")
+            self.log_test("Content Script", False, f"Error reading content script: {e}", file="content.js")
         
         return True
     
-    def run_all_tests(self) -> Dict[str, Any]:
-        """Run all tests and return results"""
-        print("🚀 Starting Pocket Mentor+ Extension Tests...\n")
-        
-        # Run all test methods
-        self.test_manifest_json()
-        self.test_file_structure()
-        self.test_html_files()
-        self.test_javascript_files()
-        self.test_css_file()
-        self.test_api_structure()
-        self.test_background_script()
-        self.test_content_script()
-        
-        # Print summary
-        self.print_summary()
+    def resolve(self, referrer: str, specifier: str) -> Optional[str]:
+        """Resolve a reference from one extension file to another, or None for external URLs"""
+        specifier = specifier.split('#')[0].split('?')[0]
+        if not specifier or URL_SCHEME.match(specifier) or specifier.startswith('//'):
+            return None
+        if specifier.startswith('/'):
+            return posixpath.normpath(specifier.lstrip('/'))
+        return posixpath.normpath(posixpath.join(posixpath.dirname(referrer), specifier))
+
+    def references(self, name: str, snapshot: FileSnapshot) -> List[str]:
+        """Files that loading name pulls in: scripts, stylesheets and imported modules"""
+        suffix = posixpath.splitext(name)[1].lower()
+        if suffix in ('.html', '.htm'):
+            html = HTML_COMMENT.sub('', snapshot.text)
+            specifiers = HTML_SCRIPT_SRC.findall(html)
+            for tag in HTML_LINK_TAG.findall(html):
+                attributes = {key.lower(): value for key, value in HTML_ATTRIBUTE.findall(tag)}
+                if attributes.get('rel', '').lower() == 'stylesheet' and 'href' in attributes:
+                    specifiers.append(attributes['href'])
+        elif suffix in ('.js', '.mjs'):
+            specifiers = [spec for spec, _ in snapshot.js_index().imports]
+        elif suffix == '.css':
+            specifiers = CSS_IMPORT.findall(snapshot.text)
+        else:
+            specifiers = []
+        resolved = (self.resolve(name, spec) for spec in specifiers)
+        return [ref for ref in resolved if ref is not None]
+
+    def load_graph(self, roots: List[str]) -> Tuple[List[str], List[str]]:
+        """Every file an entry point loads, each once, and the references that are missing"""
+        loaded: List[str] = []
+        missing: List[str] = []
+        seen = set()
+        pending = [(root, None) for root in reversed(roots)]
+        while pending:
+            name, referrer = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            snapshot = self.snapshot(name)
+            if snapshot is None:
+                missing.append(name if referrer is None else f"{name} (from {referrer})")
+                continue
+            loaded.append(name)
+            for ref in reversed(self.references(name, snapshot)):
+                pending.append((ref, name))
+        return loaded, missing
+
+    def entry_points(self, manifest: Dict[str, Any]) -> List[Tuple[str, str, List[str]]]:
+        """(kind, label, files) for the service worker, each content script block and each page"""
+        entries = []
+        worker = manifest.get('background', {}).get('service_worker')
+        if worker:
+            entries.append(('service_worker', f"service worker {worker}", [worker]))
+        for i, block in enumerate(manifest.get('content_scripts', [])):
+            files = list(block.get('js', [])) + list(block.get('css', []))
+            if files:
+                entries.append(('content_script', f"content script {', '.join(files)}", files))
+        for keys in MANIFEST_PAGES:
+            value = manifest
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            if isinstance(value, str) and value:
+                entries.append(('page', f"page {value}", [value]))
+        return entries
+
+    def loaded_entry_points(self, manifest: Dict[str, Any]):
+        """Yield (kind, label, roots, loaded, missing) per entry point, including pages opened via getURL"""
+        entries = self.entry_points(manifest)
+        pages = {files[0] for kind, _, files in entries if kind == 'page'}
+        i = 0
+        while i < len(entries):
+            kind, label, roots = entries[i]
+            i += 1
+            loaded, missing = self.load_graph(roots)
+            yield kind, label, roots, loaded, missing
+            
+            # Pages opened with chrome.runtime.getURL('x.html') are entry points too
+            for name in loaded:
+                if name.endswith('.js'):
+                    for page in self.snapshot(name).js_index().call_args('getURL'):
+                        page = page and self.resolve('', page)
+                        if page and page.endswith('.html') and page not in pages:
+                            pages.add(page)
+                            entries.append(('page', f"page {page}", [page]))
+    
+    def test_payload_budget(self) -> bool:
+        """Test how many bytes each entry point loads against the payload budgets"""
+        self.emit("\n🔍 Testing entry point payloads...")
         
-        return {
-            'total_tests': self.tests_run,
-            'passed': self.tests_passed,
-            'failed': self.tests_run - self.tests_passed,
-            'success_rate': (self.tests_passed / self.tests_run * 100) if self.tests_run > 0 else 0,
-            'errors': self.errors,
-            'warnings': self.warnings
-        }
+        manifest_file = self.snapshot("manifest.json")
+        if manifest_file is None:
+            self.log_test("Payload", False, "manifest.json not found", file="manifest.json")
+            return False
+        
+        try:
+            manifest = json.loads(manifest_file.text)
+            for kind, label, roots, loaded, missing in self.loaded_entry_points(manifest):
+                total = sum(self.snapshot(name).size for name in loaded)
+                budget = self.budgets[kind]
+                summary = f"{format_bytes(total)} in {len(loaded)} files"
+                if total <= budget:
+                    self.log_test(f"Payload: {label}", True, f"{summary} (budget {format_bytes(budget)})", file=roots[0])
+                else:
+                    self.log_test(f"Payload: {label}", False, f"{summary} exceeds budget of {format_bytes(budget)}", file=roots[0])
+                
+                if missing:
+                    self.log_test(f"Payload: {label} References", False, f"Missing files: {', '.join(missing)}", file=roots[0])
+                
+                # Byte-identical files loaded under different names are parsed twice
+                by_digest: Dict[str, List[str]] = {}
+                for name in loaded:
+                    by_digest.setdefault(self.snapshot(name).digest, []).append(name)
+                duplicates = [names for names in by_digest.values() if len(names) > 1]
+                if duplicates:
+                    wasted = sum(self.snapshot(names[0]).size * (len(names) - 1) for names in duplicates)
+                    groups = '; '.join(' = '.join(names) for names in duplicates)
+                    self.log_test(f"Payload: {label} Duplicates", False,
+                                  f"Identical files loaded: {groups} ({format_bytes(wasted)} wasted)", True, file=roots[0])
+                else:
+                    self.log_test(f"Payload: {label} Duplicates", True, "No duplicated modules", file=roots[0])
+                
+                # Content scripts are classic scripts, so their static imports never load
+                if kind == 'content_script':
+                    importers = [name for name in roots if name.endswith('.js') and self.snapshot(name) is not None
+                                 and any(not dynamic for _, dynamic in self.snapshot(name).js_index().imports)]
+                    if importers:
+                        self.log_test(f"Payload: {label} Modules", False,
+                                      f"Static import in {', '.join(importers)}; content scripts are not ES modules", True, file=roots[0])
+            
+        except Exception as e:
+            self.log_test("Payload", False, f"Error analyzing entry points: {e}", file="manifest.json")
+        
+        return True
     
-    def print_summary(self):
-        """Print test summary"""
-        print(f"\n📊 Test Summary:")
-        print(f"Total Tests: {self.tests_run}")
-        print(f"✅ Passed: {self.tests_passed}")
-        print(f"❌ Failed: {self.tests_run - self.tests_passed}")
-        print(f"⚠️ Warnings: {len(self.warnings)}")
-        print(f"Success Rate: {(self.tests_passed / self.tests_run * 100):.1f}%")
-        
-        if self.errors:
-            print(f"\n❌ Critical Issues ({len(self.errors)}):")
-            for error in self.errors:
-                print(f"  • {error}")
-        
-        if self.warnings:
-            print(f"\n⚠️ Warnings ({len(self.warnings)}):")
-            for warning in self.warnings:
-                print(f"  • {warning}")
-        
-        print(f"\n🎯 Next Steps:")
-        if not self.errors:
-            print("✅ Extension structure is valid!")
-            print("📝 Load the extension in Chrome for functional testing:")
-            print("   1. Go to chrome://extensions/")
-            print("   2. Enable Developer mode")
-            print("   3. Click 'Load unpacked' and select /app folder")
-            print("   4. Enable Chrome AI flags:")
-            print("      - chrome://flags/#optimization-guide-on-device-model")
-            print("      - chrome://flags/#prompt-api-for-gemini-nano")
-            print("   5. Restart Chrome and test functionality")
+    def test_image_assets(self) -> bool:
+        """Test image dimensions and weight from their headers.
+        
+        Every packaged image is budgeted, since web_accessible_resources and the icon
+        files ship with the extension whether or not the manifest names them. Icons are
+        compared with the size the manifest declares, or the size in their file name.
+        """
+        self.emit("\n🔍 Testing image assets...")
+        
+        max_bytes = self.budgets['image_bytes']
+        max_bpp = self.budgets['image_bytes_per_pixel']
+        max_side = self.budgets['image_max_side']
+        dimensions: Dict[str, Tuple[str, Optional[int], Optional[int]]] = {}
+        
+        for name in self.packaged_files(IMAGE_SUFFIXES):
+            snapshot = self.snapshot(name)
+            if snapshot is None:
+                continue
+            try:
+                header = snapshot.head(24 if name.lower().endswith('.png') else SVG_HEADER_BYTES)
+                kind, width, height = image_dimensions(name, header)
+            except (OSError, ValueError) as e:
+                self.log_test(f"Asset: {name}", False, f"Unreadable image: {e}", file=name)
+                continue
+            dimensions[name] = (kind, width, height)
+            
+            size = format_bytes(snapshot.size)
+            if kind == 'PNG':
+                bpp = snapshot.size / (width * height) if width and height else float('inf')
+                summary = f"{width}x{height} PNG, {size} ({bpp:.2f} B/px)"
+                if snapshot.size > max_bytes:
+                    self.log_test(f"Asset: {name}", False, f"{summary} exceeds {format_bytes(max_bytes)}", True, file=name)
+                elif bpp > max_bpp:
+                    self.log_test(f"Asset: {name}", False, f"{summary} exceeds {max_bpp:g} B/px", True, file=name)
+                elif max(width, height) > max_side:
+                    self.log_test(f"Asset: {name}", False, f"{summary} is larger than {max_side}px", True, file=name)
+                else:
+                    self.log_test(f"Asset: {name}", True, summary, file=name)
+            else:
+                summary = f"{width or '?'}x{height or '?'} SVG, {size}"
+                if snapshot.size > max_bytes:
+                    self.log_test(f"Asset: {name}", False, f"{summary} exceeds {format_bytes(max_bytes)}", True, file=name)
+                else:
+                    self.log_test(f"Asset: {name}", True, summary, file=name)
+        
+        # Compare icons with the sizes the manifest declares for them
+        declared = []
+        manifest_file = self.snapshot("manifest.json")
+        try:
+            manifest = json.loads(manifest_file.text) if manifest_file is not None else {}
+        except ValueError:
+            manifest = {}
+        for label, icons in (("Icon", manifest.get('icons')),
+                             ("Action icon", manifest.get('action', {}).get('default_icon'))):
+            if isinstance(icons, dict):
+                declared.extend((label, key, posixpath.normpath(path.lstrip('/')))
+                                for key, path in icons.items() if isinstance(path, str))
+        
+        # Icon files the manifest does not name still ship, so hold them to the size in their name
+        named = {icon for _, _, icon in declared}
+        for name in dimensions:
+            match = ICON_FILE_NAME.search(name)
+            if match and name not in named:
+                declared.append(("Icon file", match.group(1), name))
+        
+        for label, key, icon in declared:
+            if icon not in dimensions or not key.isdigit():
+                continue
+            expected = int(key)
+            kind, width, height = dimensions[icon]
+            test_name = f"Asset: {label} {key} ({icon})"
+            if kind == 'SVG':
+                # Vector icons scale to any size but must still be square
+                if width and height and width != height:
+                    self.log_test(test_name, False, f"SVG is {width}x{height}, icons must be square", file=icon)
+                else:
+                    self.log_test(test_name, True, f"Scalable SVG for {expected}px", file=icon)
+            elif (width, height) != (expected, expected):
+                # Chrome resizes a mismatched icon file, so only a manifest declaration is an error
+                self.log_test(test_name, False, f"Expected {expected}x{expected} but image is {width}x{height}",
+                              icon not in named, file=icon)
+            else:
+                bpp = self.snapshot(icon).size / (expected * expected)
+                if bpp > max_bpp:
+                    self.log_test(test_name, False, f"{bpp:.2f} B/px at declared size exceeds {max_bpp:g} B/px", True, file=icon)
+                else:
+                    self.log_test(test_name, True, f"Matches {expected}x{expected}", file=icon)
+        
+        return True
+    
+    def stylesheets(self) -> Dict[str, Tuple[str, str, List[CssRule], SelectorUsage, bool]]:
+        """label -> (file, css, rules, usage, loaded) for every packaged and script-injected stylesheet.
+        
+        Selectors are checked against the markup and scripts of the entry points that load
+        the stylesheet, or the script injecting it. Stylesheets no entry point loads are
+        checked against every packaged source. Parsed rules and the names each source can
+        produce are kept on the file snapshots, so unchanged files are not analyzed again.
+        """
+        sources: Dict[str, FileSnapshot] = {}
+        for name in self.packaged_files(('.html', '.htm', '.js')):
+            snapshot = self.snapshot(name)
+            if snapshot is not None:
+                sources[name] = snapshot
+        everything = SelectorUsage.combine(snapshot.selector_usage() for snapshot in sources.values())
+        
+        contexts: List[List[str]] = []
+        manifest_file = self.snapshot("manifest.json")
+        try:
+            manifest = json.loads(manifest_file.text) if manifest_file is not None else {}
+        except ValueError:
+            manifest = {}
+        for kind, _, _, loaded, _ in self.loaded_entry_points(manifest):
+            # The service worker has no DOM for styles to apply to
+            if kind != 'service_worker':
+                contexts.append(loaded)
+        
+        usages: Dict[FrozenSet[str], SelectorUsage] = {}
+        
+        def usage_for(file: str) -> Tuple[SelectorUsage, bool]:
+            names = frozenset(name for loaded in contexts if file in loaded for name in loaded)
+            if not names:
+                return everything, False
+            if names not in usages:
+                usages[names] = SelectorUsage.combine(sources[name].selector_usage()
+                                                      for name in names if name in sources)
+            return usages[names], True
+        
+        sheets = {}
+        for name in self.packaged_files(('.css',)):
+            snapshot = self.snapshot(name)
+            if snapshot is not None:
+                sheets[name] = (name, snapshot.text, snapshot.css_rules()) + usage_for(name)
+        for name, snapshot in sources.items():
+            for number, (css, rules) in enumerate(snapshot.markup()[1], 1):
+                sheets[f"{name} <style> #{number}"] = (name, css, rules) + usage_for(name)
+        return sheets
+    
+    def test_css_payload(self) -> bool:
+        """Test stylesheets for duplicate files, repeated rules and selectors nothing uses.
+        
+        Every packaged stylesheet ships, so all of them are checked for duplicates. Unused
+        rules are held to the css_unused_bytes budget in stylesheets a page or content
+        script loads; in the rest any unused rule is reported.
+        """
+        self.emit("\n🔍 Testing CSS payload...")
+        
+        sheets = self.stylesheets()
+        max_unused = self.budgets['css_unused_bytes']
+        
+        # Byte-identical stylesheets ship the same bytes more than once
+        by_digest: Dict[str, List[str]] = {}
+        for label, (file, *_) in sheets.items():
+            if label == file:
+                by_digest.setdefault(self.snapshot(file).digest, []).append(file)
+        for names in by_digest.values():
+            if len(names) > 1:
+                redundant = self.snapshot(names[0]).size * (len(names) - 1)
+                self.log_test(f"CSS: duplicate {names[0]}", False,
+                              f"Identical to {', '.join(names[1:])} ({format_bytes(redundant)} redundant)",
+                              True, file=names[0])
+        
+        shared: Dict[Tuple[str, str, str], Dict[str, int]] = {}
+        for label, (file, css, rules, usage, loaded) in sheets.items():
+            seen, repeated, repeated_bytes = set(), 0, 0
+            unused_rules, examples = 0, []
+            for rule in rules:
+                shared.setdefault(rule.key, {})[label] = rule.size
+                if rule.key in seen:
+                    repeated += 1
+                    repeated_bytes += rule.size
+                seen.add(rule.key)
+                unused = [selector for selector in rule.selectors if not usage.selector_used(selector)]
+                if len(unused) == len(rule.selectors):
+                    unused_rules += 1
+                examples.extend(unused)
+            
+            if repeated:
+                self.log_test(f"CSS: {label} repeated rules", False,
+                              f"{repeated} rule blocks appear more than once ({format_bytes(repeated_bytes)})",
+                              True, file=file)
+            
+            original = len(css.encode('utf-8'))
+            saved = original - len(prune_css(css, usage, rules).encode('utf-8'))
+            if examples or saved > 0:
+                listed = ', '.join(examples[:3]) + (', ...' if len(examples) > 3 else '')
+                message = (f"{unused_rules} of {len(rules)} rules unused ({listed}); pruning saves "
+                           f"{format_bytes(saved)} ({saved / original:.0%})")
+                if not loaded:
+                    self.log_test(f"CSS: {label} selectors", False,
+                                  f"{message}; no page or content script loads it", True, file=file)
+                elif saved > max_unused:
+                    self.log_test(f"CSS: {label} selectors", False,
+                                  f"{message}, over the {format_bytes(max_unused)} budget", True, file=file)
+                else:
+                    self.log_test(f"CSS: {label} selectors", True, message, file=file)
+            else:
+                self.log_test(f"CSS: {label} selectors", True,
+                              f"All {len(rules)} rules match markup or scripts", file=file)
+        
+        # Rule blocks copied between stylesheets, reported once per pair
+        overlaps: Dict[Tuple[str, str], List[int]] = {}
+        for owners in shared.values():
+            labels = sorted(owners)
+            for i, first in enumerate(labels):
+                for second in labels[i + 1:]:
+                    overlap = overlaps.setdefault((first, second), [0, 0])
+                    overlap[0] += 1
+                    overlap[1] += owners[first]
+        for (first, second), (count, size) in sorted(overlaps.items()):
+            if size >= CSS_SHARED_MIN_BYTES:
+                self.log_test(f"CSS: {first} shares rules with {second}", False,
+                              f"{count} identical rule blocks ({format_bytes(size)})", True,
+                              file=sheets[first][0])
+        
+        return True
+    
+    def write_pruned_stylesheets(self, out_dir: str) -> List[Tuple[str, int, int]]:
+        """Write a pruned copy of every packaged stylesheet; returns (name, before, after) bytes"""
+        written = []
+        for label, (file, css, rules, usage, _) in self.stylesheets().items():
+            if label != file:
+                continue
+            pruned = prune_css(css, usage, rules)
+            target = Path(out_dir) / file
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(pruned, encoding='utf-8')
+            written.append((file, len(css.encode('utf-8')), len(pruned.encode('utf-8'))))
+        return written
+    
+    def checks(self) -> List:
+        """All test methods, in reporting order"""
+        return [
+            self.test_manifest_json,
+            self.test_file_structure,
+            self.test_html_files,
+            self.test_javascript_files,
+            self.test_css_file,
+            self.test_css_payload,
+            self.test_api_structure,
+            self.test_background_script,
+            self.test_content_script,
+            self.test_payload_budget,
+            self.test_image_assets,
+        ]
+
+    def run_check(self, check) -> CheckBuffer:
+        """Run one check, collecting its output into a buffer"""
+        buffer = CheckBuffer(check.__name__)
+        self._buffer = buffer
+        started = time.perf_counter_ns()
+        try:
+            check()
+        finally:
+            buffer.duration_ns = time.perf_counter_ns() - started
+            self._buffer = None
+        return buffer
+
+    def replay(self, buffer: CheckBuffer):
+        """Report and keep everything a check recorded"""
+        for kind, value in buffer.events:
+            if kind == 'section':
+                self.reporter.section(value)
+            else:
+                self._record_result(value)
+
+    def read_timings(self) -> List[Timing]:
+        """Timings of the files this run actually read (not reused from earlier runs)"""
+        timings = []
+        for name, snapshot in sorted(self._run_snapshots.items()):
+            if snapshot is not None and snapshot.loaded_ns >= self._run_started_ns:
+                duration = (snapshot.read_ns + snapshot.decode_ns) / 1e9
+                timings.append(Timing('read', name, duration, snapshot.size))
+        return timings
+
+    def run_all_tests(self, jobs: int = 1, cache: Optional[ResultsCache] = None) -> RunResults:
+        """Run all tests and return their result records, with timings.
+        
+        With jobs above 1 the checks run in that many worker processes, each reading the
+        files it needs; results are still reported in check order.
+        """
+        self.reporter.start(self.extension_path)
+        self._run_snapshots = {}
+        self._run_started_ns = time.perf_counter_ns()
+        self.records = RunResults()
+        
+        # Replay cached results for checks whose inputs are unchanged
+        checks = self.checks()
+        buffers: Dict[str, CheckBuffer] = {}
+        if cache is not None:
+            for check in checks:
+                buffer = cache.lookup(check.__name__, self.snapshots)
+                if buffer is not None:
+                    buffers[check.__name__] = buffer
+            self.reporter.note(f"♻️ Incremental: reused {len(buffers)} of {len(checks)} checks")
+        stale = [check for check in checks if check.__name__ not in buffers]
+        
+        # Run the remaining test methods, replaying their output in a fixed order
+        if jobs > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(stale))) as pool:
+                futures = [pool.submit(run_check_in_worker, str(self.extension_path), self.budgets,
+                                       check.__name__, cache is not None)
+                           for check in stale]
+                for future in futures:
+                    buffer = future.result()
+                    buffers[buffer.name] = buffer
+                    # Files the workers read still count towards this run's read timings
+                    for name, snapshot in buffer.inputs.items():
+                        self._run_snapshots.setdefault(name, snapshot)
         else:
-            print("🔧 Fix critical issues before loading the extension")
-            print("📖 Check Chrome Extension documentation for guidance")
+            for check in stale:
+                buffers[check.__name__] = self.run_check(check)
+        
+        for check in checks:
+            self.replay(buffers[check.__name__])
+        
+        if cache is not None:
+            for check in stale:
+                cache.store(buffers[check.__name__])
+            cache.save()
+        
+        self.records.timings = [
+            Timing('check', check.__name__, buffers[check.__name__].duration_ns / 1e9,
+                   cached=buffers[check.__name__].cached)
+            for check in checks
+        ] + self.read_timings()
+        
+        self.reporter.finish(self.extension_path, self.records)
+        self.reporter.flush()
+        return self.records
+
+def run_check_in_worker(extension_path: str, budgets: Dict[str, Any], name: str,
+                        digests: bool = False) -> CheckBuffer:
+    """Run one check of a tree in a pool worker and return its buffer for replay"""
+    tester = PocketMentorExtensionTester(extension_path, reporter=QuietReporter(), budgets=budgets)
+    buffer = tester.run_check(getattr(tester, name))
+    if digests:
+        # Hash inputs here so the results cache need not read them again in the parent
+        for snapshot in buffer.inputs.values():
+            if snapshot is not None:
+                snapshot.digest
+    return buffer
+
+class StackSampler:
+    """Samples every thread's stack on a fixed interval and writes collapsed stacks"""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.counts: collections.Counter = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        """Write one 'frame;frame;frame count' line per distinct stack (flamegraph input)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextlib.contextmanager
+def profiling(path: Optional[str]):
+    """Profile the enclosed code into path: cProfile stats for .prof, collapsed stacks otherwise"""
+    if not path:
+        yield
+        return
+
+    if path.endswith('.prof'):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"📈 Profile written to {path}", file=sys.stderr)
+    else:
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write(path)
+            print(f"📈 Collapsed stacks written to {path}", file=sys.stderr)
+
+def tree_signature(extension_path: Path, ignore: Tuple[str, ...] = ()) -> Dict[str, Tuple[int, int]]:
+    """Map every file in a tree to its (mtime_ns, size), skipping hidden entries"""
+    signature = {}
+    for entry in walk_tree(extension_path, ignore):
+        st = entry.stat()
+        signature[entry.path] = (st.st_mtime_ns, st.st_size)
+    return signature
+
+def watch_tree(extension_path: str, jobs: int = 1, cache_path: Optional[str] = None,
+               interval: float = 0.2, report: str = 'human', slowest: int = 0,
+               budgets: Optional[Dict[str, int]] = None):
+    """Re-validate a tree incrementally whenever one of its files changes"""
+    root = Path(extension_path)
+    cache_file = Path(cache_path) if cache_path else root / RESULTS_CACHE_FILE
+    ignore = (cache_file.name, cache_file.name + '.tmp', '__pycache__', 'node_modules')
+    last_signature = None
+    try:
+        while True:
+            signature = tree_signature(root, ignore)
+            if signature != last_signature:
+                last_signature = signature
+                # Snapshots of deleted files would otherwise stay cached, and mapped, for the whole session
+                SNAPSHOT_CACHE.prune()
+                started = time.perf_counter()
+                reporter = REPORTERS[report](slowest=slowest)
+                tester = PocketMentorExtensionTester(extension_path, reporter=reporter, budgets=budgets)
+                tester.run_all_tests(jobs=jobs, cache=ResultsCache(cache_file, root, {'budgets': budgets}))
+                print(f"\n👀 Checked in {time.perf_counter() - started:.2f}s, watching {extension_path} for changes...")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+def validate_tree(extension_path: str, report: str = 'human',
+                  budgets: Optional[Dict[str, int]] = None) -> Tuple[str, RunResults, str]:
+    """Validate one tree with its output captured, for use in pool workers"""
+    output = io.StringIO()
+    # Per-tree slowest lists are printed once, in the combined report
+    reporter = HumanReporter(output) if report == 'human' else QuietReporter(output)
+    tester = PocketMentorExtensionTester(extension_path, reporter=reporter, budgets=budgets)
+    records = tester.run_all_tests()
+    return extension_path, records, output.getvalue()
+
+def expand_paths(patterns: List[str]) -> List[str]:
+    """Expand glob patterns into a sorted, de-duplicated list of directories"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            if match not in paths and os.path.isdir(match):
+                paths.append(match)
+    return paths
+
+def run_batch(paths: List[str], workers: Optional[int] = None, reporter: Optional[Reporter] = None,
+              budgets: Optional[Dict[str, int]] = None) -> Dict[str, List[CheckResult]]:
+    """Validate many trees on a pool of warm worker processes and write one combined report"""
+    reporter = reporter if reporter is not None else HumanReporter()
+    report = 'human' if isinstance(reporter, HumanReporter) else 'quiet'
+    count = len(paths)
+    if workers == 1 or count == 1:
+        reports = [validate_tree(path, report, budgets) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            reports = list(pool.map(validate_tree, paths, [report] * count, [budgets] * count))
+
+    reporter.render_batch(reports)
+    reporter.flush()
+    return {path: records for path, records, _ in reports}
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Validate the Pocket Mentor+ extension tree")
+    parser.add_argument("extension_paths", nargs="*", default=["/app"], metavar="PATH",
+                        help="Extension directories or glob patterns to validate (default: /app)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Run the checks of one tree in N worker processes (default: 1); "
+                             "--profile does not see work done in the workers")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Worker processes for batch validation (default: CPU count)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Print the combined batch report even for a single tree")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="Replay cached results for checks whose input files are unchanged "
+                             "(single tree only)")
+    parser.add_argument("--cache", default=None, metavar="FILE",
+                        help=f"Results cache file for --incremental (default: <tree>/{RESULTS_CACHE_FILE})")
+    parser.add_argument("--watch", action="store_true",
+                        help="Re-check the tree incrementally every time a file changes")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", dest="report", action="store_const", const="json",
+                        help="Write a JSON report")
+    output.add_argument("--junit", dest="report", action="store_const", const="junit",
+                        help="Write a JUnit XML report")
+    output.add_argument("-q", "--quiet", dest="report", action="store_const", const="quiet",
+                        help="Write nothing; report through the exit code only")
+    parser.set_defaults(report="human")
+    parser.add_argument("-o", "--output", default=None, metavar="FILE",
+                        help="Write the report to FILE instead of stdout")
+    parser.add_argument("--budget", action="append", default=[], metavar="KIND=SIZE",
+                        help="Override a budget, e.g. content_script=48K or image_bytes_per_pixel=2 "
+                             f"(kinds: {', '.join(list(PAYLOAD_BUDGETS) + list(ASSET_BUDGETS) + list(CSS_BUDGETS))})")
+    parser.add_argument("--prune-css", default=None, metavar="DIR",
+                        help="Write stylesheets with unused and repeated rules removed to DIR "
+                             "(single tree only)")
+    parser.add_argument("--slowest", type=int, default=0, metavar="N",
+                        help="List the N slowest checks and file reads after the summary")
+    parser.add_argument("--profile", default=None, metavar="FILE",
+                        help="Profile this process: cProfile stats if FILE ends in .prof, "
+                             "collapsed stacks for flamegraph tools otherwise")
+    return parser.parse_args(argv)
 
 def main():
     """Main test runner"""
-    tester = PocketMentorExtensionTester()
-    results = tester.run_all_tests()
+    args = parse_args()
+    with profiling(args.profile):
+        run(args)
+
+def run(args: argparse.Namespace):
+    """Validate the trees selected on the command line and exit with the outcome"""
+    for pattern in args.extension_paths:
+        if not glob.has_magic(pattern) and not os.path.isdir(pattern):
+            print(f"❌ not a directory: {pattern}")
+            sys.exit(1)
+    paths = expand_paths(args.extension_paths)
+    if not paths:
+        print(f"❌ No extension directories match: {' '.join(args.extension_paths)}")
+        sys.exit(1)
+
+    budgets = {}
+    kinds = list(PAYLOAD_BUDGETS) + list(ASSET_BUDGETS) + list(CSS_BUDGETS)
+    for override in args.budget:
+        kind, _, size = override.partition('=')
+        try:
+            if kind not in kinds:
+                raise ValueError(kind)
+            budgets[kind] = float(size) if kind == 'image_bytes_per_pixel' else parse_size(size)
+        except ValueError:
+            print(f"❌ Invalid --budget {override!r}; expected one of {', '.join(kinds)}=SIZE")
+            sys.exit(1)
+
+    if args.watch:
+        if len(paths) > 1:
+            print("❌ --watch takes a single extension directory")
+            sys.exit(1)
+        watch_tree(paths[0], jobs=args.jobs, cache_path=args.cache, report=args.report,
+                   slowest=args.slowest, budgets=budgets)
+        sys.exit(0)
+
+    stream = open(args.output, 'w', encoding='utf-8') if args.output else None
+    reporter = REPORTERS[args.report](stream, slowest=args.slowest)
+
+    if args.batch or len(paths) > 1:
+        if args.incremental:
+            # Each tree would need its own results cache; one shared file would mix them up
+            print("❌ --incremental takes a single extension directory")
+            sys.exit(1)
+        if args.prune_css:
+            # Pruned copies of several trees would overwrite each other in one directory
+            print("❌ --prune-css takes a single extension directory")
+            sys.exit(1)
+        if args.jobs > 1:
+            # Batch mode already runs one tree per worker process
+            print("❌ --jobs takes a single extension directory; use --workers for several trees")
+            sys.exit(1)
+        combined = run_batch(paths, workers=args.workers, reporter=reporter, budgets=budgets)
+        sys.exit(1 if any(summarize(r)['failed'] > 0 for r in combined.values()) else 0)
+
+    cache = None
+    if args.incremental:
+        root = Path(paths[0])
+        cache = ResultsCache(Path(args.cache) if args.cache else root / RESULTS_CACHE_FILE, root,
+                             {'budgets': budgets})
+
+    tester = PocketMentorExtensionTester(paths[0], reporter=reporter, budgets=budgets)
+    tester.run_all_tests(jobs=args.jobs, cache=cache)
+    
+    if args.prune_css:
+        for name, before, after in tester.write_pruned_stylesheets(args.prune_css):
+            if args.report == 'human':
+                print(f"✂️ {name}: {format_bytes(before)} → {format_bytes(after)} "
+                      f"(saved {format_bytes(before - after)})")
     
     # Exit with error code if tests failed
-    if results['failed'] > 0:
+    if tester.summary()['failed'] > 0:
         sys.exit(1)
     else:
         sys.exit(0)
@@ -3,9 +3,12 @@
 ============================================================= */
 
 import pocketMentorAPI from './api.js';
+import { NotesStore } from './notes-store.js';
+import { headerRecord, encodeRecords, validateRecord } from './backup-format.js';
 
 // Global state
 let isInitialized = false;
+const notesStore = new NotesStore(chrome.storage.local);
 
 // --- Initialize Extension ---
 chrome.runtime.onInstalled.addListener(async () => {
@@ -54,7 +57,6 @@ async function createContextMenus() {
 // --- Initialize Storage ---
 async function initializeStorage() {
   const defaultData = {
-    notes: [],
     studySessions: [],
     preferences: {
       theme: 'light',
@@ -77,6 +79,9 @@ async function initializeStorage() {
       await chrome.storage.local.set({ [key]: value });
     }
   }
+
+  // Creates the notes index, migrating notes saved by earlier versions
+  await notesStore.loadIndex();
   
   console.log("✅ Storage initialized");
 }
@@ -196,12 +201,18 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
         case 'deleteNote':
           result = await deleteNote(request.noteId);
           break;
+        case 'clearNotes':
+          result = await notesStore.clear();
+          break;
         case 'getStats':
           result = await getStats();
           break;
         case 'exportData':
           result = await exportData(request.format);
           break;
+        case 'importData':
+          result = await importRecords(request.records);
+          break;
         case 'checkCapabilities':
           result = pocketMentorAPI.getCapabilities();
           break;
@@ -220,18 +231,86 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
   return true; // Keep message channel open for async response
 });
 
+// --- Long Document Streaming ---
+// Chunk results are posted as they finish, so pages can show them before the merged result
+chrome.runtime.onConnect.addListener((port) => {
+  if (port.name !== 'long-document') return;
+
+  let connected = true;
+  port.onDisconnect.addListener(() => {
+    connected = false;
+  });
+
+  port.onMessage.addListener(async (request) => {
+    try {
+      const updates = request.action === 'generateStudyNotes'
+        ? pocketMentorAPI.generateLongStudyNotes(request.text, request.options)
+        : pocketMentorAPI.summarizeLongText(request.text, request.options);
+
+      for await (const update of updates) {
+        // Stops scheduling further chunks once the page has gone away
+        if (!connected) break;
+        port.postMessage({ success: true, ...update });
+      }
+    } catch (error) {
+      console.error(`❌ Error streaming ${request.action}:`, error);
+      if (connected) {
+        port.postMessage({ success: false, error: error.message });
+      }
+    }
+  });
+});
+
+// --- Streaming Backup Export ---
+// NDJSON is posted a shard at a time, so the backup never exists as one string in the worker
+chrome.runtime.onConnect.addListener((port) => {
+  if (port.name !== 'export-data') return;
+
+  let connected = true;
+  port.onDisconnect.addListener(() => {
+    connected = false;
+  });
+
+  port.onMessage.addListener(async () => {
+    try {
+      const { studySessions = [], stats } = await chrome.storage.local.get(['studySessions', 'stats']);
+      const { total } = await notesStore.counts();
+      port.postMessage({ success: true, type: 'batch', lines: encodeRecords([headerRecord({ notes: total, studySessions: studySessions.length })]), done: 0, total });
+
+      let done = 0;
+      let records = 0;
+      for await (const notes of notesStore.batches()) {
+        if (!connected) return;
+        done += notes.length;
+        records += notes.length;
+        port.postMessage({ success: true, type: 'batch', lines: encodeRecords(notes.map(data => ({ record: 'note', data }))), done, total });
+      }
+
+      const tail = studySessions.map(data => ({ record: 'session', data }));
+      if (stats) tail.push({ record: 'stats', data: stats });
+      records += tail.length;
+      tail.push({ record: 'end', records });
+      if (connected) {
+        port.postMessage({ success: true, type: 'final', lines: encodeRecords(tail), done, total });
+      }
+    } catch (error) {
+      console.error('❌ Error streaming export:', error);
+      if (connected) {
+        port.postMessage({ success: false, error: error.message });
+      }
+    }
+  });
+});
+
 // --- Storage Helper Functions ---
 async function saveNote(note) {
-  const { notes } = await chrome.storage.local.get('notes');
-  
   const newNote = {
     id: generateId(),
     ...note,
     createdAt: new Date().toISOString()
   };
   
-  notes.unshift(newNote); // Add to beginning
-  await chrome.storage.local.set({ notes });
+  await notesStore.add(newNote); // Only the newest shard is rewritten
   await updateStats('totalNotes', 1);
   
   console.log('📝 Note saved:', newNote.id);
@@ -239,25 +318,12 @@ async function saveNote(note) {
 }
 
 async function getNotes(filter = {}) {
-  const { notes } = await chrome.storage.local.get('notes');
-  
-  let filteredNotes = notes || [];
-  
-  if (filter.type) {
-    filteredNotes = filteredNotes.filter(note => note.type === filter.type);
-  }
-  
-  if (filter.limit) {
-    filteredNotes = filteredNotes.slice(0, filter.limit);
-  }
-  
-  return filteredNotes;
+  // Newest first; shards without a matching type are never read
+  return notesStore.query(filter);
 }
 
 async function deleteNote(noteId) {
-  const { notes } = await chrome.storage.local.get('notes');
-  const filteredNotes = notes.filter(note => note.id !== noteId);
-  await chrome.storage.local.set({ notes: filteredNotes });
+  await notesStore.remove(noteId);
   return true;
 }
 
@@ -274,7 +340,8 @@ async function updateStats(key, increment = 1) {
 }
 
 async function exportData(format = 'json') {
-  const data = await chrome.storage.local.get(['notes', 'studySessions', 'stats']);
+  const { studySessions, stats } = await chrome.storage.local.get(['studySessions', 'stats']);
+  const data = { notes: await notesStore.query(), studySessions, stats };
   
   if (format === 'json') {
     return JSON.stringify(data, null, 2);
@@ -284,6 +351,60 @@ async function exportData(format = 'json') {
   return data;
 }
 
+/**
+ * Merge one batch of parsed backup records into storage.
+ * Records are validated again here; notes whose ids already exist are skipped.
+ */
+async function importRecords(records = []) {
+  const result = { added: 0, duplicates: 0, sessions: 0, invalid: 0 };
+  const notes = [];
+  const sessions = [];
+  let importedStats = null;
+
+  for (const record of records) {
+    if (validateRecord(record) !== null) {
+      result.invalid++;
+      continue;
+    }
+    if (record.record === 'note') notes.push(record.data);
+    else if (record.record === 'session') sessions.push(record.data);
+    else if (record.record === 'stats') importedStats = record.data;
+  }
+
+  const existing = await notesStore.existingIds(notes.map(note => note.id));
+  const seen = new Set();
+  const fresh = notes.filter(note => {
+    if (existing.has(note.id) || seen.has(note.id)) return false;
+    seen.add(note.id);
+    return true;
+  });
+  result.added = await notesStore.addMany(fresh);
+  result.duplicates = notes.length - fresh.length;
+
+  if (sessions.length > 0) {
+    const { studySessions = [] } = await chrome.storage.local.get('studySessions');
+    const known = new Set(studySessions.map(session => session.id).filter(Boolean));
+    const added = sessions.filter(session => !session.id || !known.has(session.id));
+    await chrome.storage.local.set({ studySessions: studySessions.concat(added) });
+    result.sessions = added.length;
+  }
+
+  if (result.added > 0 || importedStats) {
+    const { stats = {} } = await chrome.storage.local.get('stats');
+    // Counters restored from a backup never go down; the note count follows what was actually added
+    for (const [key, value] of Object.entries(importedStats || {})) {
+      if (key !== 'totalNotes' && typeof value === 'number') {
+        stats[key] = Math.max(stats[key] || 0, value);
+      }
+    }
+    stats.totalNotes = (stats.totalNotes || 0) + result.added;
+    stats.lastActiveDate = new Date().toISOString();
+    await chrome.storage.local.set({ stats });
+  }
+
+  return result;
+}
+
 // --- Utility Functions ---
 function generateId() {
   return 'note_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
@@ -0,0 +1,128 @@
+/* ===== Pocket Mentor+ 🎓✨ Backup Format =====
+   Newline-delimited JSON backups: one record per line, written and read in
+   batches so neither side holds the whole library as one string
+============================================================= */
+
+export const BACKUP_FORMAT = 'pocket-mentor-backup';
+export const BACKUP_VERSION = 1;
+export const BACKUP_MIME_TYPE = 'application/x-ndjson';
+
+// Records per export message and per import batch sent to the service worker
+export const BACKUP_BATCH_SIZE = 200;
+
+/*
+ * A backup is, line by line:
+ *   {"record":"header","format":"pocket-mentor-backup","version":1,"exportedAt":"...","notes":N,"studySessions":M}
+ *   {"record":"note","data":{...}}          N times, oldest first, so an import appends them in order
+ *   {"record":"session","data":{...}}       M times
+ *   {"record":"stats","data":{...}}         at most once
+ *   {"record":"end","records":K}            K counts the note, session and stats lines
+ * The end record tells a complete file from one cut short.
+ */
+export const DATA_RECORDS = ['note', 'session', 'stats'];
+
+export function headerRecord(counts) {
+  return {
+    record: 'header',
+    format: BACKUP_FORMAT,
+    version: BACKUP_VERSION,
+    exportedAt: new Date().toISOString(),
+    notes: counts.notes,
+    studySessions: counts.studySessions
+  };
+}
+
+/** NDJSON text for a list of records, newline terminated */
+export function encodeRecords(records) {
+  return records.map(record => JSON.stringify(record) + '\n').join('');
+}
+
+/** Why a parsed record is not acceptable, or null when it is */
+export function validateRecord(record) {
+  if (!isObject(record)) return 'record is not an object';
+
+  switch (record.record) {
+    case 'header':
+      if (record.format !== BACKUP_FORMAT) return `unknown format ${JSON.stringify(record.format)}`;
+      if (!Number.isInteger(record.version) || record.version > BACKUP_VERSION) {
+        return `unsupported version ${JSON.stringify(record.version)}`;
+      }
+      return null;
+    case 'note':
+      return validateNote(record.data);
+    case 'session':
+      return isObject(record.data) ? null : 'session data is not an object';
+    case 'stats':
+      if (!isObject(record.data)) return 'stats data is not an object';
+      for (const [key, value] of Object.entries(record.data)) {
+        if (key !== 'lastActiveDate' && typeof value !== 'number') return `stats ${key} is not a number`;
+      }
+      return null;
+    case 'end':
+      return Number.isInteger(record.records) ? null : 'end record has no record count';
+    default:
+      return `unknown record ${JSON.stringify(record.record)}`;
+  }
+}
+
+function validateNote(note) {
+  if (!isObject(note)) return 'note data is not an object';
+  if (typeof note.id !== 'string' || !note.id) return 'note has no id';
+  if (typeof note.type !== 'string' || !note.type) return `note ${note.id} has no type`;
+  for (const field of ['originalText', 'processedText', 'url', 'title']) {
+    if (note[field] !== undefined && note[field] !== null && typeof note[field] !== 'string') {
+      return `note ${note.id} ${field} is not a string`;
+    }
+  }
+  if (note.createdAt !== undefined && !isDate(note.createdAt)) {
+    return `note ${note.id} createdAt is not a date`;
+  }
+  return null;
+}
+
+// The ECMAScript date time string format that toISOString() writes. Date.parse alone also
+// takes engine-specific forms like "May 1 2024"; validate_backup.py mirrors this check
+const ISO_DATE = /^(?!-000000)([+-]\d{6}|\d{4})(?:-(\d{2})(?:-(\d{2}))?)?(?:T(\d{2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?(Z|[+-](\d{2}):(\d{2}))?)?$/;
+
+function isDate(value) {
+  return typeof value === 'string' && ISO_DATE.test(value) && !Number.isNaN(Date.parse(value));
+}
+
+function isObject(value) {
+  return typeof value === 'object' && value !== null && !Array.isArray(value);
+}
+
+/**
+ * Lines of a byte stream, e.g. File.stream(), decoded as UTF-8 chunk by chunk.
+ * Yields { line, number, bytesRead } so callers can report progress against the file size.
+ */
+export async function* readLines(stream) {
+  const decoder = new TextDecoder();
+  const reader = stream.getReader();
+  let buffered = '';
+  let number = 0;
+  let bytesRead = 0;
+
+  try {
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      bytesRead += value.byteLength;
+      buffered += decoder.decode(value, { stream: true });
+
+      let start = 0;
+      let newline;
+      while ((newline = buffered.indexOf('\n', start)) !== -1) {
+        yield { line: buffered.slice(start, newline), number: ++number, bytesRead };
+        start = newline + 1;
+      }
+      buffered = buffered.slice(start);
+    }
+    buffered += decoder.decode();
+    if (buffered) {
+      yield { line: buffered, number: ++number, bytesRead };
+    }
+  } finally {
+    reader.releaseLock();
+  }
+}
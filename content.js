@@ -1,7 +1,7 @@
 // ===== Pocket Mentor+ Content Script 🎓✨ =====
 // Handles webpage interaction and text selection processing
 
-import videoAnalyzer from './video-analyzer.js';
+// videoAnalyzer comes from video-analyzer.js, which the manifest loads first in the same isolated world
 
 console.log('✅ Pocket Mentor+ content script loaded on:', window.location.href);
 
@@ -0,0 +1,634 @@
+#!/usr/bin/env python3
+"""
+Pocket Mentor+ Gemini Stand-in
+Offline replacement for the Gemini generateContent endpoint, plus a load
+generator that replays the PocketMentorAPI fallback calls against it
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MODEL = "gemini-pro"
+
+# The fallback mock in api.js waits 1-2 s before answering
+DEFAULT_LATENCY = "uniform:1000,2000"
+
+# Share of each PocketMentorAPI call in a realistic session
+DEFAULT_MIX = "summarize=40,translate=25,quiz=15,study_notes=20"
+
+# Words per streamed chunk, roughly what Gemini sends per SSE event
+STREAM_CHUNK_WORDS = 12
+
+RESPONSES = {
+    "summarize": "📝 **Summary:**\n\nThis text covers the main topics including key concepts and important "
+                 "information. The content discusses various aspects that are relevant to the subject matter.\n\n"
+                 "**Key Points:**\n• Main concept 1\n• Important detail 2\n• Relevant information 3",
+    "translate": "🌐 **Traducción al Español:**\n\nEste es el texto traducido al español. La traducción mantiene "
+                 "el significado original mientras adapta el contenido al idioma objetivo.",
+    "quiz": "❓ **Generated Quiz:**\n\nQ1: What is the main topic discussed?\nA) Option A\nB) Option B\n"
+            "C) Option C\nD) Option D\nCorrect: B\n\nQ2: Which concept is most important?\nA) First concept\n"
+            "B) Second concept\nC) Third concept\nD) All concepts\nCorrect: D",
+    "study_notes": "📚 **Study Notes:**\n\n**Key Concepts:**\n• Definition of the central idea\n• Supporting "
+                   "terms and how they relate\n\n**Important Facts:**\n• Figures quoted in the text\n\n"
+                   "**Potential Exam Questions:**\n1. Explain the central idea in your own words.",
+    "prompt": "🤖 **AI Response:**\n\nBased on your request, here's a comprehensive response that addresses the "
+              "key points you've raised. This response aims to be helpful, accurate, and informative.",
+}
+
+# Prompt templates matching the ones PocketMentorAPI builds in api.js
+PROMPTS = {
+    "summarize": "Summarize the following text:\n\n{text}",
+    "translate": "Translate the following text to {lang}:\n\n{text}",
+    "quiz": "Create {count} multiple-choice questions based on the following text. Format as:\n\n"
+            "Q1: [Question]\nA) [Option A]\nB) [Option B]\nC) [Option C]\nD) [Option D]\n"
+            "Correct: [Letter]\n\nText: {text}",
+    "study_notes": "Create comprehensive study notes from this text. Include:\n- Key concepts and definitions\n"
+                   "- Important facts and figures\n- Main themes and ideas\n- Potential exam questions\n\n"
+                   "Text: {text}",
+}
+
+WORDS = (
+    "photosynthesis energy light chloroplast cell membrane protein enzyme reaction carbon oxygen "
+    "history empire trade river culture language economy revolution treaty population migration "
+    "algorithm function variable memory network signal frequency theorem proof integral vector"
+).split()
+
+GENERATE_PATH = re.compile(r"^/v1beta/models/([\w.-]+):(generateContent|streamGenerateContent)$")
+
+
+class LatencyModel:
+    """Sample response latencies in seconds from a named distribution"""
+
+    def __init__(self, spec: str, rng: random.Random):
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"invalid latency {spec!r}; expected one of fixed:MS, uniform:LO,HI, "
+                             f"normal:MEAN,SD, lognormal:MEDIAN,SIGMA or exponential:MEAN")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+        self.rng = rng
+
+    def sample(self) -> float:
+        """One latency in seconds, never negative"""
+        v = self.values
+        if self.kind == "fixed":
+            ms = v[0]
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(v[0], v[1])
+        elif self.kind == "normal":
+            ms = self.rng.gauss(v[0], v[1])
+        elif self.kind == "lognormal":
+            ms = v[0] * self.rng.lognormvariate(0.0, v[1])
+        else:
+            ms = self.rng.expovariate(1.0 / v[0])
+        return max(ms, 0.0) / 1000
+
+
+class RateLimiter:
+    """Token bucket that admits a sustained number of requests per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def admit(self) -> Tuple[bool, float]:
+        """Take a token; when none is left return (False, seconds until the next one)"""
+        if self.rate <= 0:
+            return True, 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+def detect_action(prompt: str) -> str:
+    """Pick a canned response the way gemini-config.js detects the action"""
+    lower = prompt.lower()
+    if "study notes" in lower:
+        return "study_notes"
+    if "summarize" in lower or "summary" in lower:
+        return "summarize"
+    if "translate" in lower or "translation" in lower:
+        return "translate"
+    if "quiz" in lower or "question" in lower:
+        return "quiz"
+    return "prompt"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse a call mix such as summarize=40,translate=25 into weights"""
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name not in PROMPTS:
+            raise ValueError(f"unknown call {name!r}; expected one of {', '.join(PROMPTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ===== HTTP plumbing =====
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read one HTTP/1.1 request; None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method, target, headers, body
+
+
+async def read_response(reader: asyncio.StreamReader, on_chunk=None) -> Tuple[int, Dict[str, str], bytes]:
+    """Read one HTTP/1.1 response, calling on_chunk as each chunked-encoding piece arrives"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() != "chunked":
+        return status, headers, await reader.readexactly(int(headers.get("content-length", 0)))
+
+    body = bytearray()
+    while True:
+        size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+        chunk = await reader.readexactly(size + 2)
+        if size == 0:
+            return status, headers, bytes(body)
+        body += chunk[:-2]
+        if on_chunk is not None:
+            on_chunk(chunk[:-2])
+
+
+def response_head(status: int, reason: str, headers: Dict[str, Any]) -> bytes:
+    """Serialize a status line and headers"""
+    lines = [f"HTTP/1.1 {status} {reason}"] + [f"{key}: {value}" for key, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+# ===== Stand-in server =====
+
+class GeminiStandin:
+    """Serves generateContent and streamGenerateContent with simulated latency and rate limits"""
+
+    def __init__(self, latency: str = DEFAULT_LATENCY, error_rate: float = 0.0, rate: float = 0.0,
+                 burst: int = 10, retry_after: float = 1.0, chunk_interval: float = 0.05, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self.rng)
+        self.error_rate = error_rate
+        self.limiter = RateLimiter(rate, burst)
+        self.retry_after = retry_after
+        self.chunk_interval = chunk_interval
+        self.stats = Counter()
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        """Start listening; returns the bound port, so port 0 picks a free one"""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop accepting connections"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one keep-alive connection"""
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                keep_alive = await self.respond(writer, *request)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer: asyncio.StreamWriter, method: str, target: str,
+                      headers: Dict[str, str], body: bytes) -> bool:
+        """Write the response to one request; returns whether the connection stays open"""
+        keep_alive = headers.get("connection", "").lower() != "close"
+        url = urlsplit(target)
+        match = GENERATE_PATH.match(url.path)
+        if method != "POST" or match is None:
+            self.stats["404"] += 1
+            self.send_json(writer, 404, "Not Found", error_body(404, "NOT_FOUND", f"{method} {url.path}"))
+            return keep_alive
+
+        try:
+            payload = json.loads(body or b"{}")
+            prompt = payload["contents"][0]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self.stats["400"] += 1
+            self.send_json(writer, 400, "Bad Request",
+                           error_body(400, "INVALID_ARGUMENT", "contents[0].parts[0].text is required"))
+            return keep_alive
+
+        admitted, wait = self.limiter.admit()
+        if not admitted or self.rng.random() < self.error_rate:
+            self.stats["429"] += 1
+            retry_after = max(wait, self.retry_after)
+            self.send_json(writer, 429, "Too Many Requests",
+                           error_body(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted"),
+                           {"Retry-After": f"{retry_after:.2f}"})
+            return keep_alive
+
+        text = RESPONSES[detect_action(prompt)]
+        await asyncio.sleep(self.latency.sample())
+        if match.group(2) == "streamGenerateContent":
+            self.stats["stream"] += 1
+            await self.send_stream(writer, text, prompt)
+        else:
+            self.stats["200"] += 1
+            self.send_json(writer, 200, "OK", candidate_body(text, prompt, "STOP"))
+        return keep_alive
+
+    def send_json(self, writer: asyncio.StreamWriter, status: int, reason: str, body: Dict[str, Any],
+                  extra: Optional[Dict[str, str]] = None):
+        """Write a complete JSON response"""
+        data = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=UTF-8", "Content-Length": len(data)}
+        writer.write(response_head(status, reason, dict(headers, **(extra or {}))) + data)
+
+    async def send_stream(self, writer: asyncio.StreamWriter, text: str, prompt: str):
+        """Write the response as server-sent events, one candidate piece per chunk"""
+        writer.write(response_head(200, "OK", {"Content-Type": "text/event-stream",
+                                               "Transfer-Encoding": "chunked"}))
+        words = text.split(" ")
+        pieces = [" ".join(words[i:i + STREAM_CHUNK_WORDS]) for i in range(0, len(words), STREAM_CHUNK_WORDS)]
+        for i, piece in enumerate(pieces):
+            last = i == len(pieces) - 1
+            event = candidate_body(piece + ("" if last else " "), prompt, "STOP" if last else None)
+            data = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+            writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            await writer.drain()
+            if not last:
+                await asyncio.sleep(self.chunk_interval)
+        writer.write(b"0\r\n\r\n")
+
+
+def candidate_body(text: str, prompt: str, finish_reason: Optional[str]) -> Dict[str, Any]:
+    """A generateContent response shaped like the real API's"""
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    prompt_tokens = len(prompt) // 4
+    output_tokens = len(text) // 4
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+    }
+
+
+def error_body(code: int, status: str, message: str) -> Dict[str, Any]:
+    """An error response shaped like the real API's"""
+    return {"error": {"code": code, "message": message, "status": status}}
+
+
+# ===== Load generator =====
+
+class CallResult:
+    """Outcome of one PocketMentorAPI call, including any retries"""
+
+    __slots__ = ("call", "status", "latency", "first_byte", "attempts", "streamed")
+
+    def __init__(self, call: str, status: str, latency: float, first_byte: float, attempts: int,
+                 streamed: bool):
+        self.call = call
+        # 'ok', 'rate_limited' once retries run out, 'timeout' or 'error'
+        self.status = status
+        self.latency = latency
+        self.first_byte = first_byte
+        self.attempts = attempts
+        self.streamed = streamed
+
+
+class LoadGenerator:
+    """Replays a weighted mix of fallback calls from concurrent closed-loop clients"""
+
+    def __init__(self, host: str, port: int, mix: Dict[str, float], concurrency: int = 8,
+                 timeout: float = 30.0, retries: int = 2, backoff: float = 0.5, stream_share: float = 0.0,
+                 model: str = DEFAULT_MODEL, seed: int = 0):
+        self.host = host
+        self.port = port
+        self.calls = list(mix)
+        self.weights = [mix[call] for call in self.calls]
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.stream_share = stream_share
+        self.model = model
+        self.rng = random.Random(seed)
+        self.results: List[CallResult] = []
+
+    def next_call(self) -> Tuple[str, str, bool]:
+        """Pick a call, build its prompt from a selection-sized text, and choose whether to stream"""
+        call = self.rng.choices(self.calls, self.weights)[0]
+        # Selections range from a sentence to a long article
+        words = int(self.rng.lognormvariate(5.0, 0.8))
+        text = " ".join(self.rng.choice(WORDS) for _ in range(max(words, 5)))
+        prompt = PROMPTS[call].format(text=text, lang=self.rng.choice(["es", "fr", "de"]),
+                                      count=self.rng.choice([3, 5]))
+        return call, prompt, self.rng.random() < self.stream_share
+
+    async def run(self, requests: int = 0, duration: float = 0.0) -> float:
+        """Issue calls until the request count or duration is reached; returns elapsed seconds"""
+        remaining = [requests]
+        deadline = time.monotonic() + duration if duration else None
+        started = time.perf_counter()
+
+        def more() -> bool:
+            if deadline is not None:
+                return time.monotonic() < deadline
+            remaining[0] -= 1
+            return remaining[0] >= 0
+
+        await asyncio.gather(*(self.client(more) for _ in range(self.concurrency)))
+        return time.perf_counter() - started
+
+    async def client(self, more):
+        """One user: a keep-alive connection issuing calls back to back"""
+        connection = None
+        while more():
+            call, prompt, stream = self.next_call()
+            started = time.perf_counter()
+            first_byte = 0.0
+            status = "error"
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    if connection is None:
+                        connection = await asyncio.wait_for(
+                            asyncio.open_connection(self.host, self.port), self.timeout)
+                    code, headers, first = await asyncio.wait_for(
+                        self.request(connection, prompt, stream, started), self.timeout)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    status = "error"
+                else:
+                    if code == 200:
+                        status, first_byte = "ok", first
+                        break
+                    status = "rate_limited" if code == 429 else "error"
+                    if code == 429 and attempt <= self.retries:
+                        # Honour Retry-After, falling back to exponential backoff
+                        delay = float(headers.get("retry-after", self.backoff * 2 ** (attempt - 1)))
+                        await asyncio.sleep(delay)
+                        continue
+                    break
+                # The connection is in an unknown state after a timeout or error;
+                # None when it never opened, e.g. the target refused it
+                if connection is not None:
+                    connection[1].close()
+                    connection = None
+                if attempt > self.retries:
+                    break
+            self.results.append(CallResult(call, status, time.perf_counter() - started, first_byte,
+                                           attempt, stream))
+        if connection is not None:
+            connection[1].close()
+
+    async def request(self, connection, prompt: str, stream: bool, started: float) -> Tuple[int, Dict, float]:
+        """Send one generateContent request; returns (status, headers, seconds to first byte)"""
+        reader, writer = connection
+        method = "streamGenerateContent?alt=sse" if stream else "generateContent"
+        body = json.dumps({
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": 0.7, "topK": 40, "topP": 0.95, "maxOutputTokens": 1024},
+        }).encode("utf-8")
+        writer.write(
+            f"POST /v1beta/models/{self.model}:{method} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+        first = []
+
+        def on_chunk(_chunk):
+            if not first:
+                first.append(time.perf_counter() - started)
+
+        status, headers, data = await read_response(reader, on_chunk)
+        if status == 200 and not stream and not json.loads(data).get("candidates"):
+            raise ValueError("response has no candidates")
+        return status, headers, first[0] if first else time.perf_counter() - started
+
+
+def summarize_load(results: List[CallResult], elapsed: float) -> Dict[str, Any]:
+    """Throughput, outcome counts and latency percentiles overall and per call"""
+    def latency_stats(items: List[CallResult]) -> Dict[str, Any]:
+        latencies = [r.latency for r in items if r.status == "ok"]
+        return {
+            "requests": len(items),
+            "ok": len(latencies),
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies, default=0.0),
+        }
+
+    streamed = [r.first_byte for r in results if r.streamed and r.status == "ok"]
+    summary = {
+        "elapsed_seconds": elapsed,
+        "throughput": len([r for r in results if r.status == "ok"]) / elapsed if elapsed else 0.0,
+        "outcomes": dict(Counter(r.status for r in results)),
+        "retries": sum(r.attempts - 1 for r in results),
+        "latency": latency_stats(results),
+        "calls": {call: latency_stats([r for r in results if r.call == call])
+                  for call in sorted({r.call for r in results})},
+    }
+    if streamed:
+        summary["first_byte"] = {
+            "p50": percentile(streamed, 0.50),
+            "p95": percentile(streamed, 0.95),
+            "p99": percentile(streamed, 0.99),
+        }
+    return summary
+
+
+def print_load(summary: Dict[str, Any]):
+    """Print a load summary table"""
+    outcomes = ", ".join(f"{name} {count}" for name, count in sorted(summary["outcomes"].items()))
+    print(f"\n📈 Load: {summary['throughput']:.1f} ok/s over {summary['elapsed_seconds']:.1f}s "
+          f"({outcomes}; {summary['retries']} retries)")
+    print(f"{'call':<12} {'requests':>8} {'ok':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(summary["calls"].items()) + [("all", summary["latency"])]
+    for call, stats in rows:
+        print(f"{call:<12} {stats['requests']:>8} {stats['ok']:>6} {stats['p50'] * 1000:>8.0f} "
+              f"{stats['p95'] * 1000:>8.0f} {stats['p99'] * 1000:>8.0f} {stats['max'] * 1000:>8.0f}")
+    if "first_byte" in summary:
+        first = summary["first_byte"]
+        print(f"⏱️ Streamed first byte: p50 {first['p50'] * 1000:.0f} ms, "
+              f"p95 {first['p95'] * 1000:.0f} ms, p99 {first['p99'] * 1000:.0f} ms")
+
+
+# ===== Command line =====
+
+def standin_from_args(args: argparse.Namespace) -> GeminiStandin:
+    """Build the stand-in server from the shared options"""
+    return GeminiStandin(latency=args.latency, error_rate=args.error_rate, rate=args.rate,
+                         burst=args.burst, retry_after=args.retry_after,
+                         chunk_interval=args.chunk_interval / 1000, seed=args.seed)
+
+
+async def serve(args: argparse.Namespace):
+    """Run the stand-in until interrupted"""
+    standin = standin_from_args(args)
+    port = await standin.start(args.host, args.port)
+    print(f"🚀 Gemini stand-in on http://{args.host}:{port}/v1beta/models/{DEFAULT_MODEL}:generateContent "
+          f"(latency {args.latency}, 429 rate {args.error_rate:.0%}, limit {args.rate or 'none'}/s)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+
+
+async def load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the load generator, against an in-process stand-in unless --target is given"""
+    standin = None
+    if args.target:
+        host, _, port = args.target.rpartition(":")
+        port = int(port)
+    else:
+        standin = standin_from_args(args)
+        host = DEFAULT_HOST
+        port = await standin.start(host, 0)
+
+    generator = LoadGenerator(host, port, parse_mix(args.mix), concurrency=args.concurrency,
+                              timeout=args.timeout, retries=args.retries, backoff=args.backoff,
+                              stream_share=args.stream, seed=args.seed)
+    budget = f"{args.duration:g}s" if args.duration else f"{args.requests} calls"
+    print(f"🔥 {args.concurrency} clients against {host}:{port} ({budget}, latency {args.latency})")
+    try:
+        elapsed = await generator.run(args.requests, args.duration)
+    finally:
+        if standin is not None:
+            await standin.stop()
+
+    summary = summarize_load(generator.results, elapsed)
+    print_load(summary)
+    return summary
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Offline Gemini stand-in and load generator for Pocket Mentor+")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    shared = argparse.ArgumentParser(add_help=False)
+    shared.add_argument("--latency", default=DEFAULT_LATENCY,
+                        help="Response latency in ms: fixed:MS, uniform:LO,HI, normal:MEAN,SD, "
+                             f"lognormal:MEDIAN,SIGMA or exponential:MEAN (default: {DEFAULT_LATENCY})")
+    shared.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests answered with a 429 regardless of load")
+    shared.add_argument("--rate", type=float, default=0.0,
+                        help="Requests per second admitted before answering 429 (default: unlimited)")
+    shared.add_argument("--burst", type=int, default=10, help="Requests admitted at once under --rate")
+    shared.add_argument("--retry-after", type=float, default=1.0,
+                        help="Minimum Retry-After seconds on a 429 (default: 1)")
+    shared.add_argument("--chunk-interval", type=float, default=50.0,
+                        help="Milliseconds between streamed chunks (default: 50)")
+    shared.add_argument("--seed", type=int, default=0, help="Random seed for reproducible runs")
+
+    server = commands.add_parser("serve", parents=[shared], help="Run the stand-in server")
+    server.add_argument("--host", default=DEFAULT_HOST)
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    generator = commands.add_parser("load", parents=[shared], help="Replay fallback calls and report latency")
+    generator.add_argument("--target", metavar="HOST:PORT",
+                           help="Load an already running stand-in instead of starting one in-process")
+    generator.add_argument("--mix", default=DEFAULT_MIX,
+                           help=f"Weighted call mix (default: {DEFAULT_MIX})")
+    generator.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    generator.add_argument("-n", "--requests", type=int, default=200, help="Total calls (default: 200)")
+    generator.add_argument("-d", "--duration", type=float, default=0.0,
+                           help="Run for this many seconds instead of a fixed number of calls")
+    generator.add_argument("--timeout", type=float, default=30.0, help="Seconds before a call times out")
+    generator.add_argument("--retries", type=int, default=2,
+                           help="Retries after a 429, timeout or connection error (default: 2)")
+    generator.add_argument("--backoff", type=float, default=0.5,
+                           help="Backoff base in seconds when a 429 has no Retry-After")
+    generator.add_argument("--stream", type=float, default=0.0,
+                           help="Share of calls that use streamGenerateContent (default: 0)")
+    generator.add_argument("--json", metavar="FILE", help="Write the load summary to FILE")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    try:
+        LatencyModel(args.latency, random.Random())
+        if args.command == "load":
+            parse_mix(args.mix)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args))
+            return
+        summary = asyncio.run(load(args))
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    sys.exit(0 if summary["latency"]["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
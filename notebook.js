@@ -3,12 +3,27 @@
 import pocketMentorAPI from './api.js';
 import geminiConfig from './gemini-config.js';
 import themeManager from './theme-manager.js';
+import { NoteIndex } from './notes-index.js';
+import { BACKUP_BATCH_SIZE, BACKUP_MIME_TYPE, DATA_RECORDS, readLines, validateRecord } from './backup-format.js';
+
+// Notes list rows have a fixed height so only the rows in view need DOM
+const NOTE_CARD_HEIGHT = 236;
+const NOTE_ROW_GAP = 24;
+const NOTE_CARD_MIN_WIDTH = 320;
+// Rows rendered above and below the visible ones, so fast scrolling does not show gaps
+const NOTE_OVERSCAN_ROWS = 2;
 
 class PocketMentorNotebook {
   constructor() {
     this.elements = {};
     this.currentResult = null;
-    this.notes = [];
+    // Immutable snapshot of every saved note, and the filtered, searched subset being shown
+    this.noteIndex = new NoteIndex();
+    this.visibleNotes = [];
+    this.notesWindow = null;
+    this.renderedRange = null;
+    this.windowFrame = null;
+    this.windowForce = false;
     this.stats = {};
     this.isLoading = false;
     
@@ -67,8 +82,11 @@ class PocketMentorNotebook {
       // Notes elements
       notesContainer: document.getElementById('notesContainer'),
       notesFilter: document.getElementById('notesFilter'),
+      notesSearch: document.getElementById('notesSearch'),
       refreshNotes: document.getElementById('refreshNotes'),
       exportNotes: document.getElementById('exportNotes'),
+      importNotes: document.getElementById('importNotes'),
+      importFile: document.getElementById('importFile'),
       clearAllNotes: document.getElementById('clearAllNotes'),
       
       // Stats elements
@@ -111,7 +129,23 @@ class PocketMentorNotebook {
     // Notes controls
     this.elements.refreshNotes.addEventListener('click', () => this.loadNotes());
     this.elements.notesFilter.addEventListener('change', () => this.filterNotes());
+    this.elements.notesSearch.addEventListener('input', () => this.filterNotes());
+    this.elements.notesContainer.addEventListener('click', (e) => {
+      const btn = e.target.closest('.delete-note');
+      if (btn) {
+        e.stopPropagation();
+        this.deleteNote(btn.dataset.noteId);
+      }
+    });
+    window.addEventListener('scroll', () => this.scheduleNotesWindow(), { passive: true });
+    window.addEventListener('resize', () => this.scheduleNotesWindow(true));
     this.elements.exportNotes.addEventListener('click', () => this.exportNotes());
+    this.elements.importNotes.addEventListener('click', () => this.elements.importFile.click());
+    this.elements.importFile.addEventListener('change', () => {
+      const file = this.elements.importFile.files[0];
+      this.elements.importFile.value = '';
+      if (file) this.importNotes(file);
+    });
     this.elements.clearAllNotes.addEventListener('click', () => this.clearAllNotes());
 
     // Auto-save input
@@ -279,15 +313,19 @@ class PocketMentorNotebook {
     this.showLoading(`${this.capitalizeFirst(action)}ing your text...`);
     
     try {
-      const response = await chrome.runtime.sendMessage({
-        action: action,
-        text: text,
-        questionCount: action === 'generateQuiz' ? 5 : undefined,
-        options: { 
-          format: 'markdown',
-          temperature: 0.7
-        }
-      });
+      const options = { 
+        format: 'markdown',
+        temperature: 0.7
+      };
+      // Long inputs are summarized in chunks, shown as each one finishes
+      const response = (action === 'summarize' || action === 'generateStudyNotes')
+        ? await this.streamLongDocument(action, text, options)
+        : await chrome.runtime.sendMessage({
+          action: action,
+          text: text,
+          questionCount: action === 'generateQuiz' ? 5 : undefined,
+          options
+        });
 
       if (response.success) {
         this.currentResult = {
@@ -352,6 +390,41 @@ class PocketMentorNotebook {
     }
   }
 
+  streamLongDocument(action, text, options) {
+    return new Promise((resolve) => {
+      const port = chrome.runtime.connect({ name: 'long-document' });
+      const partials = [];
+
+      port.onMessage.addListener((message) => {
+        if (!message.success || message.type === 'final') {
+          port.disconnect();
+          resolve(message.success ? { success: true, result: message.result } : message);
+          return;
+        }
+        partials[message.index] = message.result;
+        this.showPartialResults(partials, message.total);
+      });
+      port.onDisconnect.addListener(() => {
+        resolve({ success: false, error: 'Background connection closed' });
+      });
+
+      port.postMessage({ action, text, options });
+    });
+  }
+
+  showPartialResults(partials, total) {
+    const ready = partials.filter(Boolean);
+    this.elements.outputBox.innerHTML = `
+      <div class="loading" style="display: flex; align-items: center; gap: 10px; padding: 10px 20px;">
+        <div class="spinner"></div>
+        <span>${ready.length} of ${total} sections ready, merging when done...</span>
+      </div>
+      <div class="result-content" style="line-height: 1.6; opacity: 0.8;">
+        ${ready.map(result => this.formatResult(result)).join('<hr>')}
+      </div>
+    `;
+  }
+
   showLoading(message) {
     this.isLoading = true;
     this.setButtonsDisabled(true);
@@ -480,8 +553,9 @@ class PocketMentorNotebook {
       const response = await chrome.runtime.sendMessage({ action: 'getNotes' });
       
       if (response.success) {
-        this.notes = response.result;
-        this.renderNotes();
+        this.noteIndex = new NoteIndex(response.result);
+        this.filterNotes();
+        this.buildSearchIndexWhenIdle();
       } else {
         console.error('Failed to load notes:', response.error);
       }
@@ -490,18 +564,85 @@ class PocketMentorNotebook {
     }
   }
 
+  // The full-text index is built after the list is on screen, so the first search is instant too
+  buildSearchIndexWhenIdle() {
+    const noteIndex = this.noteIndex;
+    const build = () => noteIndex.ensureText();
+    if (typeof requestIdleCallback === 'function') {
+      requestIdleCallback(build, { timeout: 2000 });
+    } else {
+      setTimeout(build, 0);
+    }
+  }
+
   renderNotes() {
-    if (!this.notes || this.notes.length === 0) {
-      this.elements.notesContainer.innerHTML = `
+    const container = this.elements.notesContainer;
+    if (this.visibleNotes.length === 0) {
+      const message = this.noteIndex.size === 0
+        ? '📝 No notes yet. Start by processing some text above!'
+        : '🔍 No notes match this filter or search.';
+      container.classList.remove('notes-virtual');
+      container.style.height = '';
+      container.innerHTML = `
         <div style="text-align: center; padding: 40px; opacity: 0.7;">
-          <p>📝 No notes yet. Start by processing some text above!</p>
+          <p>${message}</p>
         </div>
       `;
+      this.notesWindow = null;
+      this.renderedRange = null;
       return;
     }
 
-    const notesHTML = this.notes.map(note => `
-      <div class="note-card fade-in" data-note-id="${note.id}">
+    if (!this.notesWindow) {
+      container.classList.add('notes-virtual');
+      container.innerHTML = '<div class="notes-window"></div>';
+      this.notesWindow = container.firstElementChild;
+    }
+    this.renderNotesWindow(true);
+  }
+
+  scheduleNotesWindow(force = false) {
+    if (!this.notesWindow) return;
+    this.windowForce = this.windowForce || force;
+    if (this.windowFrame) return;
+    this.windowFrame = requestAnimationFrame(() => {
+      this.windowFrame = null;
+      const forceRender = this.windowForce;
+      this.windowForce = false;
+      this.renderNotesWindow(forceRender);
+    });
+  }
+
+  /**
+   * Render only the rows of note cards that intersect the viewport.
+   * The container keeps the full list height, so the page scrollbar stays accurate.
+   */
+  renderNotesWindow(force = false) {
+    const container = this.elements.notesContainer;
+    const rowHeight = NOTE_CARD_HEIGHT + NOTE_ROW_GAP;
+    const columns = Math.max(1, Math.floor((container.clientWidth + NOTE_ROW_GAP) / (NOTE_CARD_MIN_WIDTH + NOTE_ROW_GAP)));
+    const rows = Math.ceil(this.visibleNotes.length / columns);
+
+    const top = container.getBoundingClientRect().top;
+    const firstRow = Math.max(0, Math.floor(-top / rowHeight) - NOTE_OVERSCAN_ROWS);
+    const lastRow = Math.min(rows, Math.ceil((window.innerHeight - top) / rowHeight) + NOTE_OVERSCAN_ROWS);
+
+    const range = `${columns}:${firstRow}:${lastRow}`;
+    if (!force && range === this.renderedRange) return;
+    this.renderedRange = range;
+
+    container.style.height = `${rows * rowHeight - NOTE_ROW_GAP}px`;
+    this.notesWindow.style.gridTemplateColumns = `repeat(${columns}, 1fr)`;
+    this.notesWindow.style.transform = `translateY(${firstRow * rowHeight}px)`;
+    this.notesWindow.innerHTML = this.visibleNotes
+      .slice(firstRow * columns, Math.max(firstRow, lastRow) * columns)
+      .map(note => this.renderNoteCard(note))
+      .join('');
+  }
+
+  renderNoteCard(note) {
+    return `
+      <div class="note-card" data-note-id="${note.id}">
         <div class="note-header">
           <span class="note-type">${this.getTypeIcon(note.type)} ${this.capitalizeFirst(note.type)}</span>
           <div>
@@ -521,17 +662,7 @@ class PocketMentorNotebook {
         </div>
         ${note.url ? `<div style="font-size: 0.75rem; opacity: 0.6; margin-top: 8px; border-top: 1px solid rgba(184, 134, 11, 0.2); padding-top: 8px;">From: ${note.title || note.url}</div>` : ''}
       </div>
-    `).join('');
-    
-    this.elements.notesContainer.innerHTML = notesHTML;
-    
-    // Attach delete handlers
-    this.elements.notesContainer.querySelectorAll('.delete-note').forEach(btn => {
-      btn.addEventListener('click', (e) => {
-        e.stopPropagation();
-        this.deleteNote(btn.dataset.noteId);
-      });
-    });
+    `;
   }
 
   async deleteNote(noteId) {
@@ -544,7 +675,9 @@ class PocketMentorNotebook {
       });
 
       if (response.success) {
-        await this.loadNotes();
+        // The store is already current, so the note is dropped from the snapshot instead of reloading everything
+        this.noteIndex = this.noteIndex.without(noteId);
+        this.filterNotes();
         await this.loadStats();
         this.showMessage('✅ Note deleted', 'success');
       } else {
@@ -557,15 +690,11 @@ class PocketMentorNotebook {
   }
 
   filterNotes() {
-    const filterType = this.elements.notesFilter.value;
-    
-    if (!filterType) {
-      this.renderNotes();
-      return;
-    }
-    
-    const filteredNotes = this.notes.filter(note => note.type === filterType);
-    this.notes = filteredNotes;
+    // Filtering never changes the snapshot, so clearing the filter needs no reload
+    this.visibleNotes = this.noteIndex.query({
+      type: this.elements.notesFilter.value,
+      text: this.elements.notesSearch.value
+    });
     this.renderNotes();
   }
 
@@ -596,30 +725,137 @@ class PocketMentorNotebook {
   }
 
   async exportNotes() {
+    this.showLoading('📥 Preparing export...');
     try {
-      const response = await chrome.runtime.sendMessage({ 
-        action: 'exportData',
-        format: 'json' 
+      const blob = await this.streamExport();
+      const url = URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `pocket-mentor-notes-${new Date().toISOString().split('T')[0]}.ndjson`;
+      a.click();
+
+      URL.revokeObjectURL(url);
+      this.showMessage('✅ Notes exported successfully!', 'success');
+    } catch (error) {
+      console.error('Failed to export notes:', error);
+      this.showMessage('❌ Failed to export notes', 'error');
+    }
+  }
+
+  // Each batch from the service worker is folded into the Blob as it arrives, so no full backup string is built
+  streamExport() {
+    return new Promise((resolve, reject) => {
+      const port = chrome.runtime.connect({ name: 'export-data' });
+      let blob = new Blob([], { type: BACKUP_MIME_TYPE });
+      let finished = false;
+
+      port.onMessage.addListener((message) => {
+        if (!message.success) {
+          finished = true;
+          port.disconnect();
+          reject(new Error(message.error));
+          return;
+        }
+        blob = new Blob([blob, message.lines], { type: BACKUP_MIME_TYPE });
+        if (message.type === 'final') {
+          finished = true;
+          port.disconnect();
+          resolve(blob);
+          return;
+        }
+        this.showLoading(`📥 Exporting notes... ${message.done.toLocaleString()} of ${message.total.toLocaleString()}`);
+      });
+      port.onDisconnect.addListener(() => {
+        if (!finished) reject(new Error('Background connection closed'));
       });
 
-      if (response.success) {
-        const dataStr = response.result;
-        const dataBlob = new Blob([dataStr], { type: 'application/json' });
-        
-        const url = URL.createObjectURL(dataBlob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = `pocket-mentor-notes-${new Date().toISOString().split('T')[0]}.json`;
-        a.click();
-        
-        URL.revokeObjectURL(url);
-        this.showMessage('✅ Notes exported successfully!', 'success');
-      } else {
-        this.showMessage('❌ Failed to export notes', 'error');
+      port.postMessage({ action: 'export' });
+    });
+  }
+
+  /**
+   * Read an NDJSON backup line by line, checking each record and sending
+   * batches to the service worker to merge, with progress against the file size.
+   */
+  async importNotes(file) {
+    const totals = { added: 0, duplicates: 0, sessions: 0, invalid: 0 };
+    const problems = [];
+    let batch = [];
+    let records = 0;
+    let header = null;
+    let end = null;
+
+    const sendBatch = async (bytesRead) => {
+      if (batch.length > 0) {
+        const response = await chrome.runtime.sendMessage({ action: 'importData', records: batch });
+        if (!response.success) throw new Error(response.error);
+        for (const key of Object.keys(totals)) totals[key] += response.result[key];
+        batch = [];
+      }
+      const percent = file.size ? Math.min(100, Math.round(bytesRead / file.size * 100)) : 100;
+      this.showLoading(`📤 Importing notes... ${percent}% (${totals.added.toLocaleString()} added)`);
+    };
+
+    this.showLoading('📤 Reading backup...');
+    try {
+      for await (const { line, number, bytesRead } of readLines(file.stream())) {
+        if (!line.trim()) continue;
+
+        let record;
+        try {
+          record = JSON.parse(line);
+        } catch (error) {
+          record = null;
+        }
+        const problem = record === null ? 'not valid JSON' : validateRecord(record);
+
+        if (!header) {
+          if (problem || record.record !== 'header') {
+            throw new Error(`Line ${number}: not a Pocket Mentor+ backup (${problem || 'missing header'})`);
+          }
+          header = record;
+          continue;
+        }
+        if (problem) {
+          totals.invalid++;
+          if (problems.length < 5) problems.push(`line ${number}: ${problem}`);
+          continue;
+        }
+        if (record.record === 'end') {
+          end = record;
+          continue;
+        }
+        if (DATA_RECORDS.includes(record.record)) {
+          records++;
+          batch.push(record);
+        }
+        if (batch.length >= BACKUP_BATCH_SIZE) {
+          await sendBatch(bytesRead);
+        }
       }
+      if (!header) throw new Error('The file is empty');
+      await sendBatch(file.size);
     } catch (error) {
-      console.error('Failed to export notes:', error);
-      this.showMessage('❌ Failed to export notes', 'error');
+      console.error('Failed to import notes:', error);
+      this.showMessage(`❌ Import stopped: ${error.message}. ${totals.added} notes were added before it stopped.`, 'error');
+      await this.loadNotes();
+      await this.loadStats();
+      return;
+    }
+
+    if (problems.length > 0) {
+      console.warn('Skipped backup records:', problems);
+    }
+    await this.loadNotes();
+    await this.loadStats();
+
+    const complete = end && end.records === records + totals.invalid;
+    const summary = `${totals.added.toLocaleString()} notes added, ${totals.duplicates.toLocaleString()} already saved` +
+      (totals.invalid ? `, ${totals.invalid.toLocaleString()} invalid skipped` : '');
+    if (complete) {
+      this.showMessage(`✅ Import finished: ${summary}`, totals.invalid ? 'warning' : 'success');
+    } else {
+      this.showMessage(`⚠️ Backup looks incomplete, imported what was there: ${summary}`, 'warning');
     }
   }
 
@@ -627,7 +863,7 @@ class PocketMentorNotebook {
     if (!confirm('Are you sure you want to delete ALL notes? This cannot be undone.')) return;
     
     try {
-      await chrome.storage.local.set({ notes: [] });
+      await chrome.runtime.sendMessage({ action: 'clearNotes' });
       await this.loadNotes();
       await this.loadStats();
       this.showMessage('✅ All notes cleared', 'success');
@@ -754,6 +990,26 @@ style.textContent = `
     opacity: 0.8;
   }
   
+  .notes-grid.notes-virtual {
+    display: block;
+    position: relative;
+  }
+  
+  .notes-window {
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    display: grid;
+    gap: ${NOTE_ROW_GAP}px;
+    will-change: transform;
+  }
+  
+  .notes-window .note-card {
+    height: ${NOTE_CARD_HEIGHT}px;
+    box-sizing: border-box;
+  }
+  
   .delete-note:hover {
     opacity: 1 !important;
     transform: scale(1.1);
@@ -0,0 +1,222 @@
+// ===== Pocket Mentor+ Notes Storage Benchmark 🎓✨ =====
+// Compares the flat `notes` array with the sharded NotesStore against an
+// in-memory chrome.storage.local stand-in. Run offline with:
+//   node notes-benchmark.mjs --sizes 10000,50000,100000
+
+import { NotesStore, DEFAULT_SHARD_SIZE } from './notes-store.js';
+
+// Values are kept as JSON, so every get and set pays the serialization cost chrome.storage does
+class MemoryStorageArea {
+  constructor() {
+    this.items = new Map();
+    this.bytesRead = 0;
+    this.bytesWritten = 0;
+  }
+
+  async get(keys) {
+    const list = keys === undefined ? [...this.items.keys()] : [].concat(keys);
+    const result = {};
+    for (const key of list) {
+      const json = this.items.get(key);
+      if (json === undefined) continue;
+      this.bytesRead += json.length;
+      result[key] = JSON.parse(json);
+    }
+    return result;
+  }
+
+  async set(values) {
+    for (const [key, value] of Object.entries(values)) {
+      const json = JSON.stringify(value);
+      this.bytesWritten += json.length;
+      this.items.set(key, json);
+    }
+  }
+
+  async remove(keys) {
+    for (const key of [].concat(keys)) {
+      this.items.delete(key);
+    }
+  }
+}
+
+// The whole-array read-modify-write layout background.js used before sharding
+class FlatNotes {
+  constructor(area) {
+    this.area = area;
+  }
+
+  async add(note) {
+    const { notes } = await this.area.get('notes');
+    notes.unshift(note);
+    await this.area.set({ notes });
+  }
+
+  async remove(noteId) {
+    const { notes } = await this.area.get('notes');
+    await this.area.set({ notes: notes.filter(note => note.id !== noteId) });
+  }
+
+  async query(filter = {}) {
+    const { notes } = await this.area.get('notes');
+    let filteredNotes = notes || [];
+    if (filter.type) {
+      filteredNotes = filteredNotes.filter(note => note.type === filter.type);
+    }
+    if (filter.limit) {
+      filteredNotes = filteredNotes.slice(0, filter.limit);
+    }
+    return filteredNotes;
+  }
+}
+
+// Quizzes are rare, so a type query has to look past many other notes
+const TYPES = [
+  ['summarize', 35], ['explain', 25], ['translate', 20], ['saved', 15], ['quiz', 5]
+];
+
+const SENTENCE = 'Photosynthesis converts light energy into chemical energy stored in glucose. ';
+
+function parseArgs(argv) {
+  const options = { sizes: [10000, 50000, 100000], ops: 20, shardSize: DEFAULT_SHARD_SIZE, json: null };
+  for (let i = 0; i < argv.length; i++) {
+    const value = argv[i + 1];
+    switch (argv[i]) {
+      case '--sizes': options.sizes = value.split(',').map(Number); i++; break;
+      case '--ops': options.ops = Number(value); i++; break;
+      case '--shard-size': options.shardSize = Number(value); i++; break;
+      case '--json': options.json = value; i++; break;
+      default:
+        console.error(`❌ Unknown option ${argv[i]}`);
+        process.exit(1);
+    }
+  }
+  return options;
+}
+
+// Deterministic so the flat and sharded runs see the same notes and operations
+function createRandom(seed) {
+  return () => {
+    seed = (seed * 1664525 + 1013904223) % 4294967296;
+    return seed / 4294967296;
+  };
+}
+
+function pickType(random) {
+  let roll = random() * 100;
+  for (const [type, weight] of TYPES) {
+    roll -= weight;
+    if (roll < 0) return type;
+  }
+  return TYPES[0][0];
+}
+
+function makeNote(random, time) {
+  const type = pickType(random);
+  return {
+    id: `note_${time}_${Math.floor(random() * 1e9).toString(36)}`,
+    type,
+    originalText: SENTENCE.repeat(2 + Math.floor(random() * 4)),
+    processedText: SENTENCE.repeat(1 + Math.floor(random() * 3)),
+    url: `https://example.com/article/${Math.floor(random() * 1000)}`,
+    title: 'Study article',
+    timestamp: new Date(time).toISOString(),
+    createdAt: new Date(time).toISOString()
+  };
+}
+
+// Flat layout is newest first, like background.js kept it
+function seedNotes(count) {
+  const random = createRandom(count);
+  const start = Date.UTC(2024, 0, 1);
+  const notes = [];
+  for (let i = 0; i < count; i++) {
+    notes.push(makeNote(random, start + i * 60000));
+  }
+  return notes.reverse();
+}
+
+async function timeOps(area, count, operation) {
+  const read = area.bytesRead;
+  const written = area.bytesWritten;
+  const started = performance.now();
+  for (let i = 0; i < count; i++) {
+    await operation(i);
+  }
+  const elapsed = performance.now() - started;
+  return {
+    ms: elapsed / count,
+    bytes: (area.bytesRead - read + area.bytesWritten - written) / count
+  };
+}
+
+async function benchLayout(name, seeded, options) {
+  const area = new MemoryStorageArea();
+  await area.set({ notes: seeded });
+
+  let store;
+  let migration = null;
+  if (name === 'sharded') {
+    store = new NotesStore(area, options.shardSize);
+    const started = performance.now();
+    await store.loadIndex();
+    migration = performance.now() - started;
+  } else {
+    store = new FlatNotes(area);
+  }
+
+  const random = createRandom(seeded.length + 1);
+  const newest = Date.parse(seeded[0].createdAt);
+  const victims = Array.from({ length: options.ops }, () => seeded[Math.floor(random() * seeded.length)].id);
+
+  const results = {
+    add: await timeOps(area, options.ops, i => store.add(makeNote(random, newest + (i + 1) * 1000))),
+    recent: await timeOps(area, options.ops, () => store.query({ limit: 3 })),
+    byType: await timeOps(area, options.ops, () => store.query({ type: 'quiz', limit: 20 })),
+    remove: await timeOps(area, options.ops, i => store.remove(victims[i]))
+  };
+
+  const check = (await store.query({ type: 'quiz', limit: 20 })).map(note => note.id);
+  return { results, migration, check };
+}
+
+function formatBytes(bytes) {
+  if (bytes >= 1024 * 1024) return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+  if (bytes >= 1024) return `${(bytes / 1024).toFixed(1)} KB`;
+  return `${Math.round(bytes)} B`;
+}
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+  const report = [];
+
+  console.log(`⏱️ Notes storage, ${options.ops} operations each, shards of ${options.shardSize}`);
+  console.log(`${'notes'.padStart(7)} ${'layout'.padEnd(8)} ${'operation'.padEnd(10)} ${'ms/op'.padStart(9)} ${'bytes/op'.padStart(10)}`);
+
+  for (const size of options.sizes) {
+    const seeded = seedNotes(size);
+    const layouts = {};
+    for (const name of ['flat', 'sharded']) {
+      layouts[name] = await benchLayout(name, seeded, options);
+      for (const [operation, { ms, bytes }] of Object.entries(layouts[name].results)) {
+        console.log(`${String(size).padStart(7)} ${name.padEnd(8)} ${operation.padEnd(10)} ${ms.toFixed(3).padStart(9)} ${formatBytes(bytes).padStart(10)}`);
+      }
+    }
+
+    if (layouts.flat.check.join() !== layouts.sharded.check.join()) {
+      console.error(`❌ Sharded results differ from the flat layout at ${size} notes`);
+      process.exit(1);
+    }
+    console.log(`📦 Migrated ${size} notes in ${layouts.sharded.migration.toFixed(1)} ms`);
+    report.push({ notes: size, shardSize: options.shardSize, migrationMs: layouts.sharded.migration,
+      flat: layouts.flat.results, sharded: layouts.sharded.results });
+  }
+
+  if (options.json) {
+    const { writeFile } = await import('node:fs/promises');
+    await writeFile(options.json, JSON.stringify(report, null, 2));
+    console.log(`💾 Results written to ${options.json}`);
+  }
+}
+
+main();
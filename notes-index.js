@@ -0,0 +1,163 @@
+/* ===== Pocket Mentor+ 🎓✨ Notebook Notes Index =====
+   An immutable snapshot of the saved notes with a type index and a
+   tokenized full-text index, so filtering and search never rescan every note
+============================================================= */
+
+// Letters and digits in any script; everything else separates words
+const TOKEN_PATTERN = /[\p{L}\p{N}]+/gu;
+// Only the start of very long notes is searchable, which keeps the index small
+const INDEXED_CHARS = 4000;
+
+/** Lowercase words of a string, in order, duplicates included */
+export function tokenize(text) {
+  return (text || '').toLowerCase().match(TOKEN_PATTERN) || [];
+}
+
+export class NoteIndex {
+  /**
+   * @param {Array} notes - Newest-first notes as returned by getNotes
+   * @param {Object} shared - Internal: lists of a parent snapshot, used by without()
+   */
+  constructor(notes = [], shared = null) {
+    if (shared) {
+      // A derived snapshot reuses the parent's lists and only hides removed notes
+      Object.assign(this, shared);
+    } else {
+      this.notes = Object.freeze(notes.map(note => Object.freeze({ ...note })));
+      this.positions = new Map(this.notes.map((note, position) => [note.id, position]));
+      this.byType = buildTypeIndex(this.notes);
+      this.removed = new Set();
+      // token -> ascending positions and the sorted words, built on first search or when the page is idle.
+      // The holder stays mutable so every snapshot derived from this one shares the same build.
+      this.textIndex = { tokens: null, vocabulary: null };
+    }
+    Object.freeze(this);
+  }
+
+  get tokens() {
+    return this.textIndex.tokens;
+  }
+
+  get vocabulary() {
+    return this.textIndex.vocabulary;
+  }
+
+  get size() {
+    return this.notes.length - this.removed.size;
+  }
+
+  /** A new snapshot without the given note; this one is unchanged */
+  without(noteId) {
+    const position = this.positions.get(noteId);
+    if (position === undefined || this.removed.has(position)) return this;
+    const removed = new Set(this.removed).add(position);
+    return new NoteIndex(null, { ...this.shared(), removed });
+  }
+
+  /** Per-type counts of the notes still present */
+  typeCounts() {
+    const counts = {};
+    for (const [type, positions] of this.byType) {
+      const present = positions.filter(position => !this.removed.has(position)).length;
+      if (present > 0) counts[type] = present;
+    }
+    return counts;
+  }
+
+  /**
+   * Newest-first notes matching an optional type and search text.
+   * Every query word must appear in the note; the last one may be a prefix,
+   * so results update while a word is still being typed.
+   */
+  query({ type = '', text = '' } = {}) {
+    const words = [...new Set(tokenize(text))];
+    const lists = [];
+
+    if (type) {
+      lists.push(this.byType.get(type) || []);
+    }
+    if (words.length > 0) {
+      this.ensureText();
+      const last = words.pop();
+      for (const word of words) {
+        lists.push(this.tokens.get(word) || []);
+      }
+      // A finished word typed again as a prefix does not narrow anything further
+      if (!words.includes(last)) {
+        lists.push(this.prefixPositions(last));
+      }
+    }
+
+    const positions = lists.length > 0 ? intersect(lists) : this.notes.map((note, position) => position);
+    const results = [];
+    for (const position of positions) {
+      if (!this.removed.has(position)) results.push(this.notes[position]);
+    }
+    return results;
+  }
+
+  /** Build the full-text index now if it has not been built yet */
+  ensureText() {
+    if (this.tokens) return;
+    const tokens = new Map();
+    this.notes.forEach((note, position) => {
+      const text = [note.title, note.originalText, note.processedText]
+        .map(field => (field || '').slice(0, INDEXED_CHARS))
+        .join(' ');
+      for (const token of new Set(tokenize(text))) {
+        const list = tokens.get(token);
+        if (list) {
+          list.push(position);
+        } else {
+          tokens.set(token, [position]);
+        }
+      }
+    });
+    this.textIndex.tokens = tokens;
+    this.textIndex.vocabulary = [...tokens.keys()].sort();
+  }
+
+  // Positions of notes with any word starting with prefix, found by binary search over the sorted words
+  prefixPositions(prefix) {
+    const vocabulary = this.vocabulary;
+    let low = 0;
+    let high = vocabulary.length;
+    while (low < high) {
+      const middle = (low + high) >>> 1;
+      if (vocabulary[middle] < prefix) low = middle + 1;
+      else high = middle;
+    }
+
+    const lists = [];
+    for (let i = low; i < vocabulary.length && vocabulary[i].startsWith(prefix); i++) {
+      lists.push(this.tokens.get(vocabulary[i]));
+    }
+    if (lists.length <= 1) return lists[0] || [];
+    return [...new Set(lists.flat())].sort((a, b) => a - b);
+  }
+
+  shared() {
+    return { notes: this.notes, positions: this.positions, byType: this.byType, textIndex: this.textIndex };
+  }
+}
+
+// --- Index Helpers ---
+function buildTypeIndex(notes) {
+  const byType = new Map();
+  notes.forEach((note, position) => {
+    const list = byType.get(note.type);
+    if (list) {
+      list.push(position);
+    } else {
+      byType.set(note.type, [position]);
+    }
+  });
+  return byType;
+}
+
+/** Positions present in every ascending list, walking from the shortest */
+function intersect(lists) {
+  const [shortest, ...others] = [...lists].sort((a, b) => a.length - b.length);
+  const sets = others.map(list => new Set(list));
+  return shortest.filter(position => sets.every(set => set.has(position)));
+}
@@ -0,0 +1,384 @@
+/* ===== Pocket Mentor+ 🎓✨ Sharded Notes Store =====
+   Keeps notes in fixed-size shards with a small type/date index, so a save,
+   delete or filtered read only touches the shards it needs
+============================================================= */
+
+const INDEX_KEY = 'notesIndex';
+const LEGACY_KEY = 'notes';
+const SHARD_PREFIX = 'notes_';
+const STORE_VERSION = 2;
+
+// Notes per shard: small enough that a write stays cheap, large enough to keep the index short
+export const DEFAULT_SHARD_SIZE = 200;
+
+export class NotesStore {
+  /**
+   * @param {chrome.storage.StorageArea} area - Where shards and the index live
+   * @param {number} shardSize - Notes per shard before a new one is started
+   */
+  constructor(area, shardSize = DEFAULT_SHARD_SIZE) {
+    this.area = area;
+    this.shardSize = shardSize;
+    // The service worker is the only writer, so the index is kept in memory once loaded
+    this.index = null;
+    this.loading = null;
+    // Mutations run one at a time so concurrent messages cannot lose each other's writes
+    this.queue = Promise.resolve();
+  }
+
+  // --- Index ---
+  loadIndex() {
+    if (!this.loading) {
+      this.loading = this.readIndex().catch(error => {
+        this.loading = null;
+        throw error;
+      });
+    }
+    return this.loading;
+  }
+
+  async readIndex() {
+    const stored = await this.area.get([INDEX_KEY, LEGACY_KEY]);
+    if (stored[INDEX_KEY]) {
+      this.index = stored[INDEX_KEY];
+    } else {
+      this.index = emptyIndex(this.shardSize);
+      if (!stored[LEGACY_KEY]) {
+        await this.area.set({ [INDEX_KEY]: this.index });
+      }
+    }
+
+    // A flat array left by an older version is folded in on first use
+    if (Array.isArray(stored[LEGACY_KEY])) {
+      if (this.index.migrated !== undefined) {
+        // The shards were written but the worker stopped before the array was removed
+        await this.area.remove(LEGACY_KEY);
+      } else {
+        await this.migrate(stored[LEGACY_KEY]);
+      }
+    }
+    return this.index;
+  }
+
+  /**
+   * Move notes from the flat newest-first `notes` array into shards.
+   * The array is removed only after the shards and index are written; the index
+   * records the migration in that same write, so a restart in between never
+   * migrates the array twice.
+   */
+  async migrate(legacyNotes) {
+    const index = this.index;
+    const writes = {};
+    const oldestFirst = legacyNotes.slice().reverse();
+
+    let shard = index.shards[index.shards.length - 1];
+    let notes = shard ? await this.readShard(shard) : null;
+    for (const note of oldestFirst) {
+      if (!shard || shard.count >= index.shardSize) {
+        shard = newShard(index);
+        notes = [];
+      }
+      notes.push(note);
+      addToShard(shard, note);
+      writes[shard.key] = notes;
+    }
+
+    index.migrated = legacyNotes.length;
+    writes[INDEX_KEY] = index;
+    await this.area.set(writes);
+    await this.area.remove(LEGACY_KEY);
+    console.log(`📦 Migrated ${legacyNotes.length} notes into ${index.shards.length} shards`);
+  }
+
+  async readShard(shard) {
+    const stored = await this.area.get(shard.key);
+    return stored[shard.key] || [];
+  }
+
+  async readShards(shards) {
+    if (shards.length === 0) return {};
+    return this.area.get(shards.map(shard => shard.key));
+  }
+
+  serialize(operation) {
+    const result = this.queue.then(operation);
+    this.queue = result.catch(() => {});
+    return result;
+  }
+
+  // --- Public API ---
+  /** Append a note to the newest shard */
+  add(note) {
+    return this.serialize(async () => {
+      const index = await this.loadIndex();
+
+      let shard = index.shards[index.shards.length - 1];
+      let notes;
+      if (!shard || shard.count >= index.shardSize) {
+        shard = newShard(index);
+        notes = [];
+      } else {
+        notes = await this.readShard(shard);
+      }
+
+      notes.push(note);
+      addToShard(shard, note);
+      await this.area.set({ [shard.key]: notes, [INDEX_KEY]: index });
+      return note;
+    });
+  }
+
+  /**
+   * Store notes with one write per shard touched, e.g. for an import.
+   * Imported notes are usually older than the library, so each goes into the
+   * shard covering its creation time, and a shard that grows past the limit is
+   * split; query() then still returns them in date order.
+   * Callers drop notes whose ids already exist first; see existingIds().
+   */
+  addMany(newNotes) {
+    return this.serialize(async () => {
+      const index = await this.loadIndex();
+      if (newNotes.length === 0) return 0;
+
+      // Oldest first, keeping the given order between notes of the same time
+      const sorted = newNotes
+        .map((note, order) => ({ note, time: noteTime(note), order }))
+        .sort((a, b) => a.time - b.time || a.order - b.order);
+
+      const loaded = new Map();
+      for (const { note, time } of sorted) {
+        let shard = shardFor(index, time);
+        if (!shard) {
+          shard = newShard(index);
+          loaded.set(shard.key, []);
+        } else if (!loaded.has(shard.key)) {
+          loaded.set(shard.key, await this.readShard(shard));
+        }
+
+        const notes = loaded.get(shard.key);
+        insertByTime(notes, note, time);
+        addToShard(shard, note);
+        if (shard.count > index.shardSize) {
+          const upper = splitShard(index, shard, notes);
+          loaded.set(upper.shard.key, upper.notes);
+        }
+      }
+
+      const writes = { [INDEX_KEY]: index };
+      for (const [key, notes] of loaded) {
+        writes[key] = notes;
+      }
+      await this.area.set(writes);
+      return newNotes.length;
+    });
+  }
+
+  /** The subset of ids already stored, reading only shards whose id range could hold them */
+  async existingIds(ids) {
+    await this.queue;
+    const index = await this.loadIndex();
+    const wanted = new Set(ids);
+    const shards = index.shards.filter(shard => ids.some(id => {
+      const time = noteTime({ id });
+      return time === 0 || (time >= shard.from && time <= shard.to);
+    }));
+
+    const existing = new Set();
+    const stored = await this.readShards(shards);
+    for (const shard of shards) {
+      for (const note of stored[shard.key] || []) {
+        if (wanted.has(note.id)) existing.add(note.id);
+      }
+    }
+    return existing;
+  }
+
+  /** Notes shard by shard, oldest first, holding one shard in memory at a time */
+  async *batches() {
+    const index = await this.loadIndex();
+    // Shards written while iterating are not revisited
+    for (const shard of index.shards.slice()) {
+      yield await this.readShard(shard);
+    }
+  }
+
+  /** Remove a note by id, reading only shards whose id range could hold it */
+  remove(noteId) {
+    return this.serialize(async () => {
+      const index = await this.loadIndex();
+      const time = noteTime({ id: noteId });
+
+      // Ids carry their creation time; odd ids from imports fall back to every shard
+      const likely = index.shards.filter(shard => time >= shard.from && time <= shard.to);
+      const candidates = likely.length > 0 ? likely : index.shards.slice();
+
+      for (const shard of candidates.reverse()) {
+        const notes = await this.readShard(shard);
+        const position = notes.findIndex(note => note.id === noteId);
+        if (position === -1) continue;
+
+        const [removed] = notes.splice(position, 1);
+        removeFromShard(shard, removed, notes);
+
+        if (shard.count === 0) {
+          index.shards.splice(index.shards.indexOf(shard), 1);
+          await this.area.set({ [INDEX_KEY]: index });
+          await this.area.remove(shard.key);
+        } else {
+          await this.area.set({ [shard.key]: notes, [INDEX_KEY]: index });
+        }
+        return true;
+      }
+      return false;
+    });
+  }
+
+  /**
+   * Newest-first notes, optionally filtered by type and creation date.
+   * Only shards the index says can contribute are read, and reading stops
+   * once the limit is met.
+   *
+   * @param {Object} filter - { type, since, limit }
+   */
+  async query(filter = {}) {
+    await this.queue;
+    const index = await this.loadIndex();
+    const since = filter.since ? Date.parse(filter.since) : null;
+    const limit = filter.limit || Infinity;
+
+    // Walk shards newest first and pick the ones needed to fill the limit
+    const needed = [];
+    let available = 0;
+    for (let i = index.shards.length - 1; i >= 0 && available < limit; i--) {
+      const shard = index.shards[i];
+      if (since !== null && shard.to < since) continue;
+      const matching = filter.type ? (shard.types[filter.type] || 0) : shard.count;
+      if (matching === 0) continue;
+      needed.push(shard);
+      available += matching;
+    }
+
+    const stored = await this.readShards(needed);
+    const results = [];
+    for (const shard of needed) {
+      const notes = stored[shard.key] || [];
+      for (let i = notes.length - 1; i >= 0 && results.length < limit; i--) {
+        const note = notes[i];
+        if (filter.type && note.type !== filter.type) continue;
+        if (since !== null && noteTime(note) < since) continue;
+        results.push(note);
+      }
+    }
+    return results;
+  }
+
+  /** Per-type counts and totals straight from the index */
+  async counts() {
+    const index = await this.loadIndex();
+    const types = {};
+    let total = 0;
+    for (const shard of index.shards) {
+      total += shard.count;
+      for (const [type, count] of Object.entries(shard.types)) {
+        types[type] = (types[type] || 0) + count;
+      }
+    }
+    return { total, types, shards: index.shards.length };
+  }
+
+  /** Delete every note and shard */
+  clear() {
+    return this.serialize(async () => {
+      const index = await this.loadIndex();
+      const keys = index.shards.map(shard => shard.key);
+      this.index = emptyIndex(index.shardSize);
+      this.loading = Promise.resolve(this.index);
+      await this.area.set({ [INDEX_KEY]: this.index });
+      await this.area.remove([...keys, LEGACY_KEY]);
+      return true;
+    });
+  }
+}
+
+// --- Index Helpers ---
+function emptyIndex(shardSize) {
+  return { version: STORE_VERSION, shardSize, nextShard: 0, shards: [] };
+}
+
+function newShard(index, position = index.shards.length) {
+  const shard = {
+    key: SHARD_PREFIX + index.nextShard++,
+    count: 0,
+    types: {},
+    from: Infinity,
+    to: -Infinity
+  };
+  index.shards.splice(position, 0, shard);
+  return shard;
+}
+
+/**
+ * The shard a note created at `time` belongs in, or null when it needs a new newest shard.
+ * Shards cover consecutive time ranges, oldest first; a note falling between two
+ * shards joins the older one while it has room.
+ */
+function shardFor(index, time) {
+  const shards = index.shards;
+  const newest = shards[shards.length - 1];
+  if (!newest || time >= newest.to) {
+    return newest && newest.count < index.shardSize ? newest : null;
+  }
+  const position = shards.findIndex(shard => shard.to > time);
+  const older = shards[position - 1];
+  if (older && time >= older.to && older.count < index.shardSize && time < shards[position].from) {
+    return older;
+  }
+  return shards[position];
+}
+
+/** Insert after every note that is not newer, so a shard stays oldest first */
+function insertByTime(notes, note, time) {
+  let position = notes.length;
+  while (position > 0 && noteTime(notes[position - 1]) > time) position--;
+  notes.splice(position, 0, note);
+}
+
+/** Move the newer half of an overfull shard into a new shard right after it */
+function splitShard(index, shard, notes) {
+  const upperNotes = notes.splice(notes.length >> 1);
+  const upper = newShard(index, index.shards.indexOf(shard) + 1);
+  Object.assign(shard, { count: 0, types: {}, from: Infinity, to: -Infinity });
+  notes.forEach(note => addToShard(shard, note));
+  upperNotes.forEach(note => addToShard(upper, note));
+  return { shard: upper, notes: upperNotes };
+}
+
+function addToShard(shard, note) {
+  const time = noteTime(note);
+  shard.count++;
+  shard.types[note.type] = (shard.types[note.type] || 0) + 1;
+  shard.from = Math.min(shard.from, time);
+  shard.to = Math.max(shard.to, time);
+}
+
+function removeFromShard(shard, note, remaining) {
+  shard.count--;
+  if (--shard.types[note.type] === 0) {
+    delete shard.types[note.type];
+  }
+  // Ranges only shrink when an edge note goes, which needs the rest of the shard
+  const time = noteTime(note);
+  if (time === shard.from || time === shard.to) {
+    const times = remaining.map(noteTime);
+    shard.from = Math.min(Infinity, ...times);
+    shard.to = Math.max(-Infinity, ...times);
+  }
+}
+
+/** Milliseconds since the epoch from a note id like note_1700000000000_x, else its createdAt */
+function noteTime(note) {
+  const match = /^note_(\d+)_/.exec(note.id || '');
+  if (match) return Number(match[1]);
+  const parsed = Date.parse(note.createdAt || note.timestamp || '');
+  return Number.isNaN(parsed) ? 0 : parsed;
+}
@@ -309,7 +309,7 @@ class PocketMentorPopup {
     }
 
     try {
-      await chrome.storage.local.set({ notes: [] });
+      await chrome.runtime.sendMessage({ action: 'clearNotes' });
       this.loadRecentNotes();
       this.showMessage('✅ All notes cleared', 'success');
     } catch (error) {
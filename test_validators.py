@@ -0,0 +1,761 @@
+#!/usr/bin/env python3
+"""
+Pocket Mentor+ Validator Checks
+Focused behavior checks for the offline tools: python3 -m pytest test_validators.py
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import backend_test
+import validate_backup
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def backup_lines(notes: int):
+    """NDJSON lines of a complete backup holding this many notes"""
+    yield {"record": "header", "format": "pocket-mentor-backup", "version": 1, "notes": notes}
+    for i in range(notes):
+        yield {"record": "note", "data": {"id": f"note_{1700000000000 + i}_x", "type": "summary",
+                                          "originalText": f"text {i} " * 50,
+                                          "createdAt": "2024-05-01T10:00:00.000Z"}}
+    yield {"record": "end", "records": notes}
+
+
+# A small extension: a popup, a service worker and a content script
+TREE = {
+    "manifest.json": json.dumps({
+        "manifest_version": 3, "name": "Tiny", "version": "1.0",
+        "background": {"service_worker": "background.js"},
+        "content_scripts": [{"matches": ["<all_urls>"], "js": ["content.js"]}],
+        "action": {"default_popup": "popup.html"},
+    }),
+    "popup.html": '<!DOCTYPE html><html><head></head><body><p class="note">Hi</p>'
+                  '<script src="popup.js"></script></body></html>',
+    "popup.js": "document.querySelector('.note').textContent = 'ok';",
+    "background.js": "chrome.runtime.onInstalled.addListener(() => {});",
+    "content.js": "console.log('content');",
+}
+
+
+def write_tree(root: str, files):
+    """Write {relative name: text or bytes} under root and return root"""
+    for name, content in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content if isinstance(content, bytes) else content.encode())
+    return root
+
+
+class SnapshotCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "a.js")
+        self.cache = backend_test.SnapshotCache()
+        self.addCleanup(self.cache.close)
+
+    def write(self, data: bytes, mtime_ns: int):
+        with open(self.path, "wb") as f:
+            f.write(data)
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_unchanged_file_reuses_its_snapshot(self):
+        self.write(b"let a = 1;", 10**18)
+        first = self.cache.get(self.path)
+        self.assertEqual(first.text, "let a = 1;")
+        self.assertIs(self.cache.get(self.path), first)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_changed_mtime_or_size_replaces_the_snapshot(self):
+        self.write(b"let a = 1;", 10**18)
+        first = self.cache.get(self.path)
+        # Same size, newer mtime
+        self.write(b"let b = 2;", 10**18 + 1)
+        second = self.cache.get(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.text, "let b = 2;")
+        # Same mtime, different size
+        self.write(b"let c = 300;", 10**18 + 1)
+        self.assertEqual(self.cache.get(self.path).text, "let c = 300;")
+
+    def test_large_files_are_mapped_and_closed_when_replaced(self):
+        self.write(b"x" * backend_test.MMAP_THRESHOLD, 10**18)
+        first = self.cache.get(self.path)
+        data = first.data
+        self.assertIsInstance(data, mmap.mmap)
+        self.assertEqual(first.digest, hashlib.sha256(b"x" * backend_test.MMAP_THRESHOLD).hexdigest())
+        self.write(b"small", 10**18 + 1)
+        self.assertIsInstance(self.cache.get(self.path).data, bytes)
+        self.assertTrue(data.closed)
+
+    def test_deleted_files_are_dropped(self):
+        self.write(b"x" * backend_test.MMAP_THRESHOLD, 10**18)
+        data = self.cache.get(self.path).data
+        os.remove(self.path)
+        self.cache.prune()
+        self.assertEqual(len(self.cache), 0)
+        self.assertTrue(data.closed)
+        self.assertIsNone(self.cache.get(self.path))
+        self.assertIsNone(self.cache.get(os.path.dirname(self.path)))
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.good = write_tree(os.path.join(tmp.name, "good"), TREE)
+        self.bad = write_tree(os.path.join(tmp.name, "bad"), {**TREE, "manifest.json": "{ not json"})
+
+    def test_reports_are_combined_in_path_order(self):
+        for workers in (1, 2):
+            stream = io.StringIO()
+            results = backend_test.run_batch([self.good, self.bad], workers, backend_test.JsonReporter(stream))
+            report = json.loads(stream.getvalue())
+            self.assertEqual([tree["extension_path"] for tree in report["trees"]], [self.good, self.bad])
+            self.assertEqual(list(results), [self.good, self.bad])
+            for tree in report["trees"]:
+                self.assertEqual(tree["summary"], backend_test.summarize(results[tree["extension_path"]]))
+            for key in ("total_tests", "passed", "failed", "errors", "warnings"):
+                self.assertEqual(report["summary"][key], sum(tree["summary"][key] for tree in report["trees"]))
+            bad = [r["message"] for r in report["trees"][1]["results"] if r["name"] == "Manifest JSON"]
+            self.assertTrue(bad and bad[0].startswith("Invalid JSON"), bad)
+
+    def test_human_batch_lists_every_tree(self):
+        stream = io.StringIO()
+        backend_test.run_batch([self.good, self.bad], 1, backend_test.HumanReporter(stream))
+        output = stream.getvalue()
+        self.assertIn("📦 Batch Summary (2 trees):", output)
+        self.assertIn(f"📁 {self.good}", output)
+        self.assertIn(f"❌ {self.bad}:", output)
+
+
+class ResultsCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = write_tree(os.path.join(tmp.name, "tree"), TREE)
+        self.cache_path = os.path.join(tmp.name, "cache.json")
+
+    def run_tree(self, cache=True, budgets=None):
+        """(outcomes, checks reused) of one run with a fresh snapshot cache"""
+        results = backend_test.ResultsCache(self.cache_path, self.root, {"budgets": budgets}) if cache else None
+        with backend_test.SnapshotCache() as snapshots:
+            tester = backend_test.PocketMentorExtensionTester(
+                self.root, snapshots, backend_test.QuietReporter(), budgets)
+            records = tester.run_all_tests(cache=results)
+        outcomes = [(r.check, r.name, r.status, r.message) for r in records]
+        return outcomes, results.reused if cache else None, len(tester.checks())
+
+    def test_unchanged_tree_reuses_every_check(self):
+        first, reused, checks = self.run_tree()
+        self.assertEqual(reused, 0)
+        second, reused, _ = self.run_tree()
+        self.assertEqual(reused, checks)
+        self.assertEqual(second, first)
+
+    def test_changed_file_reruns_only_the_checks_that_read_it(self):
+        self.run_tree()
+        write_tree(self.root, {"popup.js": "document.querySelector('.note').textContent = 'changed!';"})
+        outcomes, reused, checks = self.run_tree()
+        self.assertGreater(reused, 0)
+        self.assertLess(reused, checks)
+        self.assertEqual(outcomes, self.run_tree(cache=False)[0])
+
+    def test_added_file_and_new_settings_invalidate(self):
+        self.run_tree()
+        write_tree(self.root, {"extra.css": ".note { color: red }"})
+        outcomes, reused, checks = self.run_tree()
+        self.assertLess(reused, checks)
+        self.assertEqual(outcomes, self.run_tree(cache=False)[0])
+        _, reused, _ = self.run_tree(budgets={"page": 1})
+        self.assertEqual(reused, 0)
+
+
+class ReporterTests(unittest.TestCase):
+    def records(self):
+        CheckResult = backend_test.CheckResult
+        return backend_test.RunResults([
+            CheckResult("Manifest JSON", "passed", "info", "Valid JSON", "manifest.json", 0.25, "test_manifest_json"),
+            CheckResult("Manifest Version", "failed", "error", "Expected 3", "manifest.json", 0.5, "test_manifest_json"),
+            CheckResult("CSS: a.css", "failed", "warning", "2 unused selectors", "a.css", 0.125, "test_css_payload"),
+        ], [backend_test.Timing("check", "test_manifest_json", 1.0), backend_test.Timing("read", "a.css", 0.5, 42)])
+
+    def render(self, reporter_class) -> str:
+        stream = io.StringIO()
+        reporter = reporter_class(stream)
+        reporter.finish("/ext", self.records())
+        reporter.flush()
+        return stream.getvalue()
+
+    def test_json_report(self):
+        report = json.loads(self.render(backend_test.JsonReporter))
+        self.assertEqual(report["extension_path"], "/ext")
+        self.assertEqual(report["summary"], {"total_tests": 3, "passed": 1, "failed": 2, "errors": 1,
+                                             "warnings": 1, "success_rate": 1 / 3 * 100})
+        self.assertEqual(report["results"][1], {"name": "Manifest Version", "status": "failed", "severity": "error",
+                                                "file": "manifest.json", "message": "Expected 3", "duration": 0.5,
+                                                "check": "test_manifest_json"})
+        self.assertEqual(report["timings"][1], {"kind": "read", "name": "a.css", "duration": 0.5, "size": 42,
+                                                "cached": False})
+
+    def test_junit_report(self):
+        root = ET.fromstring(self.render(backend_test.JUnitReporter).split("\n", 1)[1])
+        self.assertEqual((root.tag, root.get("tests"), root.get("failures")), ("testsuites", "3", "2"))
+        suites = root.findall("testsuite")
+        self.assertEqual([suite.get("name") for suite in suites], ["/ext:test_manifest_json", "/ext:test_css_payload"])
+        # A check's suite time is its measured wall time, not the sum of its results
+        self.assertEqual([suite.get("time") for suite in suites], ["1.000000", "0.125000"])
+        self.assertEqual([(case.get("name"), case.get("file")) for case in suites[0]],
+                         [("Manifest JSON", "manifest.json"), ("Manifest Version", "manifest.json")])
+        self.assertIsNone(suites[0][0].find("failure"))
+        self.assertEqual(suites[0][1].find("failure").attrib, {"type": "error", "message": "Expected 3"})
+        self.assertEqual(suites[1][0].find("failure").get("type"), "warning")
+
+
+class TimingTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = write_tree(os.path.join(tmp.name, "tree"), TREE)
+        self.snapshots = backend_test.SnapshotCache()
+        self.addCleanup(self.snapshots.close)
+
+    def run_tree(self, reporter=None, cache=None):
+        tester = backend_test.PocketMentorExtensionTester(
+            self.root, self.snapshots, reporter or backend_test.QuietReporter())
+        return tester, tester.run_all_tests(cache=cache)
+
+    def test_checks_and_reads_are_timed(self):
+        tester, records = self.run_tree()
+        checks = [t for t in records.timings if t.kind == "check"]
+        self.assertEqual([t.name for t in checks], [check.__name__ for check in tester.checks()])
+        reads = {t.name: t.size for t in records.timings if t.kind == "read"}
+        self.assertEqual(reads["popup.js"], len(TREE["popup.js"]))
+        self.assertEqual(reads["manifest.json"], len(TREE["manifest.json"]))
+        self.assertTrue(all(t.duration >= 0 and not t.cached for t in records.timings))
+        # Each result names its check and the time since the check's previous result
+        self.assertLessEqual({r.check for r in records}, {t.name for t in checks})
+        self.assertTrue(all(r.duration >= 0 for r in records))
+
+    def test_snapshots_reused_across_runs_are_not_read_again(self):
+        self.run_tree()
+        _, records = self.run_tree()
+        self.assertEqual([t for t in records.timings if t.kind == "read"], [])
+
+    def test_cached_checks_are_marked(self):
+        cache_path = os.path.join(self.root, "cache.json")
+        self.run_tree(cache=backend_test.ResultsCache(cache_path, self.root))
+        _, records = self.run_tree(cache=backend_test.ResultsCache(cache_path, self.root))
+        self.assertTrue(all(t.cached for t in records.timings if t.kind == "check"))
+
+    def test_slowest(self):
+        Timing = backend_test.Timing
+        records = backend_test.RunResults([], [Timing("check", "a", 0.1), Timing("read", "b.js", 0.3, 10),
+                                               Timing("check", "c", 0.2, cached=True)])
+        self.assertEqual([t.name for t in records.slowest(2)], ["b.js", "c"])
+        stream = io.StringIO()
+        reporter = backend_test.HumanReporter(stream, slowest=2)
+        reporter.finish("/ext", records)
+        reporter.flush()
+        output = stream.getvalue()
+        self.assertIn("🐢 Slowest 2:", output)
+        self.assertIn("read  b.js (10 bytes)", output)
+        self.assertIn("check c (cached)", output)
+        self.assertNotIn(" a\n", output)
+
+
+class PayloadBudgetTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "tree")
+
+    def payload(self, files, budgets=None):
+        """name -> (severity, message) of the payload results for a tree"""
+        write_tree(self.root, {**TREE, **files})
+        with backend_test.SnapshotCache() as snapshots:
+            tester = backend_test.PocketMentorExtensionTester(
+                self.root, snapshots, backend_test.QuietReporter(), budgets)
+            records = tester.run_all_tests()
+        return {r.name: (r.severity, r.message) for r in records if r.check == "test_payload_budget"}
+
+    def test_within_budget(self):
+        results = self.payload({})
+        self.assertEqual(results["Payload: page popup.html"][0], "info")
+        self.assertIn("in 2 files", results["Payload: page popup.html"][1])
+        self.assertEqual(results["Payload: content script content.js"][0], "info")
+
+    def test_exceeded_budget_fails(self):
+        results = self.payload({"content.js": "// padding\n" * 20}, {"content_script": 100})
+        self.assertEqual(results["Payload: content script content.js"],
+                         ("error", "220 B in 1 files exceeds budget of 100 B"))
+
+    def test_imports_are_followed(self):
+        results = self.payload({
+            "popup.js": "import './a.js'; import './b.js'; import './gone.js';",
+            "a.js": "export const same = 1;",
+            "b.js": "export const same = 1;",
+            "content.js": "import { same } from './a.js';",
+        })
+        self.assertIn("in 4 files", results["Payload: page popup.html"][1])
+        self.assertEqual(results["Payload: page popup.html References"], ("error", "Missing files: gone.js (from popup.js)"))
+        self.assertEqual(results["Payload: page popup.html Duplicates"][0], "warning")
+        self.assertIn("a.js = b.js", results["Payload: page popup.html Duplicates"][1])
+        self.assertEqual(results["Payload: content script content.js Modules"][0], "warning")
+
+
+def png(width: int, height: int, size: int = 64) -> bytes:
+    """A PNG signature and IHDR chunk for these dimensions, padded to size bytes"""
+    header = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height)
+    return header + b"\0" * (size - len(header))
+
+
+class ImageAssetTests(unittest.TestCase):
+    def test_png_header(self):
+        self.assertEqual(backend_test.image_dimensions("a.PNG", png(16, 32)[:24]), ("PNG", 16, 32))
+        for header in (png(16, 16)[:20], b"GIF89a" + png(16, 16)[6:24], png(16, 16)[:12] + b"IDAT" + png(16, 16)[16:24]):
+            with self.assertRaises(ValueError):
+                backend_test.image_dimensions("a.png", header)
+
+    def test_svg_header(self):
+        dimensions = backend_test.image_dimensions
+        self.assertEqual(dimensions("a.svg", b'<?xml version="1.0"?><svg width="24px" height="12.4">'), ("SVG", 24, 12))
+        self.assertEqual(dimensions("a.svg", b"<svg xmlns='http://www.w3.org/2000/svg' viewBox='0,0,48,32'>"), ("SVG", 48, 32))
+        self.assertEqual(dimensions("a.svg", b'<svg width="100%" height="100%">'), ("SVG", None, None))
+        with self.assertRaises(ValueError):
+            dimensions("a.svg", b"<html><body></body></html>")
+
+    def test_budgets_apply_to_every_packaged_image(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        manifest = {**json.loads(TREE["manifest.json"]), "icons": {"16": "icons/icon16.png"}}
+        root = write_tree(os.path.join(tmp.name, "tree"), {
+            **TREE, "manifest.json": json.dumps(manifest),
+            "icons/icon16.png": png(32, 32), "icons/icon48.png": png(32, 32),
+            "big.png": png(1024, 1024, 4096), "heavy.png": png(2, 2, 64)})
+        with backend_test.SnapshotCache() as snapshots:
+            tester = backend_test.PocketMentorExtensionTester(root, snapshots, backend_test.QuietReporter())
+            records = tester.run_all_tests()
+        results = {r.name: (r.severity, r.message) for r in records if r.check == "test_image_assets"}
+        self.assertEqual(results["Asset: big.png"], ("warning", "1024x1024 PNG, 4.0 KB (0.00 B/px) is larger than 512px"))
+        self.assertEqual(results["Asset: heavy.png"][0], "warning")
+        self.assertIn("exceeds 4 B/px", results["Asset: heavy.png"][1])
+        # A manifest declaration that does not match is an error, a file name only a warning
+        self.assertEqual(results["Asset: Icon 16 (icons/icon16.png)"],
+                         ("error", "Expected 16x16 but image is 32x32"))
+        self.assertEqual(results["Asset: Icon file 48 (icons/icon48.png)"],
+                         ("warning", "Expected 48x48 but image is 32x32"))
+
+
+class LexJsTests(unittest.TestCase):
+    def test_regex_after_condition_parenthesis(self):
+        index = backend_test.lex_js("if (x) /try/.test(y); hidden()")
+        self.assertFalse(index.has_identifier("try"))
+        self.assertTrue(index.has_call("hidden"))
+
+    def test_division_after_parenthesis_and_names(self):
+        index = backend_test.lex_js("(a + b) / 2; c / d / e.f(); x.y / 2 /g; z()")
+        self.assertTrue(index.has_call("e.f"))
+        self.assertTrue(index.has_identifier("g"))
+        self.assertTrue(index.has_call("z"))
+
+    def test_regex_with_slashes_in_class_and_escapes(self):
+        index = backend_test.lex_js("return /a\\/b[/]c/i.test(s) && ok()")
+        self.assertFalse(index.has_identifier("b"))
+        self.assertTrue(index.has_call("ok"))
+
+    def test_comments_and_strings_are_skipped(self):
+        index = backend_test.lex_js("// chrome.tabs.query()\n/* chrome.storage */ run('chrome.runtime')")
+        self.assertFalse(index.uses_namespace("chrome"))
+        self.assertEqual(index.call_args("run"), ["chrome.runtime"])
+
+    def test_template_substitutions(self):
+        index = backend_test.lex_js(
+            "const t = `a ${chrome.runtime.getURL('p.html')} b ${ {k: 1}.k } c`; after()")
+        self.assertEqual(index.call_args("chrome.runtime.getURL"), ["p.html"])
+        self.assertTrue(index.has_call("after"))
+        nested = backend_test.lex_js("`${`inner ${deep()}`}` + outer()")
+        self.assertTrue(nested.has_call("deep"))
+        self.assertTrue(nested.has_call("outer"))
+
+    def test_chains_declarations_and_imports(self):
+        index = backend_test.lex_js(
+            "a?.b?.c(); obj . method ( 'arg' ); class Foo {} function* gen() {}\n"
+            "import x from './a.js'; export { y } from \"./b.js\"; import('./c.js')")
+        self.assertTrue(index.has_path("a.b.c"))
+        self.assertEqual(index.call_args("obj.method"), ["arg"])
+        self.assertEqual(index.declarations, {"Foo", "gen"})
+        self.assertEqual(index.imports, [("./a.js", False), ("./b.js", False), ("./c.js", True)])
+
+    def test_large_scripts_use_the_text_scan(self):
+        text = "chrome.runtime.getURL('big.html');\n" + "let v = 1;\n" * (backend_test.JS_INDEX_MAX_BYTES // 10)
+        index = backend_test.js_index_for(text)
+        self.assertIsInstance(index, backend_test.JsTextScan)
+        self.assertEqual(index.call_args("getURL"), ["big.html"])
+
+
+class CssTests(unittest.TestCase):
+    CSS = """/* .gone { color: red } */
+.used, .unused-a { color: blue; }
+.unused-b { margin: 0 }
+@media (max-width: 600px) { .unused-c { padding: 0 } }
+@media print { .used { display: none } }
+.dup { content: "}{"; }
+.dup { content: "}{"; }
+@keyframes spin { from { opacity: 0 } to { opacity: 1 } }
+"""
+
+    def test_parse_css(self):
+        rules = backend_test.parse_css(self.CSS)
+        self.assertEqual([rule.selectors for rule in rules],
+                         [[".used", ".unused-a"], [".unused-b"], [".unused-c"], [".used"], [".dup"], [".dup"]])
+        self.assertEqual(rules[2].context, "@media (max-width: 600px)")
+        self.assertEqual(rules[4].body, ' content: "}{"; ')
+        self.assertEqual(rules[4].key, rules[5].key)
+
+    def test_prune_css(self):
+        usage = backend_test.SelectorUsage(['<div class="used dup"></div>'])
+        pruned = backend_test.prune_css(self.CSS, usage)
+        self.assertIn(".used { color: blue; }", pruned)
+        self.assertIn("@media print { .used { display: none } }", pruned)
+        self.assertEqual(pruned.count('.dup { content: "}{"; }'), 1)
+        self.assertIn("@keyframes spin", pruned)
+        for gone in (".unused-a", ".unused-b", ".unused-c", "max-width"):
+            self.assertNotIn(gone, pruned.split("*/", 1)[1])
+
+    def test_template_names_count_as_used(self):
+        usage = backend_test.SelectorUsage(["el.className = `status-${kind}`;"])
+        self.assertTrue(usage.selector_used(".status-error"))
+        self.assertFalse(usage.selector_used(".other"))
+
+
+class PatternMatcherTests(unittest.TestCase):
+    PATTERNS = ["ab", "abc", "b", "bca", "chrome.", "chrome.runtime"]
+    TEXT = "abcabca chrome.runtime chrome.tabs abab"
+
+    def expected(self):
+        return {p: backend_test.find_all(self.TEXT, p) for p in self.PATTERNS}
+
+    def test_both_strategies_find_overlapping_and_nested_matches(self):
+        for trie in (False, True):
+            matcher = backend_test.PatternMatcher(self.PATTERNS, trie=trie)
+            self.assertEqual(matcher.uses_trie, trie)
+            self.assertEqual(matcher.scan(self.TEXT).positions, self.expected())
+        self.assertEqual(self.expected()["ab"], [0, 3, 31, 35, 37])
+
+    def test_strategy_follows_pattern_count(self):
+        small = backend_test.PatternMatcher(self.PATTERNS)
+        large = backend_test.PatternMatcher(f"p{i}" for i in range(backend_test.TRIE_MIN_PATTERNS))
+        self.assertFalse(small.uses_trie)
+        self.assertTrue(large.uses_trie)
+
+
+class ValidateBackupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def encode(self, records) -> bytes:
+        return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+    def test_complete_archive_passes(self):
+        path = self.write("full.ndjson.gz", gzip.compress(self.encode(backup_lines(500))))
+        report = validate_backup.validate_backup(path)
+        self.assertTrue(report.ok, report.errors)
+        self.assertEqual(report.counts["note"], 500)
+
+    def test_truncated_archive_reports_last_line_read(self):
+        data = gzip.compress(self.encode(backup_lines(2000)))
+        path = self.write("cut.ndjson.gz", data[:len(data) // 2])
+        report = validate_backup.validate_backup(path)
+        self.assertFalse(report.ok)
+        self.assertEqual(report.error_count, 1)
+        self.assertIn(f"cut short or corrupt after line {report.lines:,}", report.errors[0])
+        # Lines read before the cut are still counted
+        self.assertGreater(report.counts["note"], 0)
+
+    def test_file_that_is_not_gzip(self):
+        path = self.write("junk.ndjson.gz", b"not gzip at all")
+        report = validate_backup.validate_backup(path)
+        self.assertEqual(report.lines, 0)
+        self.assertIn("cut short or corrupt", report.errors[0])
+
+    def test_nan_and_infinity_are_rejected(self):
+        lines = list(backup_lines(0))
+        body = self.encode(lines[:1]) + b'{"record":"stats","data":{"streak":NaN,"total":Infinity}}\n'
+        path = self.write("nan.ndjson", body + self.encode(lines[1:]))
+        report = validate_backup.validate_backup(path)
+        self.assertIn("line 2: not valid JSON (NaN is not valid JSON)", report.errors)
+
+    def test_dates_follow_the_import_check(self):
+        for value in ("2024-05-01T10:00:00.000Z", "2024", "2024-05-01T10:00+05:30",
+                      "+002024-05-01T00:00:00Z", "2024-02-30", "2024-05-01T24:00:00.000Z"):
+            self.assertTrue(validate_backup.is_date(value), value)
+        for value in ("May 1 2024", "2024-05-01 10:00", "20240501", "2024-13-01", "2024-05-32",
+                      "2024-05-01T24:00:01Z", "2024-05-01T10:00+24:00", "-000000-01-01", 1714557600000, None):
+            self.assertFalse(validate_backup.is_date(value), value)
+
+
+# A chrome.storage area kept in memory that records which keys each call asked for
+AI_CACHE_SCRIPT = """
+import { ResponseCache, SessionPool } from './ai-cache.js';
+const storage = (withKeys = true) => {
+  const data = {};
+  const area = {
+    data, reads: [],
+    async get(keys) {
+      area.reads.push(keys);
+      const found = {};
+      for (const key of keys === null ? Object.keys(data) : [].concat(keys)) if (key in data) found[key] = structuredClone(data[key]);
+      return found;
+    },
+    async set(items) { Object.assign(data, structuredClone(items)); },
+    async remove(keys) { for (const key of [].concat(keys)) delete data[key]; }
+  };
+  if (withKeys) area.getKeys = async () => Object.keys(data);
+  return area;
+};
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+const result = {};
+
+const area = storage();
+const cache = new ResponseCache(area, { maxEntries: 2 });
+await cache.set('a', { text: 'A' });
+await cache.set('b', 'B');
+result.persisted = (await new ResponseCache(area).get('a')).text;
+await cache.get('a');
+await cache.set('c', 'C');
+result.keys = Object.keys(area.data).filter(key => key.startsWith('rc_')).sort();
+result.missing = await cache.get('b');
+result.stats = cache.stats;
+
+const expiring = new ResponseCache(null, { ttl: 5 });
+await expiring.set('k', 'v');
+result.fresh = await expiring.get('k');
+await sleep(20);
+result.expired = await expiring.get('k') === undefined;
+
+const swept = storage();
+swept.data.rc_orphan = 'lost';
+swept.data.note = 'kept';
+await new ResponseCache(swept).get('x');
+result.swept = Object.keys(swept.data);
+const old = storage(false);
+old.data.rc_orphan = 'lost';
+await new ResponseCache(old).get('x');
+result.oldReads = old.reads;
+result.oldKept = Object.keys(old.data);
+
+const events = [];
+let made = 0;
+const create = async (apiName, options) => {
+  const id = `${apiName}${++made}`;
+  return {
+    id,
+    clone: async () => ({ id: `${id}-clone`, destroy: () => events.push(`destroy ${id}-clone`) }),
+    destroy: () => events.push(`destroy ${id}`)
+  };
+};
+const pool = new SessionPool(create, 30);
+const used = [];
+await pool.withSession('summarizer', { type: 'tldr', length: 'short' }, session => used.push(session.id));
+await pool.withSession('summarizer', { length: 'short', type: 'tldr' }, session => used.push(session.id));
+await pool.withSession('prompt', {}, session => used.push(session.id));
+try {
+  await pool.withSession('summarizer', { type: 'tldr', length: 'short' }, () => { throw new Error('model crashed'); });
+} catch (error) { result.thrown = error.message; }
+await sleep(100);
+result.used = used;
+result.events = events;
+result.poolStats = pool.stats;
+result.idleLeft = pool.idle.size;
+console.log(JSON.stringify(result));
+"""
+
+
+NOTE_INDEX_SCRIPT = """
+import { NoteIndex, tokenize } from './notes-index.js';
+const notes = [
+  { id: 'n4', type: 'quiz', title: 'Photosynthesis quiz', originalText: 'Chlorophyll absorbs light' },
+  { id: 'n3', type: 'summary', originalText: 'Photons and plants', processedText: 'Über die Photosynthese' },
+  { id: 'n2', type: 'summary', originalText: 'The French Revolution began in 1789' },
+  { id: 'n1', type: 'translation', originalText: 'plants grow; ' + 'x '.repeat(3000) + 'hidden' }
+];
+const ids = list => list.map(note => note.id);
+const index = new NoteIndex(notes);
+const result = {
+  tokens: tokenize('Über-die PHOTO_synthese 42!'),
+  all: ids(index.query()),
+  byType: ids(index.query({ type: 'summary' })),
+  unknownType: ids(index.query({ type: 'flashcard' })),
+  built: index.tokens !== null,
+  prefix: ids(index.query({ text: 'phot' })),
+  words: ids(index.query({ text: 'plants phot' })),
+  repeated: ids(index.query({ text: 'plants plants' })),
+  typeAndText: ids(index.query({ type: 'summary', text: 'über' })),
+  missingWord: ids(index.query({ text: 'revolution zebra' })),
+  pastLimit: ids(index.query({ text: 'hidden' })),
+  frozen: Object.isFrozen(index) && Object.isFrozen(index.notes[0])
+};
+const smaller = index.without('n3');
+result.without = ids(smaller.query({ text: 'phot' }));
+result.unchanged = ids(index.query({ text: 'phot' }));
+result.sizes = [index.size, smaller.size, smaller.without('n3') === smaller, smaller.without('zz') === smaller];
+result.counts = smaller.typeCounts();
+result.sharedBuild = smaller.tokens === index.tokens;
+console.log(JSON.stringify(result));
+"""
+
+
+# A chrome.storage area kept in memory; `fail` names methods that throw once, like a killed worker
+NOTES_STORE_SCRIPT = """
+import { NotesStore } from './notes-store.js';
+const data = {};
+const fail = new Set();
+const area = {
+  async get(keys) {
+    const found = {};
+    for (const key of [].concat(keys)) if (key in data) found[key] = structuredClone(data[key]);
+    return found;
+  },
+  async set(items) { Object.assign(data, structuredClone(items)); },
+  async remove(keys) {
+    if (fail.delete('remove')) throw new Error('worker stopped');
+    for (const key of [].concat(keys)) delete data[key];
+  }
+};
+const note = time => ({ id: `note_${time}_x`, type: 'summary', createdAt: new Date(time).toISOString() });
+const times = notes => notes.map(n => Number(n.id.split('_')[1]));
+const result = {};
+
+data.notes = [note(3), note(2), note(1)];
+fail.add('remove');
+try { await new NotesStore(area, 2).counts(); } catch (error) { result.crashed = error.message; }
+result.afterCrash = (await new NotesStore(area, 2).counts()).total;
+result.legacyLeft = 'notes' in data;
+
+const store = new NotesStore(area, 3);
+await store.clear();
+for (const time of [100, 200, 300, 400, 500]) await store.add(note(time));
+await store.addMany([note(50), note(250), note(260), note(150), note(600), note(10)]);
+result.newestFirst = times(await store.query());
+result.recent = times(await store.query({ limit: 3 }));
+console.log(JSON.stringify(result));
+"""
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class NotesStoreTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        done = subprocess.run(["node", "--input-type=module", "-e", NOTES_STORE_SCRIPT], cwd=HERE,
+                              capture_output=True, text=True, timeout=60)
+        if done.returncode != 0:
+            raise AssertionError(done.stderr)
+        cls.result = json.loads(done.stdout.strip().splitlines()[-1])
+
+    def test_migration_survives_a_stop_before_the_legacy_array_is_removed(self):
+        self.assertEqual(self.result["crashed"], "worker stopped")
+        # The second start only removes the array instead of migrating it again
+        self.assertEqual(self.result["afterCrash"], 3)
+        self.assertFalse(self.result["legacyLeft"])
+
+    def test_imported_notes_are_placed_by_date(self):
+        self.assertEqual(self.result["newestFirst"], [600, 500, 400, 300, 260, 250, 200, 150, 100, 50, 10])
+        self.assertEqual(self.result["recent"], [600, 500, 400])
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class AiCacheTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        done = subprocess.run(["node", "--input-type=module", "-e", AI_CACHE_SCRIPT], cwd=HERE,
+                              capture_output=True, text=True, timeout=60)
+        if done.returncode != 0:
+            raise AssertionError(done.stderr)
+        cls.result = json.loads(done.stdout.strip().splitlines()[-1])
+
+    def test_responses_persist_and_least_recently_used_is_evicted(self):
+        self.assertEqual(self.result["persisted"], "A")
+        self.assertEqual(self.result["keys"], ["rc_a", "rc_c"])
+        self.assertNotIn("missing", self.result)
+        self.assertEqual(self.result["stats"], {"hits": 1, "misses": 1, "evictions": 1})
+
+    def test_expired_responses_are_misses(self):
+        self.assertEqual(self.result["fresh"], "v")
+        self.assertTrue(self.result["expired"])
+
+    def test_orphans_are_swept_only_when_keys_can_be_listed(self):
+        self.assertEqual(self.result["swept"], ["note"])
+        # Without getKeys nothing reads the whole area, so the orphan stays
+        self.assertNotIn(None, self.result["oldReads"])
+        self.assertEqual(self.result["oldKept"], ["rc_orphan"])
+
+    def test_sessions_are_reused_cloned_and_destroyed(self):
+        # Option order does not matter, prompt sessions hand out clones
+        self.assertEqual(self.result["used"], ["summarizer1", "summarizer1", "prompt2-clone"])
+        self.assertEqual(self.result["thrown"], "model crashed")
+        self.assertEqual(self.result["poolStats"], {"created": 2, "reused": 2, "destroyed": 2})
+        # The failed session is destroyed at once, the idle prompt session after the timeout
+        self.assertEqual(self.result["events"], ["destroy prompt2-clone", "destroy summarizer1", "destroy prompt2"])
+        self.assertEqual(self.result["idleLeft"], 0)
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class NoteIndexTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        done = subprocess.run(["node", "--input-type=module", "-e", NOTE_INDEX_SCRIPT], cwd=HERE,
+                              capture_output=True, text=True, timeout=60)
+        if done.returncode != 0:
+            raise AssertionError(done.stderr)
+        cls.result = json.loads(done.stdout.strip().splitlines()[-1])
+
+    def test_tokenize(self):
+        self.assertEqual(self.result["tokens"], ["über", "die", "photo", "synthese", "42"])
+
+    def test_type_filter_keeps_newest_first_order(self):
+        self.assertEqual(self.result["all"], ["n4", "n3", "n2", "n1"])
+        self.assertEqual(self.result["byType"], ["n3", "n2"])
+        self.assertEqual(self.result["unknownType"], [])
+        # Filtering by type alone does not build the text index
+        self.assertFalse(self.result["built"])
+
+    def test_text_search(self):
+        self.assertEqual(self.result["prefix"], ["n4", "n3"])
+        self.assertEqual(self.result["words"], ["n3"])
+        self.assertEqual(self.result["repeated"], ["n3", "n1"])
+        self.assertEqual(self.result["typeAndText"], ["n3"])
+        self.assertEqual(self.result["missingWord"], [])
+        self.assertEqual(self.result["pastLimit"], [])
+
+    def test_snapshots_are_immutable(self):
+        self.assertTrue(self.result["frozen"])
+        self.assertEqual(self.result["without"], ["n4"])
+        self.assertEqual(self.result["unchanged"], ["n4", "n3"])
+        self.assertEqual(self.result["sizes"], [4, 3, True, True])
+        self.assertEqual(self.result["counts"], {"quiz": 1, "summary": 1, "translation": 1})
+        self.assertTrue(self.result["sharedBuild"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Pocket Mentor+ Backup Validator
+Checks NDJSON backups written by the notebook export, line by line, so large
+libraries can be verified offline without loading a whole file into memory
+"""
+
+import argparse
+import gzip
+import json
+import re
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+# Must match backup-format.js
+BACKUP_FORMAT = "pocket-mentor-backup"
+BACKUP_VERSION = 1
+DATA_RECORDS = ("note", "session", "stats")
+NOTE_TEXT_FIELDS = ("originalText", "processedText", "url", "title")
+
+# Problems printed per file before the rest are only counted
+DEFAULT_MAX_ERRORS = 20
+
+# The ECMAScript date time string format, as matched by ISO_DATE in backup-format.js
+ISO_DATE = re.compile(r"(?!-000000)([+-]\d{6}|\d{4})(?:-(\d{2})(?:-(\d{2}))?)?"
+                      r"(?:T(\d{2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?(Z|[+-](\d{2}):(\d{2}))?)?")
+
+
+def is_date(value: Any) -> bool:
+    """True when the import's isDate() accepts value: the format toISOString() writes, with in-range fields"""
+    if not isinstance(value, str):
+        return False
+    match = ISO_DATE.fullmatch(value)
+    if not match:
+        return False
+    month, day, hour, minute, second, fraction, zone, zone_hour, zone_minute = (
+        int(field) if field and field.isdigit() else field for field in match.groups()[1:])
+    if month is not None and not 1 <= month <= 12:
+        return False
+    # Like Date.parse, any day up to 31 is accepted whatever the month
+    if day is not None and not 1 <= day <= 31:
+        return False
+    if hour is not None:
+        if minute > 59 or (second or 0) > 59:
+            return False
+        # 24:00 is midnight at the end of the day and takes no minutes or seconds
+        if hour > 24 or (hour == 24 and (minute or second or fraction)):
+            return False
+    if zone not in (None, "Z") and (zone_hour > 23 or zone_minute > 59):
+        return False
+    return True
+
+
+def reject_constant(name: str):
+    """json.loads accepts NaN and Infinity, which JSON.parse on import does not"""
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def validate_record(record: Any) -> Optional[str]:
+    """Why a parsed record is not acceptable, or None when it is; mirrors validateRecord()"""
+    if not isinstance(record, dict):
+        return "record is not an object"
+
+    kind = record.get("record")
+    data = record.get("data")
+    if kind == "header":
+        if record.get("format") != BACKUP_FORMAT:
+            return f"unknown format {json.dumps(record.get('format'))}"
+        version = record.get("version")
+        if not isinstance(version, int) or isinstance(version, bool) or version > BACKUP_VERSION:
+            return f"unsupported version {json.dumps(version)}"
+        return None
+    if kind == "note":
+        return validate_note(data)
+    if kind == "session":
+        return None if isinstance(data, dict) else "session data is not an object"
+    if kind == "stats":
+        if not isinstance(data, dict):
+            return "stats data is not an object"
+        for key, value in data.items():
+            if key != "lastActiveDate" and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+                return f"stats {key} is not a number"
+        return None
+    if kind == "end":
+        count = record.get("records")
+        return None if isinstance(count, int) and not isinstance(count, bool) else "end record has no record count"
+    return f"unknown record {json.dumps(kind)}"
+
+
+def validate_note(note: Any) -> Optional[str]:
+    if not isinstance(note, dict):
+        return "note data is not an object"
+    note_id = note.get("id")
+    if not isinstance(note_id, str) or not note_id:
+        return "note has no id"
+    if not isinstance(note.get("type"), str) or not note["type"]:
+        return f"note {note_id} has no type"
+    for field in NOTE_TEXT_FIELDS:
+        if note.get(field) is not None and not isinstance(note[field], str):
+            return f"note {note_id} {field} is not a string"
+    if "createdAt" in note and not is_date(note["createdAt"]):
+        return f"note {note_id} createdAt is not a date"
+    return None
+
+
+class BackupReport:
+    """Counts and problems for one backup file"""
+
+    def __init__(self, path: str, max_errors: int = DEFAULT_MAX_ERRORS):
+        self.path = path
+        self.max_errors = max_errors
+        self.lines = 0
+        self.bytes = 0
+        self.counts = {kind: 0 for kind in DATA_RECORDS}
+        self.types: Dict[str, int] = {}
+        self.duplicates = 0
+        self.header: Optional[Dict[str, Any]] = None
+        self.end: Optional[Dict[str, Any]] = None
+        self.errors: List[str] = []
+        self.error_count = 0
+        self.warnings: List[str] = []
+
+    def error(self, line: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(f"line {line}: {message}" if line else message)
+
+    @property
+    def ok(self) -> bool:
+        return self.error_count == 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "ok": self.ok,
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "records": dict(self.counts),
+            "noteTypes": dict(sorted(self.types.items())),
+            "duplicateNotes": self.duplicates,
+            "exportedAt": self.header.get("exportedAt") if self.header else None,
+            "errors": self.error_count,
+            "errorSamples": self.errors,
+            "warnings": self.warnings,
+        }
+
+
+def open_backup(path: str):
+    """Binary handle for a backup, transparently gunzipping .gz files"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def validate_backup(path: str, max_errors: int = DEFAULT_MAX_ERRORS) -> BackupReport:
+    """Stream one backup file and check every record against the format"""
+    report = BackupReport(path, max_errors)
+    try:
+        is_backup = read_records(report, path)
+    except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+        # The counts so far stay in the report; the totals would only repeat the problem
+        report.error(0, f"archive is cut short or corrupt after line {report.lines:,} ({e})")
+        return report
+    if is_backup:
+        check_totals(report)
+    return report
+
+
+def read_records(report: BackupReport, path: str) -> bool:
+    """Check each line in turn; False when the first record shows the file is not a backup"""
+    note_ids = set()
+    with open_backup(path) as f:
+        for number, raw in enumerate(f, 1):
+            report.lines = number
+            report.bytes += len(raw)
+            if not raw.strip():
+                continue
+
+            try:
+                record = json.loads(raw.decode("utf-8"), parse_constant=reject_constant)
+            except UnicodeDecodeError:
+                report.error(number, "not valid UTF-8")
+                continue
+            except json.JSONDecodeError as e:
+                report.error(number, f"not valid JSON ({e.msg})")
+                continue
+            except ValueError as e:
+                report.error(number, f"not valid JSON ({e})")
+                continue
+
+            problem = validate_record(record)
+            if report.header is None:
+                if problem or record.get("record") != "header":
+                    report.error(number, f"not a Pocket Mentor+ backup ({problem or 'missing header'})")
+                    return False
+                report.header = record
+                continue
+            if problem:
+                report.error(number, problem)
+                continue
+
+            kind = record["record"]
+            if report.end is not None:
+                report.error(number, f"{kind} record after the end record")
+            if kind == "header":
+                report.error(number, "second header record")
+            elif kind == "end":
+                report.end = record
+            else:
+                report.counts[kind] += 1
+                if kind == "note":
+                    note = record["data"]
+                    if note["id"] in note_ids:
+                        report.duplicates += 1
+                    note_ids.add(note["id"])
+                    report.types[note["type"]] = report.types.get(note["type"], 0) + 1
+                elif kind == "stats" and report.counts["stats"] > 1:
+                    report.error(number, "more than one stats record")
+    return True
+
+
+def check_totals(report: BackupReport):
+    """Compare what was read with the header and end record"""
+    if report.header is None:
+        report.error(0, "file is empty")
+        return
+
+    data_records = sum(report.counts.values())
+    if report.end is None:
+        report.error(0, "no end record, the backup looks cut short")
+    elif report.end["records"] != data_records:
+        report.error(0, f"end record expects {report.end['records']} records, found {data_records}")
+
+    for field, kind in (("notes", "note"), ("studySessions", "session")):
+        expected = report.header.get(field)
+        if isinstance(expected, int) and expected != report.counts[kind]:
+            # Notes saved while an export ran can shift the count the header announced
+            report.warnings.append(f"header announces {expected} {field}, found {report.counts[kind]}")
+
+    if report.duplicates:
+        report.warnings.append(f"{report.duplicates} notes repeat an earlier id and are skipped on import")
+
+
+def format_bytes(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
+
+
+def print_report(report: BackupReport, elapsed: float):
+    icon = "✅" if report.ok else "❌"
+    counts = report.counts
+    print(f"{icon} {report.path}: {counts['note']:,} notes, {counts['session']:,} sessions, "
+          f"{report.lines:,} lines, {format_bytes(report.bytes)} in {elapsed:.2f}s")
+    if report.types:
+        print("   📊 " + ", ".join(f"{kind} {count:,}" for kind, count in sorted(report.types.items())))
+    for warning in report.warnings:
+        print(f"   ⚠️ {warning}")
+    for error in report.errors:
+        print(f"   ❌ {error}")
+    hidden = report.error_count - len(report.errors)
+    if hidden > 0:
+        print(f"   … {hidden:,} more problems")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Validate Pocket Mentor+ NDJSON backups")
+    parser.add_argument("files", nargs="+", help="Backup files (.ndjson, or .ndjson.gz)")
+    parser.add_argument("--max-errors", type=int, default=DEFAULT_MAX_ERRORS,
+                        help=f"Problems listed per file (default: {DEFAULT_MAX_ERRORS})")
+    parser.add_argument("--json", metavar="FILE", help="Write the reports to FILE")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    reports = []
+    for path in args.files:
+        started = time.perf_counter()
+        try:
+            report = validate_backup(path, args.max_errors)
+        except OSError as e:
+            report = BackupReport(path, args.max_errors)
+            report.error(0, f"cannot read file ({e.strerror or e})")
+        print_report(report, time.perf_counter() - started)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([report.to_dict() for report in reports], f, indent=2)
+        print(f"\n💾 Reports written to {args.json}")
+    sys.exit(0 if all(report.ok for report in reports) else 1)
+
+
+if __name__ == "__main__":
+    main()
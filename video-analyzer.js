@@ -1,10 +1,20 @@
 // ===== Pocket Mentor+ Video Analyzer 🎥✨ =====
 // Extract and summarize video content from background videos
 
+const VIDEO_SELECTOR = 'video, iframe[src*="youtube"], iframe[src*="vimeo"]';
+// Added nodes are collected and scanned together once the page is idle, or after this long at most
+const DETECTION_IDLE_TIMEOUT = 500;
+
 class VideoAnalyzer {
   constructor() {
     this.isAnalyzing = false;
     this.supportedSites = ['youtube.com', 'vimeo.com', 'dailymotion.com'];
+    this.observer = null;
+    this.pendingNodes = new Set();
+    this.scanScheduled = false;
+    // Scans run and subtree roots searched (not every node inside them), to confirm
+    // detection stays cheap on busy pages
+    this.stats = { scans: 0, rootsScanned: 0, mutations: 0, controlsAdded: 0 };
     this.init();
   }
 
@@ -14,12 +24,95 @@ class VideoAnalyzer {
   }
 
   setupVideoDetection() {
-    // Monitor for video elements
+    // One full scan for videos already on the page
     this.detectVideos();
-    
-    // Setup mutation observer for dynamically loaded videos
-    const observer = new MutationObserver(() => this.detectVideos());
-    observer.observe(document.body, { childList: true, subtree: true });
+
+    // Only video sites load players dynamically; elsewhere Alt + V still works on demand
+    if (!this.isSupportedSite() || this.stats.controlsAdded > 0) {
+      this.stopVideoDetection();
+      return;
+    }
+
+    // Watch for dynamically loaded videos, looking only at what was added
+    this.observer = new MutationObserver((mutations) => this.queueAddedNodes(mutations));
+    this.observer.observe(document.body, { childList: true, subtree: true });
+  }
+
+  isSupportedSite() {
+    const hostname = window.location.hostname;
+    return this.supportedSites.some(site => hostname === site || hostname.endsWith(`.${site}`));
+  }
+
+  queueAddedNodes(mutations) {
+    for (const mutation of mutations) {
+      this.stats.mutations++;
+      for (const node of mutation.addedNodes) {
+        if (node.nodeType === Node.ELEMENT_NODE && !this.isOwnElement(node)) {
+          this.pendingNodes.add(node);
+        }
+      }
+    }
+    if (this.pendingNodes.size > 0) {
+      this.scheduleScan();
+    }
+  }
+
+  scheduleScan() {
+    if (this.scanScheduled) return;
+    this.scanScheduled = true;
+
+    const run = () => {
+      this.scanScheduled = false;
+      this.scanPendingNodes();
+    };
+    if (typeof requestIdleCallback === 'function') {
+      requestIdleCallback(run, { timeout: DETECTION_IDLE_TIMEOUT });
+    } else {
+      requestAnimationFrame(run);
+    }
+  }
+
+  scanPendingNodes() {
+    const roots = Array.from(this.pendingNodes);
+    this.pendingNodes.clear();
+
+    const videos = [];
+    for (const root of roots) {
+      // Nodes removed again before the scan ran, e.g. recycled list items
+      if (!root.isConnected) continue;
+      this.stats.rootsScanned++;
+      if (root.matches(VIDEO_SELECTOR)) {
+        videos.push(root);
+      }
+      videos.push(...root.querySelectorAll(VIDEO_SELECTOR));
+    }
+
+    this.stats.scans++;
+    if (videos.length > 0) {
+      this.addVideoControls(videos);
+    }
+    if (this.stats.controlsAdded > 0) {
+      this.stopVideoDetection();
+    }
+  }
+
+  stopVideoDetection() {
+    this.pendingNodes.clear();
+    if (!this.observer) return;
+    this.observer.disconnect();
+    this.observer = null;
+    const { scans, rootsScanned, controlsAdded } = this.stats;
+    console.log(`🎥 Video detection stopped: ${scans} scans of ${rootsScanned} subtrees, ${controlsAdded} controls added`);
+  }
+
+  /** Scan and subtree counters for the video detection on this page */
+  getDetectionStats() {
+    return { ...this.stats, observing: this.observer !== null, pending: this.pendingNodes.size };
+  }
+
+  // Our own buttons, modals and notifications never contain videos
+  isOwnElement(element) {
+    return typeof element.className === 'string' && element.className.startsWith('pocket-mentor');
   }
 
   setupKeyboardShortcuts() {
@@ -33,8 +126,11 @@ class VideoAnalyzer {
   }
 
   detectVideos() {
-    const videos = document.querySelectorAll('video, iframe[src*="youtube"], iframe[src*="vimeo"]');
-    
+    const videos = document.querySelectorAll(VIDEO_SELECTOR);
+    this.stats.scans++;
+    // The whole document is one root
+    this.stats.rootsScanned++;
+
     if (videos.length > 0) {
       this.addVideoControls(videos);
     }
@@ -45,6 +141,7 @@ class VideoAnalyzer {
       if (video.dataset.pocketMentorAdded) return;
       
       video.dataset.pocketMentorAdded = 'true';
+      this.stats.controlsAdded++;
       
       // Create floating video control button
       const controlBtn = document.createElement('button');
@@ -93,7 +190,7 @@ class VideoAnalyzer {
   }
 
   async analyzeCurrentVideo() {
-    const videos = document.querySelectorAll('video, iframe[src*="youtube"], iframe[src*="vimeo"]');
+    const videos = document.querySelectorAll(VIDEO_SELECTOR);
     const activeVideo = Array.from(videos).find(v => !v.paused && v.currentTime > 0) || videos[0];
     
     if (activeVideo) {
@@ -529,5 +626,3 @@ style.textContent = `
   }
 `;
 document.head.appendChild(style);
-
-export default videoAnalyzer;
\ No newline at end of file